@@ -0,0 +1,103 @@
+"""
+------------------Prologue--------------------
+File Name: json_provider_benchmark.py
+Path: Backend/benchmarks/json_provider_benchmark.py
+
+Description:
+Compares encode times of Flask's default JSON provider, after the `convert_to_builtin_types` pass the routes used
+to run, against the orjson provider on the chart, results and portfolio payloads. Payloads are built from
+synthetic data so it runs offline.
+
+Input:
+Optional --bars, --tickers and --repeat.
+
+Output:
+Table of median encode times and output sizes printed to stdout.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.chart_payload_benchmark import synthetic_bars  # noqa: E402
+from kobrastocks.json_provider import OrjsonProvider  # noqa: E402
+from kobrastocks.services import build_chart, chart_payload, HORIZONS  # noqa: E402
+from kobrastocks.utils import convert_to_builtin_types  # noqa: E402
+
+
+def results_payload(rng):
+    """Same shape as the `/api/predictions` response, with NumPy scalars as the models return them"""
+    return {
+        horizon: {
+            'classification': {
+                'accuracy': np.float64(rng.random()),
+                'classification_report': 'precision    recall  f1-score   support\n' * 8,
+                'today_prediction': np.int64(rng.integers(0, 2)),
+            },
+            'regression': {
+                'mse': np.float64(rng.random()),
+                'mae': np.float64(rng.random()),
+                'r2': np.float64(rng.random()),
+                'prediction': np.float32(rng.random() * 200),
+            },
+        }
+        for horizon in HORIZONS.values()
+    }
+
+
+def portfolio_payload(rng, tickers, bars):
+    """Recommendations for every holding plus a value history series per holding"""
+    return {
+        'recommendations': {f'T{i}': results_payload(rng) for i in range(tickers)},
+        'history': {f'T{i}': rng.random(bars) * 100 for i in range(tickers)},
+        'weights': rng.dirichlet(np.ones(tickers)),
+    }
+
+
+def measure(label, encode, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode()
+        timings.append((time.perf_counter() - start) * 1000)
+    return label, len(body), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bars', type=int, default=1260)
+    parser.add_argument('--tickers', type=int, default=25)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    default_provider, orjson_provider = DefaultJSONProvider(app), OrjsonProvider(app)
+    rng = np.random.default_rng(42)
+    chartData = synthetic_bars(args.bars)
+    payloads = {
+        'chart (plotly dict)': build_chart(chartData).to_dict(),
+        'chart (columnar)': chart_payload(chartData),
+        'results': results_payload(rng),
+        'portfolio': portfolio_payload(rng, args.tickers, args.bars),
+    }
+
+    print(f"median of {args.repeat} runs")
+    print(f"{'payload':<22}{'default+convert ms':>20}{'orjson ms':>12}{'speedup':>10}{'bytes':>12}")
+    for name, payload in payloads.items():
+        _, _, default_ms = measure(name, lambda: default_provider.dumps(convert_to_builtin_types(payload)), args.repeat)
+        _, size, orjson_ms = measure(name, lambda: orjson_provider.dumps(payload), args.repeat)
+        print(f"{name:<22}{default_ms:>20.2f}{orjson_ms:>12.2f}{default_ms / orjson_ms:>9.1f}x{size:>12,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,7 @@ File Name: __init__.py
 Path: Backend/kobrastocks/__init__.py
 
 Description:
-Initializes the Flask application and configures key components, including database, encryption, JWT, CORS, and environment variables. Registers main, authentication, user, and portfolio blueprints for route handling.
+Initializes the Flask application and configures key components, including database, encryption, JWT, CORS, and environment variables. Registers main, authentication, user, and portfolio blueprints for route handling, the offline CLI commands, and the orjson JSON provider.
 
 Input:
 Environment variables (SECRET_KEY, SQLALCHEMY_DATABASE_URI, JWT_SECRET_KEY)
@@ -29,11 +29,14 @@ from flask_migrate import Migrate
 from flask_cors import CORS
 from dotenv import load_dotenv
 from .stock_routes import stocks as stocks_blueprint
+from .commands import train_global_model_command, tune_models_command
+from .json_provider import OrjsonProvider
 
 
 migrate = Migrate() # makes migrate obj
 load_dotenv() #load env
 app = Flask(__name__) # makes flaks obj
+app.json = OrjsonProvider(app) # orjson for every jsonify, serializes numpy / pandas values natively
 CORS(app, resources={r"/api/*": {
     "origins": "http://localhost:8080",
     "methods": ["GET", "POST", "DELETE", "PUT", "OPTIONS"],
@@ -60,3 +63,7 @@ app.register_blueprint(portfolio_blueprint)
 app.register_blueprint(suggestions_blueprint)
 app.register_blueprint(stocks_blueprint)
 
+# Register CLI commands here
+app.cli.add_command(train_global_model_command)
+app.cli.add_command(tune_models_command)
+
@@ -0,0 +1,155 @@
+"""
+------------------Prologue--------------------
+File Name: bar_store.py
+Path: Backend/kobrastocks/bar_store.py
+
+Description:
+Local store of full price histories used to serve chart data one page at a time. The complete history of a
+(ticker, interval) is downloaded once and kept in memory for `BAR_STORE_TTL` seconds; chart requests then slice
+it by date range or by cursor, so the first render only ships the visible window and older bars are loaded
+as the user scrolls back. Key functions include:
+- `get_bars`: Full bar history for a ticker and interval, from the store or one upstream fetch.
+- `get_overlaid_bars`: The history with overlay columns, computed once per stored history and overlay list.
+- `slice_bars`: Selects a date range, or `limit` bars before/after a cursor.
+- `encode_cursor` / `decode_cursor`: Opaque page tokens pointing at a bar date.
+- `get_bar_page`: One page in the columnar chart format with the cursors of the neighbouring pages.
+
+Input:
+Ticker, interval and the page parameters of `/api/stock_chart`.
+
+Output:
+Columnar chart payloads with `cursors`, or None if the ticker has no data.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import base64
+import binascii
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import TTLCache
+from .services import fetch_chart_data, chart_payload, add_overlays
+
+logger = logging.getLogger(__name__)
+
+BAR_STORE_TTL = int(os.environ.get('BAR_STORE_TTL', 900))  # seconds before a history is downloaded again
+BAR_STORE_SIZE = int(os.environ.get('BAR_STORE_SIZE', 256))  # (ticker, interval) histories kept in memory
+DEFAULT_PAGE_LIMIT = 250
+MAX_PAGE_LIMIT = 5000
+
+_bars = TTLCache(maxsize=BAR_STORE_SIZE, ttl=BAR_STORE_TTL)
+_overlaid = TTLCache(maxsize=BAR_STORE_SIZE, ttl=BAR_STORE_TTL)
+
+
+def get_bars(ticker, interval='1d'):
+    """Full bar history with an extra `Epoch` column (bar date as epoch seconds) the pages are sliced on"""
+    def load():
+        bars = fetch_chart_data(ticker, interval, years=None)
+        bars['Epoch'] = pd.to_datetime(bars['Date']).values.astype('datetime64[s]').astype(np.int64)
+        return bars
+
+    return _bars.get_or_set((ticker.upper(), interval), load)
+
+
+def get_overlaid_bars(ticker, interval='1d', overlays=()):
+    """
+    (bars, overlay descriptors) for the full history, the overlay columns computed on the whole history once per
+    stored history and overlay list, so paging through a chart slices the same frame instead of recomputing
+    every indicator for every page
+    """
+    bars = get_bars(ticker, interval)
+    if not overlays or bars is None or bars.empty:
+        return bars, []
+    key = (ticker.upper(), interval, tuple(overlays))
+    cached = _overlaid.get(key)
+    if cached is not None and cached[0] is bars:  # computed from the history currently in the store
+        return cached[1], cached[2]
+    overlaid, added = add_overlays(bars, overlays)
+    _overlaid.set(key, (bars, overlaid, added))
+    return overlaid, added
+
+
+def encode_cursor(epoch, interval):
+    """Page token for the bar at `epoch` seconds"""
+    return base64.urlsafe_b64encode(f"{interval}:{int(epoch)}".encode()).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, interval):
+    """Epoch seconds a token points at. Raises ValueError for malformed tokens or tokens of another interval"""
+    try:
+        decoded = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        token_interval, epoch = decoded.split(':')
+        epoch = int(epoch)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor {token!r}")
+    if token_interval != interval:
+        raise ValueError(f"Cursor {token!r} belongs to interval {token_interval}, not {interval}")
+    return epoch
+
+
+def _to_epoch(date):
+    return int(pd.Timestamp(date).timestamp())
+
+
+def slice_bars(bars, start=None, end=None, before=None, after=None, limit=None):
+    """
+    Selects bars dated in [start, end] (date strings, both optional), then keeps `limit` of them:
+    the newest ones by default or with `before` (bars strictly older than that epoch), the oldest ones
+    with `after` (bars strictly newer than that epoch).
+    """
+    epochs = bars['Epoch'].values
+    low, high = 0, len(bars)
+    if start is not None:
+        low = max(low, int(np.searchsorted(epochs, _to_epoch(start), side='left')))
+    if end is not None:
+        high = min(high, int(np.searchsorted(epochs, _to_epoch(end) + 86399, side='right')))  # whole end day
+    if before is not None:
+        high = min(high, int(np.searchsorted(epochs, before, side='left')))
+    if after is not None:
+        low = max(low, int(np.searchsorted(epochs, after, side='right')))
+    if limit is not None and high - low > limit:
+        if after is not None:
+            high = low + limit
+        else:
+            low = high - limit
+    return bars.iloc[low:max(low, high)]
+
+
+def get_bar_page(ticker, interval='1d', start=None, end=None, before=None, after=None, limit=DEFAULT_PAGE_LIMIT,
+                 zoom=60, pack=False, overlays=()):
+    """
+    One page of bars in the columnar chart format. `before`/`after` are cursor tokens from a previous page.
+    The `cursors` entry holds the token for the next older page (`before`) and the next newer page (`after`),
+    None where the history ends. Overlays come from `get_overlaid_bars`, computed on the full history before
+    slicing, so every page has warmed up values. Returns None if the ticker has no data.
+    """
+    limit = min(limit or DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT)
+    before = decode_cursor(before, interval) if before else None
+    after = decode_cursor(after, interval) if after else None
+    try:
+        bars, added = get_overlaid_bars(ticker, interval, overlays)
+    except Exception as e:
+        logger.error(f"Error loading bars for {ticker}: {e}")
+        return None
+    if bars is None or bars.empty:
+        return None
+
+    page = slice_bars(bars, start=start, end=end, before=before, after=after, limit=limit)
+    epochs = bars['Epoch'].values
+    if page.empty:
+        # nothing in the requested range
+        payload = {'format': 'columnar', 'encoding': 'base64' if pack else 'json', 'length': 0, 'columns': {}, 'layout': None}
+        first = last = None
+    else:
+        payload = chart_payload(page.drop(columns='Epoch'), zoom=min(zoom, len(page)), pack=pack, overlays=added)
+        first, last = int(page['Epoch'].iloc[0]), int(page['Epoch'].iloc[-1])
+    payload['cursors'] = {
+        'before': encode_cursor(first, interval) if first is not None and first > epochs[0] else None,
+        'after': encode_cursor(last, interval) if last is not None and last < epochs[-1] else None,
+    }
+    payload['total_length'] = len(bars)
+    return payload
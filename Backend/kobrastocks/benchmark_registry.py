@@ -0,0 +1,162 @@
+"""
+------------------Prologue--------------------
+File Name: benchmark_registry.py
+Path: Backend/kobrastocks/benchmark_registry.py
+
+Description:
+Process-wide registry of benchmark series (SPY, QQQ, the broad index ETFs and the SPDR sector ETFs by default,
+configurable with BENCHMARK_TICKERS). Every benchmark's five year daily closes and returns are downloaded together
+in one request on first use, and after each session close only the new bars are fetched and appended, so alpha and
+beta for every user and endpoint read the same in-memory series. Key functions include:
+- `get_benchmark_returns`: Daily returns of one benchmark.
+- `get_benchmark_prices`: Daily closes of one benchmark.
+- `list_benchmarks`: Configured benchmark tickers with their names.
+
+Input:
+Benchmark ticker.
+
+Output:
+Pandas Series of daily returns or closes.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+import yfinance as yf
+
+from .cache import seconds_until_next_bar, completed_sessions_end
+from .returns_cache import window_start
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_NAMES = {
+    'SPY': 'S&P 500',
+    'QQQ': 'Nasdaq 100',
+    'DIA': 'Dow Jones Industrial Average',
+    'IWM': 'Russell 2000',
+    'XLK': 'Technology',
+    'XLF': 'Financials',
+    'XLV': 'Health Care',
+    'XLE': 'Energy',
+    'XLY': 'Consumer Discretionary',
+    'XLP': 'Consumer Staples',
+    'XLI': 'Industrials',
+    'XLU': 'Utilities',
+    'XLB': 'Materials',
+    'XLRE': 'Real Estate',
+    'XLC': 'Communication Services',
+}
+BENCHMARK_TICKERS = [
+    t.strip().upper() for t in os.environ.get('BENCHMARK_TICKERS', ','.join(BENCHMARK_NAMES)).split(',') if t.strip()
+]
+DEFAULT_BENCHMARK = 'SPY' if 'SPY' in BENCHMARK_TICKERS else BENCHMARK_TICKERS[0]
+RETRY_SECONDS = 60  # wait before another download after a failed or incomplete one
+
+_registry = {'prices': None, 'returns': None, 'fresh_until': datetime.min, 'retry_at': datetime.min}
+_registry_lock = threading.Lock()
+
+
+def _download(start):
+    """
+    Closes of every benchmark from `start` up to the last completed session, one column each, missing days left as
+    NaN per column. A session still trading is left out, so no partial bar is ever stored as a close.
+    """
+    end = completed_sessions_end()
+    if str(start) >= end:
+        return pd.DataFrame(columns=BENCHMARK_TICKERS)
+    data = yf.download(
+        BENCHMARK_TICKERS, start=start, end=end, interval='1d',
+        auto_adjust=True, group_by='column', threads=True, progress=False
+    ) # one request for every benchmark
+    if data.empty:
+        return pd.DataFrame(columns=BENCHMARK_TICKERS)
+    prices = data['Close']
+    if isinstance(prices, pd.Series):
+        prices = prices.to_frame(BENCHMARK_TICKERS[0])
+    return prices.reindex(columns=BENCHMARK_TICKERS).dropna(how='all')
+
+
+def _refresh(ticker):
+    """
+    Full window on first use, afterwards only the bars after the last cached one, then trimmed to the window. No
+    new bars (a holiday, or the next close not settled yet) leaves the frames as they are. Raises without touching
+    the registry when the full download is empty or any download has no closes for `ticker`.
+    """
+    prices = _registry['prices']
+    if not _has(prices, ticker):
+        prices = _download(window_start())
+        if prices.empty or prices[ticker].isna().all():
+            raise ValueError(f"Benchmark download returned no closes for {ticker}")
+    else:
+        last_date = prices.index[-1]
+        new_prices = _download((last_date + timedelta(days=1)).strftime('%Y-%m-%d'))
+        if not new_prices.empty:
+            new_prices = new_prices[new_prices.index > last_date]
+        if new_prices.empty:
+            return
+        if new_prices[ticker].isna().all():
+            raise ValueError(f"New benchmark bars after {last_date.date()} have no closes for {ticker}")
+        prices = pd.concat([prices, new_prices])
+        cutoff = pd.Timestamp(window_start())
+        if prices.index.tz is not None:
+            cutoff = cutoff.tz_localize(prices.index.tz)
+        prices = prices[prices.index >= cutoff]
+    # each column keeps its own calendar, a benchmark listed later than the window start is not cut back
+    returns = prices.pct_change(fill_method=None)
+    _registry.update(prices=prices, returns=returns.iloc[1:])
+
+
+def _has(frame, ticker):
+    return frame is not None and ticker in frame.columns and not frame[ticker].isna().all()
+
+
+def _current(ticker):
+    """
+    Registry frames, refreshed after each session close or when `ticker` has no data. A failed or incomplete
+    download keeps the last good frames and is retried after RETRY_SECONDS, a download with the requested ticker
+    or without any new bar moves the refresh to the next bar.
+    """
+    with _registry_lock:
+        now = datetime.now()
+        stale = now >= _registry['fresh_until'] or not _has(_registry['prices'], ticker)
+        if stale and now >= _registry['retry_at']:
+            try:
+                _refresh(ticker)
+                _registry['fresh_until'] = datetime.now() + timedelta(seconds=seconds_until_next_bar())
+            except Exception as e:
+                logger.error(f"Error refreshing benchmarks: {e}") # keeps serving the last good series
+                _registry['retry_at'] = datetime.now() + timedelta(seconds=RETRY_SECONDS)
+        return _registry['prices'], _registry['returns']
+
+
+def _series(frame, ticker):
+    if not _has(frame, ticker):
+        raise LookupError(f"No data available for benchmark {ticker}, try again shortly")
+    return frame[ticker].dropna()
+
+
+def get_benchmark_returns(ticker=DEFAULT_BENCHMARK):
+    """Daily returns of a registered benchmark (NaN-free Series), None if unknown. Raises LookupError without data"""
+    ticker = ticker.upper()
+    if ticker not in BENCHMARK_TICKERS:
+        return None
+    _, returns = _current(ticker)
+    return _series(returns, ticker)
+
+
+def get_benchmark_prices(ticker=DEFAULT_BENCHMARK):
+    """Daily closes of a registered benchmark, None if unknown. Raises LookupError without data"""
+    ticker = ticker.upper()
+    if ticker not in BENCHMARK_TICKERS:
+        return None
+    prices, _ = _current(ticker)
+    return _series(prices, ticker)
+
+
+def list_benchmarks():
+    return [{'ticker': t, 'name': BENCHMARK_NAMES.get(t, t)} for t in BENCHMARK_TICKERS]
@@ -0,0 +1,120 @@
+"""
+------------------Prologue--------------------
+File Name: cache.py
+Path: Backend/kobrastocks/cache.py
+
+Description:
+Small in-process cache shared by the services that re-download or recompute the same data on every request.
+`TTLCache` keeps up to `maxsize` entries, evicts the least recently used one when full and drops entries once
+they are older than their time to live. `get_or_set` computes a missing value once even when several request
+threads ask for the same key at the same time. `seconds_until_next_bar` gives the time to live of data that only
+changes when a new daily bar closes, and `completed_sessions_end` the download end that leaves out a session still
+trading.
+
+Input:
+Hashable keys and the values (or functions producing them) to cache.
+
+Output:
+Cached values, or None / the freshly computed value on a miss.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from time import monotonic
+
+import pytz
+
+MARKET_TIMEZONE = pytz.timezone('America/New_York')
+MARKET_CLOSE_HOUR = 16
+BAR_SETTLE_MINUTES = 20  # upstream daily bars usually land within this long after the close
+
+
+def seconds_until_next_bar(now=None):
+    """
+    Seconds until the next daily bar should be available: the next weekday market close plus a settle margin.
+    Holidays are not modelled, they only cost one extra refresh.
+    """
+    now = now or datetime.now(MARKET_TIMEZONE)
+    ready = now.replace(hour=MARKET_CLOSE_HOUR, minute=BAR_SETTLE_MINUTES, second=0, microsecond=0)
+    while ready <= now or ready.weekday() >= 5:
+        ready += timedelta(days=1)
+    return max(60, int((ready - now).total_seconds()))
+
+
+def completed_sessions_end(now=None):
+    """
+    Exclusive `end` date ('YYYY-MM-DD') for daily downloads that should only contain settled bars: the day after the
+    last weekday whose close plus the settle margin has passed. Today's live bar is never included.
+    """
+    now = now or datetime.now(MARKET_TIMEZONE)
+    session = now.date()
+    if now < now.replace(hour=MARKET_CLOSE_HOUR, minute=BAR_SETTLE_MINUTES, second=0, microsecond=0):
+        session -= timedelta(days=1)
+    while session.weekday() >= 5:
+        session -= timedelta(days=1)
+    return (session + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after they were stored"""
+
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Stores a value, `ttl` overrides the cache default for this entry"""
+        with self._lock:
+            self._entries[key] = (monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key, compute, ttl=None):
+        """
+        Returns the cached value, else stores and returns compute(). Values of None are returned but not
+        cached, so failed lookups are retried on the next call.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key)  # another thread may have filled it while we waited
+            if value is None:
+                value = compute()
+                if value is not None:
+                    self.set(key, value, ttl)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,187 @@
+"""
+------------------Prologue--------------------
+File Name: chat_client.py
+Path: Backend/kobrastocks/chat_client.py
+
+Description:
+Shared OpenAI access for the stock and portfolio commentary. One client is created per process and reused, so its
+HTTP connection pool (keep-alive, TLS sessions) is shared by every request instead of being rebuilt per call, and
+the prompts of one analysis run concurrently on a bounded thread pool with a timeout per completion. Latency of an
+analysis is then about the slowest completion rather than the sum of all of them. Replies are cached (TTL + LRU)
+under a fingerprint of the normalized prompt inputs, with prices and metrics bucketed, so repeat views of the same
+stock or portfolio come back without an API call. Key functions include:
+- `bucket` / `fingerprint`: Rounding of numeric inputs and the hash of the normalized inputs.
+- `get_openai_client`: Lazily created shared client.
+- `chat_completion`: One completion with the repo's model settings.
+- `iter_chat_completions`: Yields (index, reply) for several prompts in the order they finish.
+- `chat_completions`: Replies for several prompts in prompt order.
+- `stream_chat_completion`: Text chunks of one reply as the model produces them.
+
+Input:
+Prompts and a system message.
+
+Output:
+Reply strings, with a fixed error message for prompts that failed or timed out (those are not cached).
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import hashlib
+import logging
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import orjson
+from openai import OpenAI
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+CHAT_MODEL = os.environ.get('OPENAI_CHAT_MODEL', 'gpt-3.5-turbo')
+CHAT_TIMEOUT = float(os.environ.get('OPENAI_TIMEOUT', 30))  # seconds per completion
+CHAT_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', 1))
+CHAT_WORKERS = int(os.environ.get('OPENAI_WORKERS', 8))  # completions in flight across all requests
+MAX_PROMPT_CHARS = 2048
+ERROR_REPLY = "Could not generate response due to an error."
+
+PORTFOLIO_SYSTEM_MESSAGE = "You are a financial advisor providing insights on a stock portfolio."
+STOCK_SYSTEM_MESSAGE = "You are a financial analyst providing insights on stocks."
+
+LLM_CACHE_SIZE = int(os.environ.get('LLM_CACHE_SIZE', 2048))  # cached replies, least recently used evicted first
+LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', 3600))  # seconds a reply is reused
+
+_replies = TTLCache(maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL)
+_client = None
+_client_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=CHAT_WORKERS, thread_name_prefix='openai')
+
+
+def get_openai_client():
+    """Process-wide client, its connection pool is reused by every completion"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key = os.getenv('OPENAI_API_KEY')
+                if not api_key:
+                    raise ValueError("OpenAI API key not found in environment variables.")
+                _client = OpenAI(api_key=api_key, timeout=CHAT_TIMEOUT, max_retries=CHAT_MAX_RETRIES)
+    return _client
+
+
+def bucket(value, significant=3):
+    """Rounds to `significant` significant digits, so nearby prices and metrics share a cache key"""
+    if value is None or not math.isfinite(value) or value == 0:
+        return value
+    return round(float(value), significant - 1 - int(math.floor(math.log10(abs(value)))))
+
+
+def fingerprint(kind, inputs):
+    """Stable hash of already normalized prompt inputs, the model settings included"""
+    payload = orjson.dumps(
+        {'kind': kind, 'model': CHAT_MODEL, 'inputs': inputs},
+        option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+
+def chat_messages(prompt, system_message):
+    # Check if prompt length exceeds model's context window
+    if len(prompt) > MAX_PROMPT_CHARS:
+        logger.warning("Prompt is too long. Truncating the prompt.")
+        prompt = prompt[:MAX_PROMPT_CHARS]
+    return [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def chat_completion(prompt, system_message, timeout=CHAT_TIMEOUT):
+    """Reply to one prompt, raises on API errors and timeouts"""
+    response = get_openai_client().chat.completions.create(
+        model=CHAT_MODEL,
+        messages=chat_messages(prompt, system_message),
+        max_tokens=500,
+        n=1,
+        temperature=0.5,
+        timeout=timeout,
+    )
+    return response.choices[0].message.content.strip()
+
+
+def stream_chat_completion(prompt, system_message, timeout=CHAT_TIMEOUT, cache_key=None):
+    """
+    Yields the reply to one prompt chunk by chunk as the tokens arrive. A reply cached under `cache_key` (shared
+    with `chat_completions` on a single prompt) is yielded whole, and a finished stream is stored there. Raises on
+    API errors and timeouts.
+    """
+    cached = _replies.get((cache_key, 0)) if cache_key else None
+    if cached is not None:
+        yield cached
+        return
+
+    stream = get_openai_client().chat.completions.create(
+        model=CHAT_MODEL,
+        messages=chat_messages(prompt, system_message),
+        max_tokens=500,
+        n=1,
+        temperature=0.5,
+        timeout=timeout,
+        stream=True,
+    )
+    parts = []
+    try:
+        for chunk in stream:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                parts.append(text)
+                yield text
+    finally:
+        stream.close()  # also runs when the client disconnects and the generator is closed early
+    reply = ''.join(parts).strip()
+    if cache_key and reply:
+        _replies.set((cache_key, 0), reply)
+
+
+def iter_chat_completions(prompts, system_message, timeout=CHAT_TIMEOUT, cache_key=None):
+    """
+    Runs every prompt concurrently and yields (index, reply) as each completion finishes. A failed or timed out
+    prompt yields ERROR_REPLY instead of failing the others. With a `cache_key` (see `fingerprint`), cached
+    replies are yielded first without an API call and new successful replies are stored under (key, index).
+    """
+    pending = {}
+    for i, prompt in enumerate(prompts):
+        cached = _replies.get((cache_key, i)) if cache_key else None
+        if cached is not None:
+            yield i, cached
+        else:
+            pending[i] = prompt
+    if not pending:
+        return
+
+    get_openai_client()  # a missing key fails here, before any work is queued
+    futures = {
+        _executor.submit(chat_completion, prompt, system_message, timeout): i for i, prompt in pending.items()
+    }
+    for future in as_completed(futures):
+        i = futures[future]
+        try:
+            reply = future.result()
+        except Exception as e:
+            logger.error(f"OpenAI API error on prompt {i+1}: {e}")
+            yield i, ERROR_REPLY
+            continue
+        if cache_key:
+            _replies.set((cache_key, i), reply)
+        yield i, reply
+
+
+def chat_completions(prompts, system_message, timeout=CHAT_TIMEOUT, cache_key=None):
+    """Replies in prompt order, fetched concurrently"""
+    responses = [None] * len(prompts)
+    for i, reply in iter_chat_completions(prompts, system_message, timeout, cache_key):
+        responses[i] = reply
+    return responses
@@ -0,0 +1,88 @@
+"""
+------------------Prologue--------------------
+File Name: commands.py
+Path: Backend/kobrastocks/commands.py
+
+Description:
+Flask CLI commands for offline jobs that are too slow to run inside a request:
+- `flask train-global-model`: Trains and persists the pooled cross-ticker models used by `/api/predictions?model=global`.
+- `flask tune-models`: Searches per-ticker or per-sector model hyperparameters and stores the best configs.
+
+Input:
+Command-line options (ticker universe, indicator selection).
+
+Output:
+Model files and configs written to the model store and progress logged to the console.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import click
+import yfinance as yf
+
+from .services import INDICATOR_FUNCTIONS, TRAINING_TIERS
+
+
+def parse_tickers(tickers, tickers_file):
+    """Combines a comma separated ticker list and a file with one ticker per line"""
+    parsed = [t.strip().upper() for t in (tickers or '').split(',') if t.strip()]
+    if tickers_file:
+        with open(tickers_file) as f:
+            parsed += [line.strip().upper() for line in f if line.strip()]
+    return parsed
+
+
+def parse_indicators(indicators):
+    """Turns 'MACD,RSI' into the indicator flag dict `add_indicators` takes"""
+    names = [name.strip() for name in (indicators or '').split(',') if name.strip()]
+    unknown = [name for name in names if name not in INDICATOR_FUNCTIONS]
+    if unknown:
+        raise click.BadParameter(f"Unknown indicators {unknown}. Use any of {list(INDICATOR_FUNCTIONS)}")
+    return {name: True for name in names}
+
+
+@click.command('train-global-model')
+@click.option('--tickers', help='Comma separated ticker universe (defaults to a built-in large cap list).')
+@click.option('--tickers-file', type=click.Path(exists=True), help='File with one ticker per line.')
+@click.option('--indicators', default='', help='Comma separated indicators to include, e.g. MACD,RSI,SMA.')
+def train_global_model_command(tickers, tickers_file, indicators):
+    """Train the pooled cross-ticker models and persist them to the model store."""
+    from .global_model import train_global_models, GLOBAL_MODEL_PATH
+
+    universe = parse_tickers(tickers, tickers_file) or None
+    bundle = train_global_models(universe, parse_indicators(indicators))
+    for dwm, model in bundle['models'].items():
+        click.echo(f"horizon {dwm}: accuracy={model['accuracy']:.3f} r2={model['r2']:.4f}")
+    click.echo(f"Saved global model trained on {len(bundle['tickers'])} tickers to {GLOBAL_MODEL_PATH}")
+
+
+@click.command('tune-models')
+@click.option('--tickers', help='Comma separated tickers to tune.')
+@click.option('--tickers-file', type=click.Path(exists=True), help='File with one ticker per line.')
+@click.option('--sector', help='Store one shared config under this sector name for all given tickers.')
+@click.option('--group-by-sector', is_flag=True, help='Look up each ticker\'s sector and tune one config per sector.')
+@click.option('--indicators', default='', help='Comma separated indicators to include, e.g. MACD,RSI,SMA.')
+@click.option('--tier', default='fast', type=click.Choice(list(TRAINING_TIERS)), help='Training budget per LSTM fit.')
+def tune_models_command(tickers, tickers_file, sector, group_by_sector, indicators, tier):
+    """Search model and window hyperparameters with time series CV and persist the best configs."""
+    from .model_configs import MODEL_CONFIGS_PATH
+    from .tuning import tune
+
+    universe = parse_tickers(tickers, tickers_file)
+    if not universe:
+        raise click.UsageError('Give --tickers or --tickers-file.')
+    flags = parse_indicators(indicators)
+
+    if group_by_sector:
+        sectors = {}
+        for ticker in universe:
+            sectors.setdefault(yf.Ticker(ticker).info.get('sector') or 'Unknown', []).append(ticker)
+        groups = list(sectors.items())
+    else:
+        groups = [(sector, universe)]
+
+    for group_sector, members in groups:
+        for key, config in tune(members, flags, sector=group_sector, tier=tier).items():
+            regression = ', '.join(f"{dwm}: {c['sequence_len']}x{c['units']}" for dwm, c in config['regression'].items())
+            click.echo(f"{key}: {config['classifier']['name']} {config['classifier']['params']} | LSTM {regression}")
+    click.echo(f"Saved configs to {MODEL_CONFIGS_PATH}")
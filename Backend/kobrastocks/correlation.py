@@ -0,0 +1,190 @@
+"""
+------------------Prologue--------------------
+File Name: correlation.py
+Path: Backend/kobrastocks/correlation.py
+
+Description:
+Correlation structure of large ticker universes (up to several thousand symbols), served by `/api/correlation`.
+Daily returns are kept per ticker in memory until the next bar and only missing tickers are downloaded, in
+multi-ticker chunks. The aligned returns are standardized once into a float32 matrix, and the correlation matrix is
+computed one block of rows at a time as float32 matrix products (pairwise over the days both tickers traded when
+coverage is partial), so a block is all that is held besides the returns and rows are streamed out as they are
+produced. Optional hierarchical clustering (average linkage on the correlation distance) orders the tickers so
+related names sit next to each other. Key functions include:
+- `get_returns_matrix`: Standardized, aligned float32 returns for the tickers with enough history.
+- `correlation_blocks`: Yields the correlation matrix a block of rows at a time.
+- `cluster_tickers`: Leaf order and flat clusters from the blockwise correlation distances.
+- `iter_correlation`: Header, clusters and matrix rows as a stream of JSON-ready dicts.
+
+Input:
+Ticker symbols, lookback in trading days and clustering options.
+
+Output:
+Dicts with the ticker order, clusters and correlation row blocks.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from scipy.cluster.hierarchy import linkage, leaves_list, fcluster
+
+from .cache import TTLCache, seconds_until_next_bar
+
+logger = logging.getLogger(__name__)
+
+MAX_CORRELATION_TICKERS = 5000
+MAX_CLUSTER_TICKERS = 3000  # the condensed distance matrix for linkage is float64, ~36 MB at this size
+DEFAULT_CORRELATION_DAYS = 252
+MAX_CORRELATION_DAYS = 1260
+DEFAULT_CLUSTERS = 10
+MIN_COVERAGE = 0.8  # share of the window a ticker must have traded to be included
+BLOCK_ROWS = 256  # correlation rows computed and streamed together
+DOWNLOAD_CHUNK = 200  # tickers per yf.download call
+
+_returns = TTLCache(maxsize=MAX_CORRELATION_TICKERS * 2)
+
+
+def _download_returns(tickers, days):
+    """Daily float32 returns per ticker covering `days` trading days, downloaded DOWNLOAD_CHUNK tickers at a time"""
+    start = (datetime.now() - timedelta(days=int(days * 7 / 5) + 10)).strftime('%Y-%m-%d')
+    result = {}
+    for i in range(0, len(tickers), DOWNLOAD_CHUNK):
+        chunk = tickers[i:i + DOWNLOAD_CHUNK]
+        try:
+            data = yf.download(
+                chunk, start=start, interval='1d',
+                auto_adjust=True, group_by='column', threads=True, progress=False
+            )
+        except Exception as e:
+            logger.error(f"Error downloading returns for {len(chunk)} tickers: {e}")
+            continue
+        if data.empty:
+            continue
+        closes = data['Close']
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(chunk[0])
+        if closes.index.tz is not None:
+            closes.index = closes.index.tz_localize(None)
+        for ticker in chunk:
+            if ticker in closes.columns:
+                returns = closes[ticker].dropna().pct_change().iloc[1:].iloc[-days:]
+                if len(returns):
+                    result[ticker] = returns.astype(np.float32)
+    return result
+
+
+def get_returns(tickers, days=DEFAULT_CORRELATION_DAYS):
+    """{ticker: returns Series}, cached tickers reused until the next daily bar"""
+    result = {}
+    missing = []
+    for ticker in tickers:
+        cached = _returns.get((ticker, days))
+        if cached is not None:
+            result[ticker] = cached
+        else:
+            missing.append(ticker)
+    if missing:
+        ttl = seconds_until_next_bar()
+        for ticker, returns in _download_returns(missing, days).items():
+            _returns.set((ticker, days), returns, ttl=ttl)
+            result[ticker] = returns
+    return result
+
+
+def get_returns_matrix(tickers, days=DEFAULT_CORRELATION_DAYS, min_coverage=MIN_COVERAGE):
+    """
+    (kept tickers, dropped tickers, z, mask) where z is the dates x tickers float32 matrix of returns standardized
+    per column, with days a ticker did not trade set to 0, and mask the float32 matrix of traded days (1) or None
+    when every kept ticker traded on every day. Without a mask z.T @ z / (rows - 1) is the correlation.
+    """
+    returns = get_returns(tickers, days)
+    if not returns:
+        return [], list(tickers), np.empty((0, 0), dtype=np.float32), None
+    frame = pd.DataFrame(returns).sort_index().iloc[-days:]
+    coverage = frame.notna().mean()
+    std = frame.std()
+    kept = [t for t in tickers if t in frame.columns and coverage[t] >= min_coverage and std[t] > 0]
+    dropped = [t for t in tickers if t not in kept]
+    values = frame[kept].values.astype(np.float32)
+    observed = ~np.isnan(values)
+    z = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0, ddof=1)
+    mask = None if observed.all() else observed.astype(np.float32)
+    return kept, dropped, np.nan_to_num(z, copy=False), mask
+
+
+def correlation_blocks(z, mask=None, block_rows=BLOCK_ROWS):
+    """
+    Yields (first row, block) with block = rows [first, first + block_rows) of the correlation matrix, float32.
+    With a mask each pair is the Pearson correlation over the days both tickers traded (as DataFrame.corr does),
+    from the pairwise counts, sums and sums of squares, each one a block matrix product. Pairs with fewer than two
+    common days or no variance on them are 0.
+    """
+    if mask is None:
+        scale = np.float32(1.0 / max(len(z) - 1, 1))
+        for start in range(0, z.shape[1], block_rows):
+            block = (z[:, start:start + block_rows].T @ z) * scale
+            yield start, np.clip(block, -1, 1, out=block)
+        return
+
+    squares = z * z
+    for start in range(0, z.shape[1], block_rows):
+        z_block, mask_block = z[:, start:start + block_rows], mask[:, start:start + block_rows]
+        count = mask_block.T @ mask  # days both traded
+        sum_x, sum_y = z_block.T @ mask, mask_block.T @ z  # row ticker's and column ticker's sums on those days
+        safe_count = np.maximum(count, 1)
+        covariance = z_block.T @ z - sum_x * sum_y / safe_count
+        variance_x = (z_block * z_block).T @ mask - sum_x * sum_x / safe_count
+        variance_y = mask_block.T @ squares - sum_y * sum_y / safe_count
+        variance = variance_x * variance_y
+        defined = (count >= 2) & (variance > 0)
+        block = np.divide(covariance, np.sqrt(np.maximum(variance, 0)), out=np.zeros_like(covariance), where=defined)
+        yield start, np.clip(block, -1, 1, out=block)
+
+
+def cluster_tickers(z, mask=None, n_clusters=DEFAULT_CLUSTERS, block_rows=BLOCK_ROWS):
+    """
+    Average linkage on the distance sqrt((1 - rho) / 2). The condensed distance vector is filled block by block,
+    so the full square matrix never exists. Returns (leaf order, cluster label per column).
+    """
+    n = z.shape[1]
+    if n < 2:
+        return np.arange(n), np.ones(n, dtype=int)
+    condensed = np.empty(n * (n - 1) // 2)
+    for start, block in correlation_blocks(z, mask, block_rows):
+        for offset, row in enumerate(block):
+            r = start + offset
+            first = r * n - r * (r + 1) // 2  # condensed index of the pair (r, r + 1)
+            condensed[first:first + n - r - 1] = np.sqrt(np.maximum((1 - row[r + 1:]) / 2, 0))
+    tree = linkage(condensed, method='average')
+    return leaves_list(tree), fcluster(tree, t=min(n_clusters, n), criterion='maxclust')
+
+
+def iter_correlation(tickers, days=DEFAULT_CORRELATION_DAYS, cluster=False, n_clusters=DEFAULT_CLUSTERS,
+                     include_matrix=True, block_rows=BLOCK_ROWS):
+    """
+    Yields a header dict (ticker order, dropped tickers, observations, clusters when requested), then one dict per
+    block of correlation rows in the header's ticker order, values rounded to 4 decimals.
+    """
+    kept, dropped, z, mask = get_returns_matrix(tickers, days)
+    header = {'tickers': kept, 'dropped': dropped, 'observations': len(z)}
+    if cluster and len(kept) > 1:
+        order, labels = cluster_tickers(z, mask, n_clusters, block_rows)
+        z = z[:, order]  # rows and columns follow the dendrogram
+        mask = mask[:, order] if mask is not None else None
+        kept = [kept[i] for i in order]
+        labels = labels[order]
+        clusters = {}
+        for ticker, label in zip(kept, labels):
+            clusters.setdefault(int(label), []).append(ticker)
+        header['tickers'] = kept
+        header['clusters'] = [{'id': i, 'tickers': members} for i, members in enumerate(clusters.values())]
+    yield header
+
+    if include_matrix:
+        for start, block in correlation_blocks(z, mask, block_rows):
+            yield {'start': start, 'rows': np.round(block, 4)}
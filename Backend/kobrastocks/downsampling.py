@@ -0,0 +1,86 @@
+"""
+------------------Prologue--------------------
+File Name: downsampling.py
+Path: Backend/kobrastocks/downsampling.py
+
+Description:
+Reduces chart series to a target number of points before they are sent to the client, so a zoomed out view of many
+years of bars costs the same payload as a few months. Key functions include:
+- `bucket_bounds`: Splits a series into consecutive, nearly equal buckets.
+- `ohlc_buckets`: Aggregates candles per bucket (first open, highest high, lowest low, last close, summed volume).
+- `lttb_indices`: Largest-Triangle-Three-Buckets selection of the points that keep the visual shape of a line.
+
+Input:
+Chart frames from `fetch_chart_data` and numeric line series.
+
+Output:
+Downsampled frames or the indices of the points to keep.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import numpy as np
+import pandas as pd
+
+
+def bucket_bounds(length, points):
+    """Start offsets of `points` consecutive buckets covering `length` rows, sizes differ by at most one"""
+    return np.linspace(0, length, points + 1).astype(np.int64)[:-1]
+
+
+def ohlc_buckets(chartData, points):
+    """
+    Aggregates bars into at most `points` candles. Each candle keeps the date of its first bar, so the dates stay
+    in the same format as the full series. Any other column (e.g. indicator overlays) keeps the value at the
+    candle's close. Frames that already fit are returned unchanged.
+    """
+    length = len(chartData)
+    if points is None or points <= 0 or length <= points:
+        return chartData
+    starts = bucket_bounds(length, points)
+    ends = np.append(starts[1:], length) - 1
+    buckets = pd.DataFrame({
+        'Date': chartData['Date'].values[starts],
+        'Open': chartData['Open'].values[starts],
+        'High': np.maximum.reduceat(chartData['High'].values, starts),
+        'Low': np.minimum.reduceat(chartData['Low'].values, starts),
+        'Close': chartData['Close'].values[ends],
+        'Volume': np.add.reduceat(chartData['Volume'].values, starts),
+    })
+    for col in chartData.columns:
+        if col not in buckets.columns:
+            buckets[col] = chartData[col].values[ends]
+    return buckets
+
+
+def lttb_indices(y, points, x=None):
+    """
+    Indices of the `points` samples Largest-Triangle-Three-Buckets keeps for the line (x, y). The first and last
+    samples are always kept; every bucket in between contributes the point forming the largest triangle with the
+    previously kept point and the mean of the next bucket. NaNs are treated as gaps and never selected.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    length = len(y)
+    if points is None or points >= length or points < 3:
+        return np.arange(length)
+    x = np.arange(length, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    # Inner buckets over the samples between the fixed first and last point
+    edges = 1 + np.linspace(0, length - 2, points - 1).astype(np.int64)
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, (edges[bucket + 2] if bucket + 2 < len(edges) else length)
+        mean_x = x[next_start:next_end].mean()
+        mean_y = np.nanmean(y[next_start:next_end]) if np.any(~np.isnan(y[next_start:next_end])) else y[previous]
+        # Twice the triangle area for every candidate in the bucket at once
+        areas = np.abs(
+            (x[previous] - mean_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (mean_y - y[previous])
+        )
+        areas = np.where(np.isnan(areas), -1, areas)
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
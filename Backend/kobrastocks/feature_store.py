@@ -0,0 +1,140 @@
+"""
+------------------Prologue--------------------
+File Name: feature_store.py
+Path: Backend/kobrastocks/feature_store.py
+
+Description:
+On-disk store for the scaled training matrices of the LSTM regressors. Arrays are written once per
+(ticker, indicator set, last bar date, frame signature) as `.npy` files and opened with `np.load(mmap_mode='r')`, so repeated training
+runs, the horizon workers of one request and the tuning jobs share the same pages instead of rebuilding and copying
+the matrices. Key functions include:
+- `build_training_arrays`: Scales the feature matrix and the regression targets of a prepared frame.
+- `get_training_arrays`: Returns the memory-mapped arrays for a frame, writing them on first use.
+
+Input:
+Ticker, indicator flags and the frame from `retrieve_data` + `add_indicators`.
+
+Output:
+Dict with the scaled feature matrix, scaled targets per regression column and the bounds to unscale them.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from .model_configs import MODEL_DIR, indicator_key
+
+logger = logging.getLogger(__name__)
+
+FEATURE_STORE_DIR = os.environ.get('FEATURE_STORE_DIR', os.path.join(MODEL_DIR, 'features'))
+
+REGRESSION_TARGETS = ['Close_Tomorrow', 'Close_NextWeek', 'Close_NextMonth']
+TARGET_VARS = REGRESSION_TARGETS + ['Tomorrow', 'Month', 'Week']
+
+
+def build_training_arrays(dataframe):
+    """
+    Scales the features and every regression target of a frame to [0, 1] (as MinMaxScaler does) in float32.
+    Features cover every row, targets only rows where the target is known, matching `train_regression_models`.
+    """
+    dataframe = dataframe.sort_index()
+    feature_columns = [col for col in dataframe.columns if col not in TARGET_VARS]
+    features = MinMaxScaler(feature_range=(0, 1)).fit_transform(dataframe[feature_columns].values)
+    targets, target_bounds = {}, {}
+    for col in REGRESSION_TARGETS:
+        values = dataframe[col].dropna().values.reshape(-1, 1)
+        low, high = float(values.min()), float(values.max())
+        targets[col] = ((values - low) / ((high - low) or 1.0)).astype(np.float32)
+        target_bounds[col] = (low, high)
+    return {
+        'features': features.astype(np.float32),
+        'targets': targets,
+        'target_bounds': target_bounds,
+        'feature_columns': feature_columns,
+    }
+
+
+def unscale_target(values, bounds):
+    """Inverse of the target scaling, the equivalent of MinMaxScaler.inverse_transform"""
+    low, high = bounds
+    return np.asarray(values, dtype=np.float64) * ((high - low) or 1.0) + low
+
+
+def frame_signature(dataframe):
+    """
+    Entry name of a prepared frame: its last bar date plus a hash of the index range, row count and columns. Frames
+    of the same day from different pipelines (the panel download or `retrieve_data`) differ in rows and NaN handling,
+    so they get separate entries instead of whichever was stored first.
+    """
+    index = dataframe.index
+    described = json.dumps([str(index.min()), str(index.max()), len(dataframe), list(map(str, dataframe.columns))])
+    return f"{index.max().strftime('%Y-%m-%d')}-{hashlib.sha1(described.encode()).hexdigest()[:12]}"
+
+
+def _entry_dir(ticker, indicators, entry):
+    return os.path.join(FEATURE_STORE_DIR, ticker.upper(), indicator_key(indicators), entry)
+
+
+def load_training_arrays(ticker, indicators, entry):
+    """Opens a stored entry memory-mapped read only, None if it does not exist"""
+    path = _entry_dir(ticker, indicators, entry)
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return {
+        'features': np.load(os.path.join(path, 'features.npy'), mmap_mode='r'),
+        'targets': {col: np.load(os.path.join(path, f'{col}.npy'), mmap_mode='r') for col in REGRESSION_TARGETS},
+        'target_bounds': {col: tuple(bounds) for col, bounds in meta['target_bounds'].items()},
+        'feature_columns': meta['feature_columns'],
+    }
+
+
+def write_training_arrays(ticker, indicators, entry, arrays):
+    """Writes an entry to a temporary directory and renames it into place, then drops older dates of the key"""
+    final_path = _entry_dir(ticker, indicators, entry)
+    key_dir = os.path.dirname(final_path)
+    os.makedirs(key_dir, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=key_dir, prefix='.tmp-')
+    try:
+        np.save(os.path.join(tmp_path, 'features.npy'), arrays['features'])
+        for col in REGRESSION_TARGETS:
+            np.save(os.path.join(tmp_path, f'{col}.npy'), arrays['targets'][col])
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({'target_bounds': arrays['target_bounds'], 'feature_columns': arrays['feature_columns']}, f)
+        os.rename(tmp_path, final_path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)  # another worker stored the same entry first
+        if not os.path.isdir(final_path):
+            raise
+    date = entry[:10]
+    for name in os.listdir(key_dir):
+        if not name.startswith(date) and not name.startswith('.tmp-'):
+            shutil.rmtree(os.path.join(key_dir, name), ignore_errors=True)
+
+
+def get_training_arrays(ticker, indicators, dataframe):
+    """
+    Memory-mapped training arrays for a prepared frame, keyed by its `frame_signature`. Built and stored on the
+    first call of the day; if the store is not writable the in-memory arrays are returned instead.
+    """
+    entry = frame_signature(dataframe)
+    arrays = load_training_arrays(ticker, indicators, entry)
+    if arrays is not None:
+        return arrays
+    arrays = build_training_arrays(dataframe)
+    try:
+        write_training_arrays(ticker, indicators, entry, arrays)
+    except OSError as e:
+        logger.error(f"Could not write feature store entry for {ticker}: {e}")
+        return arrays
+    return load_training_arrays(ticker, indicators, entry) or arrays
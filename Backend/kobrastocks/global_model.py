@@ -0,0 +1,228 @@
+"""
+------------------Prologue--------------------
+File Name: global_model.py
+Path: Backend/kobrastocks/global_model.py
+
+Description:
+Pooled cross-ticker models. Instead of training a fresh model per ticker on every request, one classifier and one
+regressor per horizon are trained offline on scale-free features pooled across a universe of tickers and persisted
+to disk. Key functions include:
+- `normalize_features`: Turns the `retrieve_data` + `add_indicators` frame into price-independent features.
+- `train_global_models`: Builds the pooled dataset, trains the models and saves them (run via `flask train-global-model`).
+- `predict_global`: Answers for any ticker, including ones never seen in training, with a single inference call.
+
+Input:
+Ticker universe and indicator selection for training, a single ticker for inference.
+
+Output:
+Persisted model bundle and predictions in the same shape as `get_predictions`.
+
+Collaborators: Spencer Sliffe, Saje Cowell, Charlie Gillund
+---------------------------------------------
+"""
+import logging
+import os
+import threading
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+from sklearn.linear_model import Ridge
+from sklearn.metrics import accuracy_score, classification_report, mean_squared_error, mean_absolute_error, r2_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from .model_configs import MODEL_DIR
+from .services import (
+    retrieve_data,
+    retrieve_panel,
+    add_indicators,
+    add_indicators_panel,
+    split_panel,
+    HORIZONS,
+)
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_MODEL_PATH = os.path.join(MODEL_DIR, 'global_model.joblib')
+
+# Liquid large caps used when the training command is not given a universe
+DEFAULT_UNIVERSE = [
+    'AAPL', 'MSFT', 'AMZN', 'GOOGL', 'META', 'NVDA', 'TSLA', 'JPM', 'V', 'MA',
+    'UNH', 'JNJ', 'PG', 'HD', 'KO', 'PEP', 'XOM', 'CVX', 'WMT', 'DIS',
+    'BAC', 'CSCO', 'INTC', 'ORCL', 'PFE', 'MRK', 'ABT', 'NKE', 'MCD', 'CAT',
+]
+
+# Targets per horizon: classification column and the future close the regression return is taken from
+TARGET_COLUMNS = {
+    1: ('Tomorrow', 'Close_Tomorrow'),
+    2: ('Week', 'Close_NextWeek'),
+    3: ('Month', 'Close_NextMonth'),
+}
+TARGET_VARS = ['Tomorrow', 'Week', 'Month', 'Close_Tomorrow', 'Close_NextWeek', 'Close_NextMonth', 'Date']
+
+# Columns quoted in price units, divided by the close so every ticker shares one scale
+PRICE_PREFIXES = ('Open', 'High', 'Low', 'SMA_', 'EMA_', 'BB_', 'VWAP', 'MACD_', 'ATR_')
+
+DOWNLOAD_CHUNK = 100  # tickers per yf.download call when building the pooled dataset
+
+_cache = {'mtime': None, 'bundle': None}
+_cache_lock = threading.Lock()
+
+
+def normalize_features(dataframe):
+    """
+    Converts a frame from `retrieve_data` + `add_indicators` into features that do not depend on the price level
+    or share count of the ticker, so rows from different tickers can be pooled into one training set.
+    """
+    close = dataframe['Close']
+    features = pd.DataFrame(index=dataframe.index)
+    features['Return_1'] = close.pct_change()
+    features['Return_5'] = close.pct_change(5)
+    features['Return_21'] = close.pct_change(21)
+    features['Volume_Ratio'] = np.log1p(dataframe['Volume']) - np.log1p(dataframe['Volume'].rolling(20).mean())
+    for col in dataframe.columns:
+        if col in TARGET_VARS or col in ('Close', 'Volume'):
+            continue
+        if col.startswith(PRICE_PREFIXES):
+            features[col] = dataframe[col] / close - (0 if col.startswith(('MACD_', 'ATR_')) else 1)
+        elif col.startswith('RSI_'):
+            features[col] = dataframe[col] / 100
+    return features.replace([np.inf, -np.inf], np.nan)
+
+
+def _training_rows(dataframe):
+    """Normalized features plus the pooled targets (direction and forward return) for one ticker"""
+    rows = normalize_features(dataframe)
+    for dwm, (class_col, close_col) in TARGET_COLUMNS.items():
+        rows[f'class_{dwm}'] = dataframe[class_col]
+        rows[f'return_{dwm}'] = dataframe[close_col] / dataframe['Close'] - 1
+    return rows
+
+
+def build_global_dataset(tickers, indicators={}):
+    """Builds the pooled training set, downloading the universe in chunks through the batch panel helpers"""
+    pooled = []
+    for start in range(0, len(tickers), DOWNLOAD_CHUNK):
+        chunk = tickers[start:start + DOWNLOAD_CHUNK]
+        panel = retrieve_panel(chunk)
+        if panel is None:
+            continue
+        for ticker, dataframe in split_panel(add_indicators_panel(panel, **indicators)).items():
+            rows = _training_rows(dataframe)
+            rows['Ticker'] = ticker
+            pooled.append(rows)
+        logger.info(f"Global dataset: processed {min(start + DOWNLOAD_CHUNK, len(tickers))} of {len(tickers)} tickers")
+    if not pooled:
+        raise ValueError("No data found for any ticker in the training universe.")
+    return pd.concat(pooled).sort_index()
+
+
+def train_global_models(tickers=None, indicators={}, path=GLOBAL_MODEL_PATH):
+    """
+    Trains one classifier and one regressor per horizon on the pooled dataset and persists them with the
+    metadata needed to rebuild the features at inference time. Returns the saved bundle.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in (tickers or DEFAULT_UNIVERSE)))
+    dataset = build_global_dataset(tickers, indicators)
+    feature_columns = [col for col in dataset.columns if not col.startswith(('class_', 'return_')) and col != 'Ticker']
+
+    # Split on dates rather than rows so no test day leaks into training through another ticker
+    dates = np.sort(dataset.index.unique())
+    split_date = dates[int(len(dates) * 0.8)]
+
+    models = {}
+    for dwm in HORIZONS:
+        data = dataset.dropna(subset=feature_columns + [f'return_{dwm}'])
+        train, test = data[data.index < split_date], data[data.index >= split_date]
+        if train.empty or test.empty:
+            raise ValueError("Not enough data to split the pooled dataset into training and testing sets.")
+
+        classifier = make_pipeline(StandardScaler(), LinearDiscriminantAnalysis())
+        classifier.fit(train[feature_columns], train[f'class_{dwm}'].astype(int))
+        class_pred = classifier.predict(test[feature_columns])
+
+        regressor = make_pipeline(StandardScaler(), Ridge(alpha=1.0))
+        regressor.fit(train[feature_columns], train[f'return_{dwm}'])
+        return_pred = regressor.predict(test[feature_columns])
+
+        models[dwm] = {
+            'classifier': classifier,
+            'regressor': regressor,
+            'accuracy': accuracy_score(test[f'class_{dwm}'].astype(int), class_pred),
+            'classification_report': classification_report(test[f'class_{dwm}'].astype(int), class_pred),
+            # regression metrics are on forward returns, the only scale shared across tickers
+            'mse': mean_squared_error(test[f'return_{dwm}'], return_pred),
+            'mae': mean_absolute_error(test[f'return_{dwm}'], return_pred),
+            'r2': r2_score(test[f'return_{dwm}'], return_pred),
+        }
+        logger.info(f"Global model {HORIZONS[dwm]}: accuracy {models[dwm]['accuracy']:.3f}, R2 {models[dwm]['r2']:.4f}")
+
+    bundle = {
+        'models': models,
+        'feature_columns': feature_columns,
+        'indicators': {name: bool(flag) for name, flag in indicators.items()},
+        'tickers': tickers,
+        'trained_at': datetime.now().isoformat(),
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    joblib.dump(bundle, tmp_path)
+    os.replace(tmp_path, path)  # atomic swap so serving processes never read a half written file
+    return bundle
+
+
+def load_global_model(path=GLOBAL_MODEL_PATH):
+    """Returns the persisted bundle, reloading it only when the file changed. None if no model was trained yet"""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _cache_lock:
+        if _cache['mtime'] != mtime:
+            _cache['bundle'] = joblib.load(path)
+            _cache['mtime'] = mtime
+        return _cache['bundle']
+
+
+def predict_global(ticker):
+    """
+    Predicts every horizon for a ticker with the pooled models. No training happens here, the only cost is
+    fetching the ticker's history to build its latest feature row. Returns None if no model is available.
+    """
+    bundle = load_global_model()
+    if bundle is None:
+        return None
+    try:
+        dataframe = retrieve_data(ticker)
+        if dataframe is None:
+            return None
+        dataframe = add_indicators(dataframe, **bundle['indicators']) # same indicators the model was trained on
+        features = normalize_features(dataframe).reindex(columns=bundle['feature_columns']).dropna()
+        if features.empty:
+            return None
+        latest = features.iloc[[-1]]
+        close = float(dataframe['Close'].loc[latest.index[0]])
+
+        predictions = {}
+        for dwm, model in bundle['models'].items():
+            predicted_return = float(model['regressor'].predict(latest)[0])
+            predictions[HORIZONS[dwm]] = {
+                'classification': {
+                    'accuracy': model['accuracy'],
+                    'classification_report': model['classification_report'],
+                    'today_prediction': int(model['classifier'].predict(latest)[0]),
+                },
+                'regression': {
+                    'mse': model['mse'],
+                    'mae': model['mae'],
+                    'r2': model['r2'],
+                    'prediction': int(close * (1 + predicted_return) * 100) / 100,
+                },
+            }
+        return predictions
+    except Exception as e:
+        logger.error(f"Error in predict_global for {ticker}: {e}")
+        return None
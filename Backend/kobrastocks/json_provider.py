@@ -0,0 +1,74 @@
+"""
+------------------Prologue--------------------
+File Name: json_provider.py
+Path: Backend/kobrastocks/json_provider.py
+
+Description:
+App-wide JSON provider backed by orjson. `jsonify` and every `return dict` route use it, so NumPy scalars and
+arrays, pandas Timestamps, dates and NaN (as null) serialize natively without a recursive conversion pass
+over the payload first. Key parts include:
+- `default`: Fallback for the few types orjson does not handle itself (object arrays, pandas scalars).
+- `OrjsonProvider`: The Flask `JSONProvider` set on the app in `__init__.py`.
+
+Input:
+Any route payload.
+
+Output:
+JSON text / responses.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import datetime
+import decimal
+
+import numpy as np
+import orjson
+import pandas as pd
+from flask.json.provider import JSONProvider
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def default(obj):
+    """Converts what orjson cannot serialize natively, raising TypeError for anything unknown"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()  # object or non native dtypes, e.g. Plotly's string date arrays
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, pd.Timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.tolist()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj):
+    """Serializes to UTF-8 bytes, the form streamed responses can write without another encode"""
+    return orjson.dumps(obj, default=default, option=ORJSON_OPTIONS)
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider using orjson for both directions"""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,86 @@
+"""
+------------------Prologue--------------------
+File Name: model_configs.py
+Path: Backend/kobrastocks/model_configs.py
+
+Description:
+Location of the model store and the persisted hyperparameter configs found by `flask tune-models`. Configs are kept
+per ticker and per sector in one JSON file, each keyed by the indicator selection it was tuned with, and loaded at
+serve time by `train_models` and `train_regression_models` so the tuned settings cost nothing per request.
+
+Input:
+Ticker symbols and indicator selections, tuned configs from the tuning job.
+
+Output:
+The config that applies to a ticker and indicator selection (its own, else its sector's), or None to use the
+built-in defaults.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import json
+import os
+import threading
+
+MODEL_DIR = os.environ.get('MODEL_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'model_store'))
+MODEL_CONFIGS_PATH = os.path.join(MODEL_DIR, 'model_configs.json')
+
+_cache = {'mtime': None, 'configs': None}
+_lock = threading.Lock()
+
+
+def load_model_configs(path=MODEL_CONFIGS_PATH):
+    """Returns all stored configs, re-reading the file only when it changed"""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {'tickers': {}, 'sectors': {}, 'ticker_sectors': {}}
+    with _lock:
+        if _cache['mtime'] != mtime:
+            with open(path) as f:
+                _cache['configs'] = json.load(f)
+            _cache['mtime'] = mtime
+        return _cache['configs']
+
+
+def indicator_key(indicators):
+    """Name of an indicator selection, e.g. 'MACD+RSI', or 'base' without indicators"""
+    names = sorted(name for name, enabled in (indicators or {}).items() if enabled)
+    return '+'.join(names) or 'base'
+
+
+def get_model_config(ticker, indicators=None):
+    """
+    Config tuned for this ticker and indicator selection, else for the sector it was tuned with, else None. A config
+    tuned on other indicators has other feature columns, so it does not apply and the defaults are used instead.
+    """
+    configs = load_model_configs()
+    ticker = ticker.upper()
+    key = indicator_key(indicators)
+    config = configs['tickers'].get(ticker, {}).get(key)
+    if config:
+        return config
+    sector = configs['ticker_sectors'].get(ticker)
+    return configs['sectors'].get(sector, {}).get(key) if sector else None
+
+
+def save_model_config(config, ticker=None, sector=None, members=(), indicators=None, path=MODEL_CONFIGS_PATH):
+    """Stores a tuned config for a ticker, or for a sector together with the tickers it applies to"""
+    key = indicator_key(indicators)
+    with _lock:
+        try:
+            with open(path) as f:
+                configs = json.load(f)
+        except (OSError, ValueError):
+            configs = {'tickers': {}, 'sectors': {}, 'ticker_sectors': {}}
+        if ticker:
+            configs['tickers'].setdefault(ticker.upper(), {})[key] = config
+        if sector:
+            configs['sectors'].setdefault(sector, {})[key] = config
+            for member in members:
+                configs['ticker_sectors'][member.upper()] = sector
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(configs, f, indent=2)
+        os.replace(tmp_path, path)
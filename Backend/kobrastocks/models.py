@@ -4,7 +4,7 @@ File Name: models.py
 Path: Backend/kobrastocks/models.py
 
 Description:
-Defines the data models for the application, including User, FavoriteStock, and WatchedStock. User model includes attributes for user details and password management, while FavoriteStock and WatchedStock models relate stocks to individual users.
+Defines the data models for the application, including User, FavoriteStock, WatchedStock, Portfolio, PortfolioStock and the PortfolioTransaction lot ledger. User model includes attributes for user details and password management, while FavoriteStock and WatchedStock models relate stocks to individual users.
 
 Input:
 None directly; models are populated and queried by other application components
@@ -72,6 +72,7 @@ class Portfolio(db.Model):
     # Relationships
     user = db.relationship('User', back_populates='portfolio')
     stocks = db.relationship('PortfolioStock', back_populates='portfolio', cascade='all, delete-orphan')
+    transactions = db.relationship('PortfolioTransaction', back_populates='portfolio', cascade='all, delete-orphan')
 
 #DATABASE SCHEMA FOR PORTFOLIO ASSET
 class PortfolioStock(db.Model):
@@ -81,11 +82,31 @@ class PortfolioStock(db.Model):
     ticker = db.Column(db.String(10), nullable=False, unique=False)
     number_of_shares = db.Column(db.Integer, nullable=False)
     pps_at_purchase = db.Column(db.Float, nullable=False)
+    realized_profit_loss = db.Column(db.Float, nullable=False, default=0.0, server_default='0')  # kept at 0 shares
     portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolios.id'))
 
     # Relationships
     portfolio = db.relationship('Portfolio', back_populates='stocks')
 
+#DATABASE SCHEMA FOR PORTFOLIO LOTS, PortfolioStock is the running aggregate of these rows
+class PortfolioTransaction(db.Model):
+    __tablename__ = 'portfolio_transactions'
+    __table_args__ = (db.Index('ix_portfolio_transactions_portfolio_ticker', 'portfolio_id', 'ticker'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolios.id'), nullable=False)
+    ticker = db.Column(db.String(10), nullable=False)
+    side = db.Column(db.String(6), nullable=False)  # 'buy', 'sell' or 'remove'
+    shares = db.Column(db.Integer, nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    cost_basis = db.Column(db.Float, nullable=False)  # cost added by a buy, average cost removed by a sell or remove
+    realized_profit_loss = db.Column(db.Float, nullable=False, default=0.0)
+    trade_date = db.Column(db.DateTime, nullable=True)  # None for lots carried over from before the ledger
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relationships
+    portfolio = db.relationship('Portfolio', back_populates='transactions')
+
 #DATABASE SCHEMA FOR CRYPTO FAVORITES
 class FavoriteCrypto(db.Model):
     __tablename__ = 'favorite_crypto'
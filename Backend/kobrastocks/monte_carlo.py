@@ -0,0 +1,160 @@
+"""
+------------------Prologue--------------------
+File Name: monte_carlo.py
+Path: Backend/kobrastocks/monte_carlo.py
+
+Description:
+Monte Carlo risk engine for a buy-and-hold portfolio. Correlated daily returns are drawn from the cached mean and
+covariance (its Cholesky factor is computed once per returns state and estimator) and compounded per asset, so weights drift
+with the simulated prices. Paths are simulated in fixed-size chunks, one day at a time, keeping memory bounded by
+chunk x assets however many paths are requested, and the chunks run on a thread pool (the NumPy kernels release
+the GIL, so they use several cores). Key functions include:
+- `cholesky_factor`: Cached lower-triangular factor of the daily covariance.
+- `simulate_portfolio`: Portfolio returns at the reporting days for every path.
+- `value_at_risk`: VaR / CVaR and terminal value percentiles from the simulated returns.
+- `parametric_var`: Closed-form normal VaR / CVaR, for responses that cannot wait on a simulation.
+- `monte_carlo_risk`: Everything above for a ticker set and weights.
+
+Input:
+Tickers, weights, portfolio value and simulation settings.
+
+Output:
+Dict with VaR and CVaR per horizon and confidence level, and terminal value percentiles.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.stats import norm
+
+from .cache import TTLCache
+from .covariance import get_covariance, covariance_key, DEFAULT_COVARIANCE
+from .returns_cache import get_returns_state
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATHS = 100000
+DEFAULT_HORIZON_DAYS = 21
+CHUNK_PATHS = 8192  # paths simulated together, bounds memory to CHUNK_PATHS x assets per array
+CONFIDENCE_LEVELS = (0.95, 0.99)
+TERMINAL_PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', min(8, os.cpu_count() or 1)))
+
+_factors = TTLCache(maxsize=256, ttl=24 * 3600)
+
+
+def cholesky_factor(state, method=DEFAULT_COVARIANCE):
+    """
+    Lower-triangular L with L @ L.T equal to the daily covariance of the state under the estimator, cached per
+    ticker set, window and estimator. Covariances that are not positive definite (e.g. duplicate series) get a
+    small diagonal jitter.
+    """
+    key = covariance_key(state, method)
+    factor = _factors.get(key)
+    if factor is None:
+        cov_matrix = get_covariance(state, method).values
+        jitter = 0.0
+        while factor is None:
+            try:
+                factor = np.linalg.cholesky(cov_matrix + jitter * np.eye(len(cov_matrix)))
+            except np.linalg.LinAlgError:
+                jitter = max(jitter * 10, 1e-12)
+        _factors.set(key, factor)
+    return factor
+
+
+def _simulate_chunk(seed, paths, weights, mean, factor, report_days):
+    """Portfolio return at every report day for one chunk of paths, shape (len(report_days), paths)"""
+    rng = np.random.default_rng(seed)
+    values = np.ones((paths, len(weights)))  # per-asset growth of 1 unit
+    results = np.empty((len(report_days), paths))
+    report = {day: row for row, day in enumerate(report_days)}
+    for day in range(1, max(report_days) + 1):
+        values *= 1 + mean + rng.standard_normal((paths, len(weights))) @ factor.T
+        if day in report:
+            results[report[day]] = values @ weights - 1
+    return results
+
+
+def simulate_portfolio(weights, mean, factor, report_days, paths=DEFAULT_PATHS, seed=None):
+    """
+    Simulates `paths` buy-and-hold paths and returns the portfolio return at each of `report_days` (trading days
+    from today) for every path, shape (len(report_days), paths). Chunks get independent random streams.
+    """
+    report_days = sorted(set(report_days))
+    sizes = [CHUNK_PATHS] * (paths // CHUNK_PATHS) + ([paths % CHUNK_PATHS] if paths % CHUNK_PATHS else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    with ThreadPoolExecutor(max_workers=max(1, min(SIMULATION_WORKERS, len(sizes)))) as executor:
+        chunks = executor.map(
+            lambda job: _simulate_chunk(job[0], job[1], weights, mean, factor, report_days),
+            zip(seeds, sizes)
+        )
+        return np.concatenate(list(chunks), axis=1)
+
+
+def value_at_risk(returns, confidence):
+    """
+    VaR and CVaR as positive loss fractions: the loss exceeded with probability 1 - confidence, and the mean loss
+    in that tail.
+    """
+    cutoff = np.quantile(returns, 1 - confidence)
+    tail = returns[returns <= cutoff]
+    return float(-cutoff), (float(-tail.mean()) if len(tail) else float(-cutoff))
+
+
+def parametric_var(mean, std, confidence, horizon_days=1):
+    """
+    Normal (variance-covariance) VaR and CVaR as positive loss fractions for a daily return mean and standard
+    deviation scaled to `horizon_days`. Ignores compounding and fat tails, `monte_carlo_risk` is the full estimate.
+    """
+    mean, std = mean * horizon_days, std * np.sqrt(horizon_days)
+    z = norm.ppf(confidence)
+    return float(z * std - mean), float(std * norm.pdf(z) / (1 - confidence) - mean)
+
+
+def monte_carlo_risk(tickers, weights, portfolio_value=1.0, paths=DEFAULT_PATHS, horizon_days=DEFAULT_HORIZON_DAYS,
+                     seed=None, covariance=DEFAULT_COVARIANCE):
+    """
+    1-day and 10-day VaR / CVaR at 95% and 99%, and percentiles of the portfolio value after `horizon_days`.
+    `weights` is {ticker: weight}, `covariance` names the estimator from `covariance.py`. Returns None if there is
+    no return history for the tickers.
+    """
+    state = get_returns_state(tickers)
+    if state is None or state['n'] < 2:
+        return None
+    weight_vector = np.array([weights.get(ticker, 0.0) for ticker in state['tickers']], dtype=float)
+    weight_vector /= weight_vector.sum()
+    horizon_days = max(1, horizon_days)
+
+    report_days = sorted({1, 10, horizon_days})
+    simulated = simulate_portfolio(
+        weight_vector, state['mean'], cholesky_factor(state, covariance), report_days, paths=paths, seed=seed
+    )
+    by_day = dict(zip(report_days, simulated))
+
+    risk = {}
+    for day in (1, 10):
+        for confidence in CONFIDENCE_LEVELS:
+            var, cvar = value_at_risk(by_day[day], confidence)
+            risk[f'{day}d_{int(confidence * 100)}'] = {
+                'var': var,
+                'cvar': cvar,
+                'var_value': var * portfolio_value,
+                'cvar_value': cvar * portfolio_value,
+            }
+    terminal = portfolio_value * (1 + by_day[horizon_days])
+    return {
+        'paths': paths,
+        'horizon_days': horizon_days,
+        'portfolio_value': portfolio_value,
+        'covariance': covariance,
+        'risk': risk,
+        'terminal_value_percentiles': {
+            str(p): float(v) for p, v in zip(TERMINAL_PERCENTILES, np.percentile(terminal, TERMINAL_PERCENTILES))
+        },
+        'expected_terminal_value': float(terminal.mean()),
+    }
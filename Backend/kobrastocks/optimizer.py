@@ -0,0 +1,194 @@
+"""
+------------------Prologue--------------------
+File Name: optimizer.py
+Path: Backend/kobrastocks/optimizer.py
+
+Description:
+Mean-variance optimization of a set of holdings, served by `/api/portfolio/optimize`. Works on the annualized mean
+and covariance (any estimator from `covariance.py`) of the cached returns matrix, so nothing is re-downloaded per request. Key functions include:
+- `portfolio_stats`: Return, risk and Sharpe ratio of any number of weight vectors with one matrix product.
+- `random_portfolios`: Scores tens of thousands of long-only Dirichlet weight vectors at once.
+- `min_variance_weights` / `max_sharpe_weights` / `efficient_frontier`: Constrained SLSQP solves with analytic
+  gradients, seeded from the best random portfolios.
+- `optimize_portfolio`: Everything above for a ticker set and the user's current weights.
+
+Input:
+Tickers, current weights, risk free rate and search sizes.
+
+Output:
+Dict with the current, max-Sharpe and min-variance portfolios, the frontier and a sample of the random sweep.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import logging
+
+import numpy as np
+from scipy.optimize import minimize
+
+from .covariance import get_covariance, DEFAULT_COVARIANCE
+from .returns_cache import get_returns_state, state_mean
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+DEFAULT_SAMPLES = 20000
+DEFAULT_FRONTIER_POINTS = 25
+CLOUD_POINTS = 1000  # random portfolios returned for plotting
+
+
+def portfolio_stats(weights, mean_returns, cov_matrix, risk_free_rate=0.02):
+    """
+    Annualized return, risk and Sharpe ratio of a (k,) weight vector or an (n, k) matrix of them. The variances
+    of all rows come from one (n, k) x (k, k) product instead of a loop.
+    """
+    weights = np.atleast_2d(weights)
+    returns = weights @ mean_returns
+    risks = np.sqrt(np.maximum(np.einsum('ij,ij->i', weights @ cov_matrix, weights), 0))
+    sharpe = np.divide(returns - risk_free_rate, risks, out=np.zeros_like(returns), where=risks > 0)
+    return returns, risks, sharpe
+
+
+def random_portfolios(mean_returns, cov_matrix, samples=DEFAULT_SAMPLES, risk_free_rate=0.02, max_weight=1.0, seed=None):
+    """Long-only random weights (uniform on the simplex) and their stats, rows breaking max_weight dropped"""
+    rng = np.random.default_rng(seed)
+    weights = rng.dirichlet(np.ones(len(mean_returns)), size=samples)
+    if max_weight < 1.0:
+        weights = weights[weights.max(axis=1) <= max_weight]
+    return (weights,) + portfolio_stats(weights, mean_returns, cov_matrix, risk_free_rate)
+
+
+def _solve(objective, gradient, start, bounds, constraints):
+    result = minimize(
+        objective, start, jac=gradient, method='SLSQP', bounds=bounds, constraints=constraints,
+        options={'maxiter': 500, 'ftol': 1e-12}
+    )
+    weights = np.clip(result.x, 0, None)
+    return weights / weights.sum(), result.success
+
+
+def _budget_constraint():
+    return {'type': 'eq', 'fun': lambda w: w.sum() - 1, 'jac': lambda w: np.ones_like(w)}
+
+
+def min_variance_weights(cov_matrix, max_weight=1.0, start=None):
+    """Long-only minimum variance weights"""
+    k = cov_matrix.shape[0]
+    start = np.full(k, 1 / k) if start is None else start
+    return _solve(
+        lambda w: w @ cov_matrix @ w,
+        lambda w: 2 * cov_matrix @ w,
+        start, [(0, max_weight)] * k, [_budget_constraint()]
+    )
+
+
+def max_sharpe_weights(mean_returns, cov_matrix, risk_free_rate=0.02, max_weight=1.0, start=None):
+    """Long-only weights maximizing (return - risk free) / risk"""
+    k = len(mean_returns)
+    start = np.full(k, 1 / k) if start is None else start
+
+    def negative_sharpe(w):
+        risk = np.sqrt(w @ cov_matrix @ w)
+        return -(w @ mean_returns - risk_free_rate) / risk
+
+    def gradient(w):
+        variance = w @ cov_matrix @ w
+        risk = np.sqrt(variance)
+        excess = w @ mean_returns - risk_free_rate
+        return -(mean_returns * risk - excess * (cov_matrix @ w) / risk) / variance
+
+    return _solve(negative_sharpe, gradient, start, [(0, max_weight)] * k, [_budget_constraint()])
+
+
+def efficient_frontier(mean_returns, cov_matrix, points=DEFAULT_FRONTIER_POINTS, max_weight=1.0, min_variance=None):
+    """
+    Minimum variance weights for `points` target returns between the min-variance portfolio's return and the
+    highest reachable return. Each solve starts from the previous one, so neighbouring solves converge fast.
+    """
+    k = len(mean_returns)
+    start = min_variance if min_variance is not None else min_variance_weights(cov_matrix, max_weight)[0]
+    # highest return reachable under the weight cap: fill the best assets up to max_weight
+    order = np.argsort(mean_returns)[::-1]
+    top = np.zeros(k)
+    remaining = 1.0
+    for index in order:
+        top[index] = min(max_weight, remaining)
+        remaining -= top[index]
+        if remaining <= 0:
+            break
+    targets = np.linspace(start @ mean_returns, top @ mean_returns, points)
+
+    frontier = []
+    weights = start
+    for target in targets:
+        constraints = [
+            _budget_constraint(),
+            {'type': 'eq', 'fun': lambda w, t=target: w @ mean_returns - t, 'jac': lambda w: mean_returns},
+        ]
+        weights, success = _solve(
+            lambda w: w @ cov_matrix @ w, lambda w: 2 * cov_matrix @ w,
+            weights, [(0, max_weight)] * k, constraints
+        )
+        if success:
+            frontier.append(weights)
+    return np.array(frontier).reshape(-1, k)
+
+
+def _describe(tickers, weights, mean_returns, cov_matrix, risk_free_rate):
+    returns, risks, sharpe = portfolio_stats(weights, mean_returns, cov_matrix, risk_free_rate)
+    return {
+        'weights': {ticker: float(weight) for ticker, weight in zip(tickers, weights)},
+        'expected_return': float(returns[0]),
+        'risk': float(risks[0]),
+        'sharpe_ratio': float(sharpe[0]),
+    }
+
+
+def optimize_portfolio(tickers, current_weights=None, risk_free_rate=0.02, samples=DEFAULT_SAMPLES,
+                       frontier_points=DEFAULT_FRONTIER_POINTS, max_weight=1.0, covariance=DEFAULT_COVARIANCE):
+    """
+    Efficient frontier plus max-Sharpe and min-variance weights for the tickers. `current_weights` ({ticker:
+    weight}) adds the user's own portfolio for comparison, `covariance` names the estimator. Returns None if
+    there is no common return history.
+    """
+    state = get_returns_state(tickers)
+    if state is None or state['n'] < 2:
+        return None
+    tickers = state['tickers']
+    mean_returns = state_mean(state).values * TRADING_DAYS
+    cov_matrix = get_covariance(state, covariance).values * TRADING_DAYS
+    max_weight = max(max_weight, 1 / len(tickers))  # a cap below 1/k cannot be met
+
+    weights, returns, risks, sharpe = random_portfolios(mean_returns, cov_matrix, samples, risk_free_rate, max_weight)
+    seeds = {}
+    if len(weights):
+        seeds = {'sharpe': weights[np.argmax(sharpe)], 'variance': weights[np.argmin(risks)]}
+
+    min_variance, _ = min_variance_weights(cov_matrix, max_weight, seeds.get('variance'))
+    max_sharpe, _ = max_sharpe_weights(mean_returns, cov_matrix, risk_free_rate, max_weight, seeds.get('sharpe'))
+    frontier = efficient_frontier(mean_returns, cov_matrix, frontier_points, max_weight, min_variance)
+    frontier_returns, frontier_risks, frontier_sharpe = portfolio_stats(frontier, mean_returns, cov_matrix, risk_free_rate)
+
+    cloud = np.linspace(0, len(weights) - 1, min(CLOUD_POINTS, len(weights))).astype(int)
+    result = {
+        'tickers': tickers,
+        'covariance': covariance,
+        'max_sharpe': _describe(tickers, max_sharpe, mean_returns, cov_matrix, risk_free_rate),
+        'min_variance': _describe(tickers, min_variance, mean_returns, cov_matrix, risk_free_rate),
+        'frontier': {
+            'expected_return': frontier_returns,
+            'risk': frontier_risks,
+            'sharpe_ratio': frontier_sharpe,
+            'weights': frontier,
+        },
+        'random_portfolios': {
+            'count': len(weights),
+            'expected_return': returns[cloud],
+            'risk': risks[cloud],
+            'sharpe_ratio': sharpe[cloud],
+        },
+    }
+    if current_weights:
+        current = np.array([current_weights.get(ticker, 0.0) for ticker in tickers])
+        result['current'] = _describe(tickers, current / current.sum(), mean_returns, cov_matrix, risk_free_rate)
+    return result
@@ -0,0 +1,122 @@
+"""
+------------------Prologue--------------------
+File Name: portfolio_history.py
+Path: Backend/kobrastocks/portfolio_history.py
+
+Description:
+Daily portfolio value, cost basis and profit / loss over a date range, served by `/api/portfolio/history`. The
+closes of every holding come from one multi-ticker download (cached until the next daily bar), and holdings changes
+are applied as a cumulative position matrix: each buy or sell adds its share and cost delta on its trade date and a
+cumulative sum down the dates gives the position held on every day. The value series is then one row-wise product
+of the aligned close matrix and the position matrix, with no per-holding or per-day Python loop. Key functions
+include:
+- `position_matrices`: Shares held per day and ticker, and cost basis per day, from position events.
+- `history_series`: Value, cost basis and P&L series from closes and position events.
+- `get_history`: Everything above for a list of position events and a named range.
+
+Input:
+Position events (ticker, trade date, share delta, cost delta) and a range name.
+
+Output:
+Dict of dates and value, cost basis and P&L arrays.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from .cache import TTLCache, seconds_until_next_bar
+
+logger = logging.getLogger(__name__)
+
+# calendar days covered by each range, ytd is computed from Jan 1
+HISTORY_RANGES = {'1mo': 31, '3mo': 92, '6mo': 183, 'ytd': None, '1y': 366, '2y': 731, '5y': 1827}
+DEFAULT_HISTORY_RANGE = '1y'
+
+_closes = TTLCache(maxsize=256)
+
+
+def range_start(range_name, now=None):
+    now = now or datetime.now()
+    if HISTORY_RANGES[range_name] is None:
+        return datetime(now.year, 1, 1).date()
+    return (now - timedelta(days=HISTORY_RANGES[range_name])).date()
+
+
+def _download_closes(tickers, start):
+    """Daily closes from `start`, one column per ticker, gaps (holidays, later listings) forward filled"""
+    data = yf.download(
+        list(tickers), start=start.strftime('%Y-%m-%d'), interval='1d',
+        auto_adjust=True, group_by='column', threads=True, progress=False
+    ) # one request for every ticker
+    if data.empty:
+        return None
+    closes = data['Close']
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(tickers[0])
+    closes = closes.reindex(columns=list(tickers)).ffill()
+    if closes.index.tz is not None:
+        closes.index = closes.index.tz_localize(None)
+    return closes
+
+
+def get_closes(tickers, start):
+    key = (tuple(sorted(tickers)), start)
+    return _closes.get_or_set(key, lambda: _download_closes(list(key[0]), start), ttl=seconds_until_next_bar())
+
+
+def position_matrices(events, dates, tickers):
+    """
+    Cumulative positions for `events` of (ticker, trade date or None, share delta, cost delta). Returns the shares
+    held per (day, ticker) and the cost basis per day. Trades before the first date, or without a date, count as
+    held from the start, trades after the last date are ignored.
+    """
+    columns = {ticker: i for i, ticker in enumerate(tickers)}
+    share_deltas = np.zeros((len(dates), len(tickers)))
+    cost_deltas = np.zeros(len(dates))
+    rows, cols, shares, costs = [], [], [], []
+    for ticker, trade_date, share_delta, cost_delta in events:
+        row = 0 if trade_date is None else int(dates.searchsorted(pd.Timestamp(trade_date).tz_localize(None).normalize()))
+        if row >= len(dates) or ticker not in columns:
+            continue
+        rows.append(row)
+        cols.append(columns[ticker])
+        shares.append(share_delta)
+        costs.append(cost_delta)
+    # np.add.at accumulates repeated (row, col) pairs, several trades on one day all count
+    np.add.at(share_deltas, (rows, cols), shares)
+    np.add.at(cost_deltas, rows, costs)
+    return np.cumsum(share_deltas, axis=0), np.cumsum(cost_deltas)
+
+
+def history_series(closes, events):
+    """Value, cost basis and P&L per day for the position events, closes being a dates x tickers frame"""
+    positions, cost_basis = position_matrices(events, closes.index, list(closes.columns))
+    prices = np.nan_to_num(closes.values)  # before a listing there is no price and no position
+    value = np.einsum('ij,ij->i', prices, positions)
+    profit_loss = value - cost_basis
+    return {
+        'dates': closes.index.strftime('%Y-%m-%d').tolist(),
+        'value': value,
+        'cost_basis': cost_basis,
+        'profit_loss': profit_loss,
+        'profit_loss_percentage': np.divide(
+            profit_loss * 100, cost_basis, out=np.zeros_like(profit_loss), where=cost_basis != 0
+        ),
+    }
+
+
+def get_history(events, range_name=DEFAULT_HISTORY_RANGE):
+    """History over the named range for position events, None if no prices could be downloaded"""
+    tickers = sorted({event[0] for event in events})
+    if not tickers:
+        return None
+    closes = get_closes(tickers, range_start(range_name))
+    if closes is None or closes.empty:
+        return None
+    return dict(history_series(closes, events), range=range_name, tickers=tickers)
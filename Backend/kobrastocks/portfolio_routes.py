@@ -8,7 +8,13 @@ Defines routes for managing the user's portfolio. Includes endpoints for:
 - Retrieving the user's portfolio.
 - Adding a stock to the portfolio.
 - Removing a stock from the portfolio.
-- Getting recommendations for the portfolio based on owned stocks.
+- Selling shares and listing the buy / sell lot ledger.
+- Portfolio metrics, returned at once, and the chat commentary on them streamed as NDJSON.
+- Getting recommendations for the portfolio based on owned stocks, optionally streamed as NDJSON per ticker.
+- Optimizing the portfolio weights (efficient frontier, max-Sharpe and min-variance portfolios).
+- Simulating portfolio risk (Monte Carlo VaR, CVaR and terminal value percentiles).
+- Rolling beta, alpha, Sharpe, Sortino and max drawdown series.
+- Daily portfolio value, cost basis and profit / loss history over a range.
 
 Input:
 JSON data for stock tickers and amounts, JWT tokens for authentication.
@@ -21,16 +27,42 @@ Collaborators: Spencer Sliffe
 """
 from datetime import datetime
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from .models import Portfolio
-from .portfolio_services import portfolio_analysis, get_portfolio, add_stock_to_portfolio, remove_stock_from_portfolio
+from .portfolio_services import (
+    portfolio_analysis,
+    portfolio_metrics,
+    iter_portfolio_commentary,
+    get_portfolio,
+    add_stock_to_portfolio,
+    remove_stock_from_portfolio,
+    get_portfolio_tickers,
+    get_portfolio_recommendations,
+    get_portfolio_optimization,
+    get_portfolio_risk,
+    get_portfolio_rolling_metrics,
+    get_portfolio_history,
+    get_portfolio_transactions,
+    get_portfolio_shares,
+    get_realized_profit_loss,
+    sell_stock_from_portfolio,
+    iter_recommendations,
+)
+from .optimizer import DEFAULT_SAMPLES, DEFAULT_FRONTIER_POINTS
+from .monte_carlo import DEFAULT_PATHS, DEFAULT_HORIZON_DAYS
+from .rolling_metrics import DEFAULT_WINDOWS
+from .benchmark_registry import BENCHMARK_TICKERS, DEFAULT_BENCHMARK
+from .covariance import COVARIANCE_ESTIMATORS, DEFAULT_COVARIANCE
+from .portfolio_history import HISTORY_RANGES, DEFAULT_HISTORY_RANGE
 from .serializers import (
     portfolio_schema,
-    portfolio_recommendations_schema
+    portfolio_recommendations_schema,
+    portfolio_transaction_list_schema
 )
+from .services import INDICATOR_FUNCTIONS, TRAINING_TIERS, DEFAULT_TRAINING_TIER
 from .utils import check_stock_validity
+from .json_provider import dumps_bytes
 
 portfolio = Blueprint('portfolio', __name__, url_prefix='/api/portfolio')
 
@@ -74,6 +106,46 @@ def add_stock():
         return jsonify({'message': 'Failed to add stock to portfolio.'}), 500 # error message
 
 
+@portfolio.route('/sell', methods=['POST'])
+@jwt_required()
+def sell_stock():
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    ticker = data.get('ticker')
+    num_shares = data.get('num_shares')
+    sale_date = data.get('sale_date')  # ISO format, defaults to now
+
+    if not ticker or not isinstance(num_shares, int) or num_shares <= 0:
+        return jsonify({'message': 'Ticker and a positive integer num_shares are required.'}), 400
+    if sale_date:
+        try:
+            sale_date = datetime.fromisoformat(sale_date)
+        except ValueError:
+            return jsonify({'message': 'Invalid sale_date format. Use ISO 8601 format.'}), 400
+
+    success = sell_stock_from_portfolio(user_id, ticker, num_shares, sale_date)
+    if success is None:
+        return jsonify({'message': f'Not enough {ticker.upper()} shares held on the sale date.'}), 400
+    if success:
+        return jsonify({'message': f'Sold {num_shares} {ticker.upper()}.'}), 200
+    return jsonify({'message': 'Failed to sell stock.'}), 500
+
+
+@portfolio.route('/transactions', methods=['GET'])
+@jwt_required()
+def get_transactions():
+    user_id = get_jwt_identity()
+    ticker = request.args.get('ticker')
+    transactions = get_portfolio_transactions(user_id, ticker)
+    realized = get_realized_profit_loss(user_id) # per ticker from the aggregate, closed positions included
+    if ticker:
+        realized = {ticker.upper(): realized.get(ticker.upper(), 0.0)}
+    return jsonify({
+        'transactions': portfolio_transaction_list_schema.dump(transactions),
+        'realized_profit_loss': realized
+    }), 200
+
+
 @portfolio.route('/<string:ticker>', methods=['DELETE']) # route to delete stok
 @jwt_required()
 def remove_stock(ticker):
@@ -85,21 +157,176 @@ def remove_stock(ticker):
         return jsonify({'message': 'Failed to remove stock from portfolio.'}), 500 # removal Error message
 
 
+def analysis_arguments(user_id):
+    """(portfolio_data, benchmark, covariance, None) for the analysis routes, or an error response in last place"""
+    # Prepare portfolio data (ticker: number_of_shares) from the open positions
+    portfolio_data = get_portfolio_shares(user_id) #makes portfolio data
+    if not portfolio_data:
+        return None, None, None, (jsonify({'message': 'Portfolio not found or is empty.'}), 404) # error message
+
+    benchmark = request.args.get('benchmark', default=DEFAULT_BENCHMARK).upper()
+    if benchmark not in BENCHMARK_TICKERS:
+        return None, None, None, (
+            jsonify({'message': f"Unknown benchmark {benchmark}. Use any of {BENCHMARK_TICKERS}."}), 400
+        )
+    covariance = request.args.get('covariance', default=DEFAULT_COVARIANCE)
+    if covariance not in COVARIANCE_ESTIMATORS:
+        return None, None, None, (
+            jsonify({'message': f"Unknown covariance {covariance}. Use any of {list(COVARIANCE_ESTIMATORS)}."}), 400
+        )
+    return portfolio_data, benchmark, covariance, None
+
+
 @portfolio.route('/analysis', methods=['GET'])
 @jwt_required()
 def get_portfolio_analysis():
     user_id = get_jwt_identity()
-    # Fetch user's portfolio from the database
-    user_portfolio = Portfolio.query.filter_by(user_id=user_id).first() # gets user portfolio
-    if not user_portfolio or not user_portfolio.stocks:
-        return jsonify({'message': 'Portfolio not found or is empty.'}), 404 # error message
+    portfolio_data, benchmark, covariance, error = analysis_arguments(user_id)
+    if error:
+        return error
+
+    # commentary=inline waits for the chat responses, otherwise they come from /analysis/commentary
+    try:
+        if request.args.get('commentary', default='stream') == 'inline':
+            analysis_result = portfolio_analysis(portfolio_data, benchmark=benchmark, covariance=covariance) #performs analysis result
+            if not analysis_result:
+                return jsonify({'message': 'Error analyzing portfolio.'}), 500 #error message
+            return jsonify(analysis_result), 200 # returns successful result
+
+        result = portfolio_metrics(portfolio_data, benchmark=benchmark, covariance=covariance)
+    except LookupError as e:
+        return jsonify({'message': str(e)}), 503 # benchmark series not downloaded yet, retried on the next call
+    if not result:
+        return jsonify({'message': 'Error analyzing portfolio.'}), 500
+    metrics, _, cache_key = result
+    return jsonify({'metrics': metrics, 'cache_key': cache_key}), 200 # key lets /analysis/commentary reuse these metrics
+
+
+@portfolio.route('/analysis/commentary', methods=['GET'])
+@jwt_required()
+def stream_portfolio_commentary():
+    user_id = get_jwt_identity()
+    portfolio_data, benchmark, covariance, error = analysis_arguments(user_id)
+    if error:
+        return error
+
+    key = request.args.get('key') # cache_key of the /analysis response, recomputed when missing or expired
+
+    def generate():
+        # one JSON line per chat response as it completes, then a closing line
+        count = 0
+        try:
+            for index, response in iter_portfolio_commentary(portfolio_data, benchmark, covariance, key=key):
+                count += 1
+                yield dumps_bytes({'index': index, 'response': response}) + b'\n'
+        except Exception as e:
+            current_app.logger.error(f"Error streaming portfolio commentary: {e}")
+            yield dumps_bytes({'error': 'Could not generate commentary.'}) + b'\n'
+        yield dumps_bytes({'done': True, 'count': count}) + b'\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@portfolio.route('/optimize', methods=['GET'])
+@jwt_required()
+def get_optimization():
+    user_id = get_jwt_identity()
+    risk_free_rate = request.args.get('risk_free_rate', default=0.02, type=float)
+    samples = request.args.get('samples', default=DEFAULT_SAMPLES, type=int)
+    frontier_points = request.args.get('points', default=DEFAULT_FRONTIER_POINTS, type=int)
+    max_weight = request.args.get('max_weight', default=1.0, type=float)
+    if not 0 <= samples <= 200000 or not 2 <= frontier_points <= 100 or not 0 < max_weight <= 1:
+        return jsonify({'message': 'samples must be 0-200000, points 2-100 and max_weight in (0, 1].'}), 400
+    covariance = request.args.get('covariance', default=DEFAULT_COVARIANCE)
+    if covariance not in COVARIANCE_ESTIMATORS:
+        return jsonify({'message': f"Unknown covariance {covariance}. Use any of {list(COVARIANCE_ESTIMATORS)}."}), 400
+
+    result = get_portfolio_optimization(
+        user_id, risk_free_rate=risk_free_rate, samples=samples,
+        frontier_points=frontier_points, max_weight=max_weight, covariance=covariance
+    )
+    if result is None:
+        return jsonify({'message': 'Portfolio not found, empty or without price history.'}), 404
+    return jsonify(result), 200
+
+
+@portfolio.route('/risk', methods=['GET'])
+@jwt_required()
+def get_risk():
+    user_id = get_jwt_identity()
+    paths = request.args.get('paths', default=DEFAULT_PATHS, type=int)
+    horizon_days = request.args.get('horizon', default=DEFAULT_HORIZON_DAYS, type=int)
+    if not 1000 <= paths <= 1000000 or not 1 <= horizon_days <= 252:
+        return jsonify({'message': 'paths must be 1000-1000000 and horizon 1-252 trading days.'}), 400
+    covariance = request.args.get('covariance', default=DEFAULT_COVARIANCE)
+    if covariance not in COVARIANCE_ESTIMATORS:
+        return jsonify({'message': f"Unknown covariance {covariance}. Use any of {list(COVARIANCE_ESTIMATORS)}."}), 400
+
+    result = get_portfolio_risk(user_id, paths=paths, horizon_days=horizon_days, covariance=covariance)
+    if result is None:
+        return jsonify({'message': 'Portfolio not found, empty or without price history.'}), 404
+    return jsonify(result), 200
+
+
+@portfolio.route('/rolling', methods=['GET'])
+@jwt_required()
+def get_rolling_metrics():
+    user_id = get_jwt_identity()
+    windows = request.args.get('windows', default=','.join(map(str, DEFAULT_WINDOWS)))
+    risk_free_rate = request.args.get('risk_free_rate', default=0.02, type=float)
+    benchmark = request.args.get('benchmark', default=DEFAULT_BENCHMARK).upper()
+    if benchmark not in BENCHMARK_TICKERS:
+        return jsonify({'message': f"Unknown benchmark {benchmark}. Use any of {BENCHMARK_TICKERS}."}), 400
+    try:
+        windows = sorted({int(w) for w in windows.split(',') if w.strip()})
+    except ValueError:
+        return jsonify({'message': 'windows must be a comma separated list of day counts.'}), 400
+    if not windows or len(windows) > 5 or not all(2 <= w <= 1260 for w in windows):
+        return jsonify({'message': 'Give 1-5 windows of 2-1260 trading days.'}), 400
+
+    try:
+        result = get_portfolio_rolling_metrics(
+            user_id, windows=windows, risk_free_rate=risk_free_rate, benchmark=benchmark
+        )
+    except LookupError as e:
+        return jsonify({'message': str(e)}), 503
+    if result is None:
+        return jsonify({'message': 'Portfolio not found, empty or without price history.'}), 404
+    return jsonify(result), 200
+
+
+@portfolio.route('/history', methods=['GET'])
+@jwt_required()
+def get_history():
+    user_id = get_jwt_identity()
+    range_name = request.args.get('range', default=DEFAULT_HISTORY_RANGE)
+    if range_name not in HISTORY_RANGES:
+        return jsonify({'message': f"Unknown range {range_name}. Use any of {list(HISTORY_RANGES)}."}), 400
+
+    result = get_portfolio_history(user_id, range_name)
+    if result is None:
+        return jsonify({'message': 'Portfolio not found, empty or without price history.'}), 404
+    return jsonify(result), 200
+
+
+@portfolio.route('/recommendations', methods=['GET'])
+@jwt_required()
+def get_recommendations():
+    user_id = get_jwt_identity()
+    indicators = {name: request.args.get(name, default='false') == 'true' for name in INDICATOR_FUNCTIONS}
+    tier = request.args.get('tier', default=DEFAULT_TRAINING_TIER, type=str)
+    if tier not in TRAINING_TIERS:
+        return jsonify({'message': f"Unknown training tier '{tier}'."}), 400
+
+    if request.args.get('stream', default='false') == 'true':
+        tickers = get_portfolio_tickers(user_id) # queried before the response starts streaming
 
-    # Prepare portfolio data (ticker: number_of_shares)
-    portfolio_data = {stock.ticker: stock.number_of_shares for stock in user_portfolio.stocks} #makes portfolio data
+        def generate():
+            # one JSON line per ticker, in the order the tickers finish
+            for ticker, predictions in iter_recommendations(tickers, indicators, tier):
+                yield dumps_bytes({'ticker': ticker, 'predictions': predictions}) + b'\n'
 
-    # Perform portfolio analysis
-    analysis_result = portfolio_analysis(portfolio_data) #performs analysis result 
-    if not analysis_result:
-        return jsonify({'message': 'Error analyzing portfolio.'}), 500 #error message
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
-    return jsonify(analysis_result), 200 # returns successful result
+    recommendations = get_portfolio_recommendations(user_id, indicators, tier)
+    return jsonify(portfolio_recommendations_schema.dump({'recommendations': recommendations})), 200
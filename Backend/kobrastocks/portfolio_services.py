@@ -17,44 +17,82 @@ Collaborators: Charlie Gillund, Chatgpt(For Debugging and ChatGPT api assistance
 Date 11/18/24
 ---------------------------------------------
 """
+import os
 import pytz
-import yfinance as yf
 import numpy as np
-import pandas as pd
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 
 from .models import Portfolio
+from .cache import TTLCache
 from . import db
-from .models import PortfolioStock
-from .services import get_current_stock_price, get_predictions, get_stock_data, get_stock_price_at_date
+from .models import PortfolioStock, PortfolioTransaction
+from .model_configs import get_model_config
+from .feature_store import get_training_arrays
+from .returns_cache import get_returns_state, state_mean
+from .covariance import get_covariance, DEFAULT_COVARIANCE
+from .portfolio_history import get_history, DEFAULT_HISTORY_RANGE
+from .optimizer import optimize_portfolio, DEFAULT_SAMPLES, DEFAULT_FRONTIER_POINTS
+from .monte_carlo import monte_carlo_risk, parametric_var, DEFAULT_PATHS, DEFAULT_HORIZON_DAYS
+from .rolling_metrics import rolling_metrics, DEFAULT_WINDOWS
+from .benchmark_registry import get_benchmark_returns, DEFAULT_BENCHMARK
+from .services import (
+    get_current_stock_prices,
+    get_stock_data,
+    get_stock_price_at_date,
+    retrieve_panel,
+    add_indicators_panel,
+    split_panel,
+    train_for_horizon,
+    HORIZONS,
+    DEFAULT_TRAINING_TIER,
+)
 from .utils import (
     mean_variance_optimization,
     calculate_sharpe_ratio,
-    calculate_diversification_ratio,
+    calculate_diversification_ratio_from_cov,
     generate_chat_prompts,
-    get_chat_analysis
+    get_chat_analysis,
+    iter_chat_analysis,
+    portfolio_analysis_fingerprint
 )
 # Configure logging
 logging.basicConfig(level=logging.INFO) # configs lgging 
 logger = logging.getLogger(__name__)#
+
+# Commentary prompts of recent analyses by cache key, /analysis/commentary?key= streams from them without
+# fetching prices or recomputing the metrics again
+COMMENTARY_TTL = 600
+_commentary_prompts = TTLCache(maxsize=1024, ttl=COMMENTARY_TTL)
+
+# Upper bound on model trainings running at once for a recommendations batch
+RECOMMENDATION_WORKERS = int(os.environ.get('RECOMMENDATION_WORKERS', min(8, os.cpu_count() or 1)))
  
 
-def portfolio_analysis(portfolio):
+def portfolio_metrics(portfolio, benchmark=DEFAULT_BENCHMARK, covariance=DEFAULT_COVARIANCE):
+    """
+    Risk and return metrics of a {ticker: shares} portfolio and the commentary prompts built from them, returned
+    as (metrics, prompts, cache key of the commentary) without waiting on any LLM call. None if there is no data.
+    """
     try:
-        end_date = datetime.now() # gets todays date
-        start_date = end_date.replace(year=end_date.year - 5) # finds start date
+        portfolio = {t.upper(): shares for t, shares in portfolio.items()} # same symbols as the returns cache
         tickers = list(portfolio.keys()) # gets tickers from portfolio
-        number_of_shares = np.array(list(portfolio.values()), dtype=float) # get number of shares of each stock
 
-        # Fetch current prices and verify portfolio is non-empty
-        current_prices = {} 
+        # Cached returns matrix and running mean / covariance for this ticker set, only new bars are downloaded
+        state = get_returns_state(tickers)
+        if state is None or state['n'] < 2:
+            logging.error("No data fetched for given tickers.") # logs error
+            return None
+        tickers = state['tickers'] # column order of the cached matrix
+
+        # Fetch current prices with one request, the cached history's last close covers any gaps
+        current_prices = get_current_stock_prices(tickers)
+        last_closes = state['prices'].iloc[-1]
         for ticker in tickers:
-            price = get_current_stock_price(ticker) # gets stock price
-            if price is None:
-                logging.error(f"Could not fetch current price for {ticker}") # logs  error message
-                return None
-            current_prices[ticker] = price # adds price to list
+            if ticker not in current_prices:
+                logging.error(f"Could not fetch current price for {ticker}, using last close") # logs  error message
+                current_prices[ticker] = float(last_closes[ticker])
 
         total_value = sum(shares * current_prices[t] for t, shares in portfolio.items())
         if total_value == 0:
@@ -63,29 +101,18 @@ def portfolio_analysis(portfolio):
 
         weights = np.array([(portfolio[t] * current_prices[t]) / total_value for t in tickers]) # gets stock weight in portfolio
 
-        # Fetch historical data
-        data = yf.download(tickers, start=start_date, end=end_date)['Adj Close'] # gets stock prices 
-        if isinstance(data, pd.Series): # if data in series
-            data = data.to_frame() #convert to df
-            data.columns = [tickers[0]] # Gets df column
-        data = data.dropna() #drops invalid data
-        if data.empty:
-            logging.error("No data fetched for given tickers.") # logs error
-            return None
-
-        returns = data.pct_change().dropna() # gets pct change for stocks
-        mean_returns = returns.mean() * 252 # gets mean returns
-        cov_matrix = returns.cov() * 252 # gets cov matrix
+        returns = state['returns'] # daily returns for stocks
+        mean_returns = state_mean(state) * 252 # gets mean returns
+        cov_matrix = get_covariance(state, covariance) * 252 # one estimate shared by risk, diversification and VaR
 
         expected_return = np.dot(weights, mean_returns) # gets expected returns
         portfolio_variance = np.dot(weights.T, np.dot(cov_matrix, weights)) # get port variance
         risk = np.sqrt(portfolio_variance) # calculates risk
         sharpe_ratio = calculate_sharpe_ratio(expected_return, risk) # calculates sharpe ratio
-        diversification_ratio = calculate_diversification_ratio(data, weights) # calculates diverification ratio
+        diversification_ratio = calculate_diversification_ratio_from_cov(cov_matrix, weights) # calculates diverification ratio
 
         # Additional Metrics
-        benchmark = yf.download('SPY', start=start_date, end=end_date)['Adj Close'].dropna() # get SPY data 
-        benchmark_returns = benchmark.pct_change().dropna() # gets SPY returns 
+        benchmark_returns = get_benchmark_returns(benchmark) # shared benchmark returns, raises LookupError while unavailable
         port_daily = (returns * weights).sum(axis=1) # gets daily retunrn via weight
         common_index = port_daily.index.intersection(benchmark_returns.index)#calculates
         port_daily = port_daily.reindex(common_index).dropna()# gets daily portfolio returns 
@@ -113,6 +140,10 @@ def portfolio_analysis(portfolio):
         drawdown = (cum_returns - peak) / peak # calculates drawdowns
         max_drawdown = drawdown.min() if not drawdown.empty else 0.0 # calculates max drawdown
 
+        # Closed-form short horizon tail risk from the same moments, the simulated figures are served by /risk
+        daily_mean = np.dot(weights, state_mean(state))
+        daily_std = np.sqrt(portfolio_variance / 252)
+
         metrics = {
             'expected_return': expected_return,
             'risk': risk,
@@ -121,8 +152,12 @@ def portfolio_analysis(portfolio):
             'alpha': alpha,
             'beta': beta,
             'sortino_ratio': sortino_ratio,
-            'max_drawdown': max_drawdown
+            'max_drawdown': max_drawdown,
+            'benchmark': benchmark.upper(),
+            'covariance': covariance
         } # metric dic
+        for days in (1, 10):
+            metrics[f'var_95_{days}d'], metrics[f'cvar_95_{days}d'] = parametric_var(daily_mean, daily_std, 0.95, days)
 
         portfolio_details = [
             {
@@ -146,17 +181,51 @@ def portfolio_analysis(portfolio):
             sortino_ratio=sortino_ratio,
             max_drawdown=max_drawdown
         ) # gets chat prompt 
-        chat_responses = get_chat_analysis(prompts) # gets chat gpt responses
+        cache_key = portfolio_analysis_fingerprint(portfolio_details, metrics)
+        _commentary_prompts.set(cache_key, (portfolio, prompts))
+        return metrics, prompts, cache_key
+    except LookupError:
+        raise # benchmark not available, reported to the client instead of a generic failure
+    except Exception as e:
+        logging.error(f"Error in portfolio_metrics: {e}")
+        return None
 
-        return {
-            'analysis': {
-                'chat_responses': chat_responses
-            },
-            'metrics': metrics
-        } # returns dic
+
+def portfolio_analysis(portfolio, benchmark=DEFAULT_BENCHMARK, covariance=DEFAULT_COVARIANCE):
+    """Metrics plus the blocking chat commentary in one response"""
+    result = portfolio_metrics(portfolio, benchmark, covariance)
+    if result is None:
+        return None
+    metrics, prompts, cache_key = result
+    try:
+        chat_responses = get_chat_analysis(prompts, cache_key=cache_key) # gets chat gpt responses, cached per bucketed inputs
     except Exception as e:
         logging.error(f"Error in portfolio_analysis: {e}")
         return None
+    return {
+        'analysis': {
+            'chat_responses': chat_responses
+        },
+        'metrics': metrics
+    } # returns dic
+
+
+def iter_portfolio_commentary(portfolio, benchmark=DEFAULT_BENCHMARK, covariance=DEFAULT_COVARIANCE, key=None):
+    """
+    Yields (index, response) for each commentary prompt as its completion arrives. With the `key` an `/analysis`
+    response returned, the prompts built from exactly those metrics are reused while cached and the holdings are
+    unchanged; otherwise the metrics are computed again. Yields nothing if there is no data.
+    """
+    portfolio = {t.upper(): shares for t, shares in portfolio.items()}
+    cached = _commentary_prompts.get(key) if key else None
+    if cached is not None and cached[0] == portfolio:
+        prompts, cache_key = cached[1], key
+    else:
+        result = portfolio_metrics(portfolio, benchmark, covariance)
+        if result is None:
+            return
+        _, prompts, cache_key = result
+    yield from iter_chat_analysis(prompts, cache_key=cache_key)
 
 
 def get_or_create_portfolio(user_id): 
@@ -168,71 +237,178 @@ def get_or_create_portfolio(user_id):
     return portfolio
 
 
+def _utc_trade_date(trade_date):
+    """Naive UTC datetime for the ledger, now when no date is given"""
+    if not trade_date:
+        return datetime.utcnow()
+    if isinstance(trade_date, str):
+        trade_date = datetime.fromisoformat(trade_date)
+    if trade_date.tzinfo is None:  # If it's timezone-naive
+        trade_date = pytz.utc.localize(trade_date)
+    return trade_date.astimezone(pytz.utc).replace(tzinfo=None)
+
+
+def _shares_held_from(portfolio_id, ticker, trade_date):
+    """
+    Smallest position the ledger holds from trade_date onwards, the most a sell dated then can take without any
+    later sell going short. Undated lots count as held from the start.
+    """
+    lots = PortfolioTransaction.query.filter_by(portfolio_id=portfolio_id, ticker=ticker).all()
+    lots.sort(key=lambda lot: (lot.trade_date or datetime.min, lot.id))
+    held = 0
+    lowest = None
+    for lot in lots:
+        if lowest is None and lot.trade_date is not None and lot.trade_date > trade_date:
+            lowest = held # position on the trade date
+        held += lot.shares if lot.side == 'buy' else -lot.shares
+        if lowest is not None:
+            lowest = min(lowest, held)
+    return held if lowest is None else lowest
+
+
+def record_transaction(portfolio, ticker, side, shares, price, trade_date):
+    """
+    Adds a buy, sell or remove lot to the ledger and applies it to the PortfolioStock aggregate in the same session,
+    so positions and realized P&L are read without replaying lots. Sells are costed at the average price and add
+    their P&L to the aggregate's realized_profit_loss; a closed position keeps its row at 0 shares so that total
+    survives. Returns the transaction, or None for a sell larger than the position held on its trade date. The
+    caller commits.
+    """
+    holding = (
+        PortfolioStock.query.filter_by(portfolio_id=portfolio.id, ticker=ticker)
+        .with_for_update().first()
+    ) # row locked until commit, concurrent trades on a holding apply one after the other
+    if side == 'buy':
+        cost_basis = shares * price
+        realized = 0.0
+        if holding:
+            # Update the number of shares and recalculate the average price per share
+            total_shares = holding.number_of_shares + shares
+            holding.pps_at_purchase = (holding.number_of_shares * holding.pps_at_purchase + cost_basis) / total_shares
+            holding.number_of_shares = total_shares
+        else:
+            #Makes new stock obj
+            db.session.add(PortfolioStock(
+                ticker=ticker,
+                number_of_shares=shares,
+                pps_at_purchase=price,
+                realized_profit_loss=0.0,
+                portfolio=portfolio
+            ))
+    else:
+        if not holding or holding.number_of_shares < shares:
+            return None
+        if side == 'sell' and _shares_held_from(portfolio.id, ticker, trade_date) < shares:
+            return None # backdated before the buys it would need
+        cost_basis = shares * holding.pps_at_purchase
+        realized = shares * price - cost_basis if side == 'sell' else 0.0
+        holding.number_of_shares -= shares
+        holding.realized_profit_loss += realized
+
+    transaction = PortfolioTransaction(
+        portfolio=portfolio,
+        ticker=ticker,
+        side=side,
+        shares=shares,
+        price=price,
+        cost_basis=cost_basis,
+        realized_profit_loss=realized,
+        trade_date=trade_date
+    )
+    db.session.add(transaction)
+    return transaction
+
+
 def add_stock_to_portfolio(user_id, ticker, num_shares, purchase_date=None):
     try:
         portfolio = get_or_create_portfolio(user_id)
+        ticker = ticker.upper()
+        trade_date = _utc_trade_date(purchase_date)
 
-        # Ensure purchase_date is a timezone-aware datetime
-        if purchase_date:
-            if isinstance(purchase_date, str):
-                # Parse string into a datetime object
-                purchase_date = datetime.fromisoformat(purchase_date)
-            if purchase_date.tzinfo is None:  # If it's timezone-naive
-                # Convert to timezone-aware using UTC (or your desired timezone)
-                purchase_date = pytz.utc.localize(purchase_date)
-
-        price = get_stock_price_at_date(ticker, purchase_date)
+        price = get_stock_price_at_date(ticker, pytz.utc.localize(trade_date) if purchase_date else None)
         if price is None:
             logger.error(f"Could not fetch price for {ticker} at date {purchase_date}")
             return False
 
-        existing_stock = PortfolioStock.query.filter_by(portfolio_id=portfolio.id, ticker=ticker).first()
-        if existing_stock:
-            # Update the number of shares and recalculate the average price per share
-            total_shares = existing_stock.number_of_shares + num_shares
-            total_cost = (existing_stock.number_of_shares * existing_stock.pps_at_purchase) + (num_shares * price)
-            average_price = total_cost / total_shares
-            existing_stock.number_of_shares = total_shares
-            existing_stock.pps_at_purchase = average_price
-        else:
-            #Makes new stock obj 
-            new_stock = PortfolioStock(
-                ticker=ticker.upper(),
-                number_of_shares=num_shares,
-                pps_at_purchase=price,
-                portfolio=portfolio
-            )
-            db.session.add(new_stock)
-
-        db.session.commit() # commits changes
+        record_transaction(portfolio, ticker, 'buy', num_shares, float(price), trade_date)
+        db.session.commit() # lot and position committed together
         return True
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error adding stock to portfolio: {e}")
         return False
 
-# this function gets the portfolio from the db and deletes the  inputted ticker from it 
+
+def sell_stock_from_portfolio(user_id, ticker, num_shares, sale_date=None):
+    """Records a sell lot. True on success, None if the position is smaller than num_shares, False on errors."""
+    try:
+        portfolio = get_or_create_portfolio(user_id)
+        ticker = ticker.upper()
+        trade_date = _utc_trade_date(sale_date)
+
+        price = get_stock_price_at_date(ticker, pytz.utc.localize(trade_date) if sale_date else None)
+        if price is None:
+            logger.error(f"Could not fetch price for {ticker} at date {sale_date}")
+            return False
+
+        if record_transaction(portfolio, ticker, 'sell', num_shares, float(price), trade_date) is None:
+            db.session.rollback()
+            return None
+        db.session.commit() # lot and position committed together
+        return True
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error selling stock from portfolio: {e}")
+        return False
+
+# this function closes the inputted ticker's position at its average cost, its lots and realized P&L are kept
 def remove_stock_from_portfolio(user_id, ticker):
     try:
         portfolio = get_or_create_portfolio(user_id)
+        ticker = ticker.upper()
         stock = PortfolioStock.query.filter_by(portfolio_id=portfolio.id, ticker=ticker).first()
-        if stock:
-            db.session.delete(stock)
+        if stock and stock.number_of_shares > 0:
+            # a 'remove' lot takes the shares out at cost, no P&L is realized and /history drops the holding from today
+            record_transaction(
+                portfolio, ticker, 'remove', stock.number_of_shares, stock.pps_at_purchase, datetime.utcnow()
+            )
             db.session.commit()
             return True
         else:
             return False
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error removing stock from portfolio: {e}")
         return False
 
+
+def get_realized_profit_loss(user_id):
+    """{ticker: realized P&L} from the aggregate rows, closed positions included"""
+    portfolio = get_or_create_portfolio(user_id)
+    stocks = PortfolioStock.query.filter_by(portfolio_id=portfolio.id).all()
+    return {stock.ticker.upper(): stock.realized_profit_loss for stock in stocks}
+
+
+def get_portfolio_transactions(user_id, ticker=None):
+    """Lots of the user's portfolio, newest first, optionally for one ticker"""
+    portfolio = get_or_create_portfolio(user_id)
+    query = PortfolioTransaction.query.filter_by(portfolio_id=portfolio.id)
+    if ticker:
+        query = query.filter_by(ticker=ticker.upper())
+    return query.order_by(PortfolioTransaction.trade_date.desc(), PortfolioTransaction.id.desc()).all()
+
 # gets the saved portfolio given a user from the db and returns it 
 def get_portfolio(user_id):
     portfolio = get_or_create_portfolio(user_id)
-    stocks = PortfolioStock.query.filter_by(portfolio_id=portfolio.id).all()
+    stocks = (
+        PortfolioStock.query.filter_by(portfolio_id=portfolio.id)
+        .filter(PortfolioStock.number_of_shares > 0).all()
+    ) # closed positions only carry realized P&L
     portfolio_data = []
     for stock in stocks:
         stock_data = get_stock_data(stock.ticker)
         if stock_data:
+            stock_data['realized_profit_loss'] = stock.realized_profit_loss
             stock_data['number_of_shares'] = stock.number_of_shares
             stock_data['pps_at_purchase'] = stock.pps_at_purchase
             stock_data['total_invested'] = stock.number_of_shares * stock.pps_at_purchase
@@ -246,21 +422,163 @@ def get_portfolio(user_id):
     return portfolio_data
 
 
-def get_portfolio_recommendations(user_id, indicators={}):
+def get_portfolio_shares(user_id):
     portfolio = get_or_create_portfolio(user_id) # gets portfolio
-    stocks = PortfolioStock.query.filter_by(portfolio_id=portfolio.id).all() # gets stocks db object
+    shares = {}
+    for stock in PortfolioStock.query.filter_by(portfolio_id=portfolio.id).filter(PortfolioStock.number_of_shares > 0):
+        shares[stock.ticker.upper()] = shares.get(stock.ticker.upper(), 0) + stock.number_of_shares
+    return shares
+
+
+def get_portfolio_optimization(user_id, risk_free_rate=0.02, samples=DEFAULT_SAMPLES,
+                               frontier_points=DEFAULT_FRONTIER_POINTS, max_weight=1.0, covariance=DEFAULT_COVARIANCE):
+    """Efficient frontier and optimal weights for the user's holdings, compared with their current weights"""
+    shares = get_portfolio_shares(user_id)
+    if not shares:
+        return None
+    try:
+        prices = get_current_stock_prices(list(shares))
+        values = {ticker: count * prices[ticker] for ticker, count in shares.items() if ticker in prices}
+        total_value = sum(values.values())
+        current_weights = {ticker: value / total_value for ticker, value in values.items()} if total_value else None
+        return optimize_portfolio(
+            list(shares), current_weights, risk_free_rate=risk_free_rate, samples=samples,
+            frontier_points=frontier_points, max_weight=max_weight, covariance=covariance
+        )
+    except Exception as e:
+        logger.error(f"Error optimizing portfolio: {e}")
+        return None
+
+
+def get_portfolio_risk(user_id, paths=DEFAULT_PATHS, horizon_days=DEFAULT_HORIZON_DAYS, covariance=DEFAULT_COVARIANCE):
+    """Monte Carlo VaR / CVaR and terminal value percentiles for the user's holdings at current prices"""
+    shares = get_portfolio_shares(user_id)
+    if not shares:
+        return None
+    try:
+        prices = get_current_stock_prices(list(shares))
+        values = {ticker: count * prices[ticker] for ticker, count in shares.items() if ticker in prices}
+        total_value = sum(values.values())
+        if total_value == 0:
+            return None
+        return monte_carlo_risk(
+            list(values), values, total_value, paths=paths, horizon_days=horizon_days, covariance=covariance
+        )
+    except Exception as e:
+        logger.error(f"Error simulating portfolio risk: {e}")
+        return None
+
+
+def get_portfolio_rolling_metrics(user_id, windows=DEFAULT_WINDOWS, risk_free_rate=0.02, benchmark=DEFAULT_BENCHMARK):
+    """Rolling beta, alpha, Sharpe, Sortino and max drawdown of the user's current weights against a benchmark"""
+    shares = get_portfolio_shares(user_id)
+    if not shares:
+        return None
+    try:
+        state = get_returns_state(list(shares))
+        if state is None:
+            return None
+        bench_daily = get_benchmark_returns(benchmark)
+        prices = get_current_stock_prices(state['tickers'])
+        last_closes = state['prices'].iloc[-1]
+        values = np.array([shares[t] * prices.get(t, float(last_closes[t])) for t in state['tickers']])
+        if values.sum() == 0:
+            return None
+        port_daily = state['returns'] @ (values / values.sum()) # daily returns of the current weights
+        common_index = port_daily.index.intersection(bench_daily.index)
+        return {
+            'benchmark': benchmark.upper(),
+            'windows': rolling_metrics(
+                port_daily.reindex(common_index), bench_daily.reindex(common_index), windows, risk_free_rate
+            ),
+        }
+    except LookupError:
+        raise
+    except Exception as e:
+        logger.error(f"Error computing rolling metrics: {e}")
+        return None
+
+
+def get_portfolio_history(user_id, range_name=DEFAULT_HISTORY_RANGE):
+    """Daily value, cost basis and P&L of the user's holdings over the range"""
+    portfolio = get_or_create_portfolio(user_id) # gets portfolio
+    transactions = PortfolioTransaction.query.filter_by(portfolio_id=portfolio.id).all()
+    # each lot is a share and cost delta on its trade date, undated lots count as held over the whole range
+    events = [
+        (
+            t.ticker.upper(), t.trade_date,
+            t.shares if t.side == 'buy' else -t.shares,
+            t.cost_basis if t.side == 'buy' else -t.cost_basis
+        )
+        for t in transactions
+    ]
+    try:
+        return get_history(events, range_name)
+    except Exception as e:
+        logger.error(f"Error building portfolio history: {e}")
+        return None
+
+
+def get_portfolio_tickers(user_id):
+    portfolio = get_or_create_portfolio(user_id) # gets portfolio
+    stocks = (
+        PortfolioStock.query.filter_by(portfolio_id=portfolio.id)
+        .filter(PortfolioStock.number_of_shares > 0).all()
+    ) # gets stocks db object, open positions only
+    return list(dict.fromkeys(stock.ticker for stock in stocks)) # unique tickers in holding order
+
+
+def iter_recommendations(tickers, indicators={}, tier=DEFAULT_TRAINING_TIER):
+    """
+    Batch prediction pipeline. Downloads every ticker's history in one call, computes the indicators
+    on the whole panel, then trains all (ticker, horizon) models on a bounded worker pool.
+    Yields (ticker, predictions) as soon as each ticker's three horizons are done, predictions is None
+    when the ticker had no data or no model could be trained.
+    """
+    if not tickers:
+        return
+    panel = retrieve_panel(tickers) # one download for all holdings
+    if panel is None:
+        for ticker in tickers:
+            yield ticker, None
+        return
+    frames = split_panel(add_indicators_panel(panel, **indicators))
+    for ticker in tickers:
+        if ticker not in frames:
+            logger.error(f"No data available for {ticker}")
+            yield ticker, None
+
+    results = {ticker: {} for ticker in frames}
+    remaining = {ticker: len(HORIZONS) for ticker in frames}
+    executor = ThreadPoolExecutor(max_workers=RECOMMENDATION_WORKERS)
+    try:
+        # submitted ticker by ticker so the first holdings finish first
+        futures = {}
+        for ticker, frame in frames.items():
+            config = get_model_config(ticker, indicators)
+            arrays = get_training_arrays(ticker, indicators, frame) # shared by the ticker's three horizons
+            for dwm in HORIZONS:
+                futures[executor.submit(train_for_horizon, frame, dwm, tier, config, arrays)] = ticker
+        for future in as_completed(futures):
+            ticker = futures[future]
+            dwm, classification_result, regression_result = future.result()
+            if classification_result and regression_result:
+                results[ticker][HORIZONS[dwm]] = {
+                    'classification': classification_result,
+                    'regression': regression_result
+                }
+            remaining[ticker] -= 1
+            if remaining[ticker] == 0:
+                yield ticker, results.pop(ticker) or None
+    finally:
+        # drops queued trainings if the consumer goes away early (e.g. a closed stream)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_portfolio_recommendations(user_id, indicators={}, tier=DEFAULT_TRAINING_TIER):
+    tickers = get_portfolio_tickers(user_id)
     recommendations = {}
-    for stock in stocks:
-        predictions = get_predictions(
-            stock.ticker,
-            MACD=indicators.get('MACD', False),
-            RSI=indicators.get('RSI', False),
-            SMA=indicators.get('SMA', False),
-            EMA=indicators.get('EMA', False),
-            ATR=indicators.get('ATR', False),
-            BBands=indicators.get('BBands', False),
-            VWAP=indicators.get('VWAP', False)
-        ) # gets prediction
+    for ticker, predictions in iter_recommendations(tickers, indicators, tier):
         if predictions:
-            recommendations[stock.ticker] = predictions #puts prediction in list
-    return recommendations 
\ No newline at end of file
+            recommendations[ticker] = predictions #puts prediction in list
+    return recommendations
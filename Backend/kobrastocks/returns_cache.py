@@ -0,0 +1,181 @@
+"""
+------------------Prologue--------------------
+File Name: returns_cache.py
+Path: Backend/kobrastocks/returns_cache.py
+
+Description:
+Cached daily-returns matrix and running moments per set of tickers, used by the portfolio risk metrics. The first
+request for a ticker set downloads the five year window once; later requests only download the bars that closed
+since, append their return rows and update the mean and covariance with Welford's running sums, dropping rows that
+fell out of the window the same way. Annualized portfolio risk then costs O(k^2) per request instead of
+re-downloading and recomputing the covariance over every row. Key functions include:
+- `welford_add` / `welford_remove`: Add or remove one return row from the running mean and co-moment matrix.
+- `get_returns_state`: Up to date returns, prices and moments for a ticker set.
+- `state_covariance` / `state_mean`: Sample covariance and mean of the cached window.
+
+Input:
+Ticker symbols.
+
+Output:
+State dict with the aligned prices and returns frames, the column order and the running moments.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from .cache import TTLCache, seconds_until_next_bar, completed_sessions_end
+
+logger = logging.getLogger(__name__)
+
+RETURNS_WINDOW_YEARS = 5
+RETURNS_CACHE_SIZE = int(os.environ.get('RETURNS_CACHE_SIZE', 256))  # ticker sets kept in memory
+
+_states = TTLCache(maxsize=RETURNS_CACHE_SIZE, ttl=365 * 24 * 3600)  # evicted by LRU, freshness checked per state
+_locks = TTLCache(maxsize=RETURNS_CACHE_SIZE * 4, ttl=365 * 24 * 3600)
+_locks_lock = threading.Lock()
+
+
+def download_prices(tickers, start, end=None):
+    """
+    Wide frame of adjusted daily closes, one column per ticker, rows where every ticker traded. `end` (exclusive)
+    defaults to the last completed session, so a partial bar of a session still trading never enters the moments.
+    """
+    end = end or completed_sessions_end()
+    if str(start) >= end:
+        return pd.DataFrame(columns=list(tickers))
+    data = yf.download(
+        list(tickers), start=start, end=end,
+        auto_adjust=True, group_by='column', threads=True, progress=False
+    ) # one request for every ticker
+    if data.empty:
+        return pd.DataFrame(columns=list(tickers))
+    prices = data['Close']
+    if isinstance(prices, pd.Series):
+        prices = prices.to_frame(tickers[0])
+    return prices.reindex(columns=list(tickers)).dropna()
+
+
+def window_start(now=None):
+    now = now or datetime.now()
+    return (now - timedelta(days=365 * RETURNS_WINDOW_YEARS)).date()
+
+
+def welford_add(state, row):
+    """Adds one return row: n += 1, running mean and co-moment matrix M2 updated in O(k^2)"""
+    state['n'] += 1
+    delta = row - state['mean']
+    state['mean'] += delta / state['n']
+    state['m2'] += np.outer(delta, row - state['mean'])
+
+
+def welford_remove(state, row):
+    """Exact inverse of `welford_add` for a row that leaves the window"""
+    if state['n'] <= 1:
+        state['n'], state['mean'][:], state['m2'][:] = 0, 0.0, 0.0
+        return
+    old_mean = state['mean'].copy()
+    state['n'] -= 1
+    state['mean'] -= (row - old_mean) / state['n']
+    state['m2'] -= np.outer(row - old_mean, row - state['mean'])
+
+
+def state_mean(state):
+    """Mean daily return per ticker as a Series in the state's column order"""
+    return pd.Series(state['mean'], index=state['tickers'])
+
+
+def state_covariance(state):
+    """Sample covariance (ddof=1, like DataFrame.cov) of the daily returns in the window"""
+    return pd.DataFrame(state['m2'] / max(state['n'] - 1, 1), index=state['tickers'], columns=state['tickers'])
+
+
+def _build_state(tickers):
+    """Full download of the window and the moments computed in one pass"""
+    prices = download_prices(tickers, start=window_start())
+    if len(prices) < 2:
+        return None
+    returns = prices.pct_change().dropna()
+    values = returns.values
+    mean = values.mean(axis=0)
+    centered = values - mean
+    return {
+        'tickers': list(tickers),
+        'prices': prices,
+        'returns': returns,
+        'n': len(values),
+        'mean': mean,
+        'm2': centered.T @ centered,
+        'fresh_until': datetime.now() + timedelta(seconds=seconds_until_next_bar()),
+    }
+
+
+def _refresh_state(state):
+    """
+    Downloads only the bars after the last cached one, appends their returns with `welford_add` and drops the
+    rows older than the window with `welford_remove`. Works on a copy so readers of the old state are unaffected.
+    """
+    state = dict(state, mean=state['mean'].copy(), m2=state['m2'].copy())
+    last_date = state['prices'].index[-1]
+    new_prices = download_prices(state['tickers'], start=(last_date + timedelta(days=1)).strftime('%Y-%m-%d'))
+    if not new_prices.empty:
+        new_prices = new_prices[new_prices.index > last_date]
+    if not new_prices.empty:
+        # first new return is measured against the last cached close
+        joined = pd.concat([state['prices'].iloc[[-1]], new_prices])
+        new_returns = joined.pct_change().iloc[1:]
+        for row in new_returns.values:
+            welford_add(state, row)
+        state['prices'] = pd.concat([state['prices'], new_prices])
+        state['returns'] = pd.concat([state['returns'], new_returns])
+
+    cutoff = pd.Timestamp(window_start())
+    if state['returns'].index.tz is not None:
+        cutoff = cutoff.tz_localize(state['returns'].index.tz)
+    expired = state['returns'][state['returns'].index < cutoff]
+    for row in expired.values:
+        welford_remove(state, row)
+    if not expired.empty:
+        state['returns'] = state['returns'].iloc[len(expired):]
+        state['prices'] = state['prices'].iloc[-(len(state['returns']) + 1):]
+    state['fresh_until'] = datetime.now() + timedelta(seconds=seconds_until_next_bar())
+    return state
+
+
+def _lock_for(key):
+    with _locks_lock:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _locks.set(key, lock)
+        return lock
+
+
+def get_returns_state(tickers):
+    """
+    Returns the cached state for a ticker set (order does not matter, `state['tickers']` gives the column
+    order), building it on first use and updating it incrementally once a new daily bar is available.
+    None if no common history could be downloaded.
+    """
+    key = tuple(sorted(t.upper() for t in tickers))
+    with _lock_for(key):
+        state = _states.get(key)
+        try:
+            if state is None:
+                state = _build_state(list(key))
+            elif datetime.now() >= state['fresh_until']:
+                state = _refresh_state(state)
+        except Exception as e:
+            logger.error(f"Error updating returns for {key}: {e}") # keeps serving the last good state
+            if state is None:
+                return None
+        if state is not None:
+            _states.set(key, state)
+        return state
@@ -0,0 +1,114 @@
+"""
+------------------Prologue--------------------
+File Name: rolling_metrics.py
+Path: Backend/kobrastocks/rolling_metrics.py
+
+Description:
+Rolling versions of the portfolio analysis metrics (beta, alpha, Sharpe, Sortino, max drawdown) for charting how
+they moved over time. Means, variances and the regression slope of every window come from differences of prefix
+sums, so a series costs O(n) however long the window is, instead of one `np.polyfit` or std call per window. Key
+functions include:
+- `window_sums`: Sum of every length-w window from one cumulative sum.
+- `rolling_beta_alpha`: OLS slope and intercept of the portfolio on the benchmark per window.
+- `rolling_sharpe` / `rolling_sortino`: Annualized ratios per window, same definitions as `portfolio_analysis`.
+- `rolling_max_drawdown`: Worst peak-to-trough loss inside every window.
+- `rolling_metrics`: All of the above for a portfolio and benchmark return series.
+
+Input:
+Daily portfolio and benchmark returns, window lengths.
+
+Output:
+Dict of window length to metric arrays aligned with the window end dates.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+TRADING_DAYS = 252
+DEFAULT_WINDOWS = (63, 252)
+DRAWDOWN_BLOCK = 4096  # windows processed together in rolling_max_drawdown, bounds memory to block x window
+
+
+def window_sums(values, window):
+    """Sums of values[i - window + 1 : i + 1] for every i >= window - 1, length n - window + 1"""
+    prefix = np.concatenate(([0.0], np.cumsum(values, dtype=float)))
+    return prefix[window:] - prefix[:-window]
+
+
+def rolling_beta_alpha(port, bench, window):
+    """Per-window OLS fit port = alpha + beta * bench, matching np.polyfit(bench, port, 1) on each window"""
+    # centering on the full-sample means keeps the prefix sums small and the differences accurate
+    x = bench - bench.mean()
+    y = port - port.mean()
+    sum_x, sum_y = window_sums(x, window), window_sums(y, window)
+    sxx = window_sums(x * x, window) - sum_x * sum_x / window
+    sxy = window_sums(x * y, window) - sum_x * sum_y / window
+    beta = np.divide(sxy, sxx, out=np.full_like(sxy, np.nan), where=sxx > 0)
+    alpha = (sum_y + window * port.mean() - beta * (sum_x + window * bench.mean())) / window
+    return beta, alpha
+
+
+def rolling_sharpe(port, window, risk_free_rate=0.02):
+    """Annualized (return - risk free) / volatility per window, sample std like the analysis"""
+    centered = port - port.mean()
+    sums = window_sums(centered, window)
+    variance = (window_sums(centered * centered, window) - sums * sums / window) / (window - 1)
+    annual_return = (sums / window + port.mean()) * TRADING_DAYS
+    risk = np.sqrt(np.maximum(variance, 0) * TRADING_DAYS)
+    return np.divide(annual_return - risk_free_rate, risk, out=np.zeros_like(risk), where=risk > 0)
+
+
+def rolling_sortino(port, window, risk_free_rate=0.02):
+    """
+    Annualized (return - risk free) / downside deviation per window, the deviation being the RMS of the negative
+    excess returns in the window as in `portfolio_analysis`
+    """
+    excess = port - risk_free_rate / TRADING_DAYS
+    downside = np.minimum(excess, 0)
+    down_count = window_sums(downside < 0, window)
+    down_squares = window_sums(downside * downside, window)
+    deviation = np.sqrt(np.divide(down_squares, down_count, out=np.zeros_like(down_squares), where=down_count > 0))
+    deviation = np.where(down_count > 0, deviation * np.sqrt(TRADING_DAYS), 1e-6)
+    annual_return = window_sums(port, window) / window * TRADING_DAYS
+    return (annual_return - risk_free_rate) / deviation
+
+
+def rolling_max_drawdown(port, window):
+    """
+    Max drawdown (a negative fraction) of the compounded returns inside every window. Each window's running peak
+    is a cumulative max along a strided view of the wealth curve, computed a block of windows at a time.
+    """
+    wealth = np.concatenate(([1.0], np.cumprod(1 + port)))
+    # a window of `window` returns spans window + 1 wealth points, the first one being the starting value
+    views = sliding_window_view(wealth, window + 1)
+    result = np.empty(len(views))
+    for start in range(0, len(views), DRAWDOWN_BLOCK):
+        block = views[start:start + DRAWDOWN_BLOCK]
+        peaks = np.maximum.accumulate(block, axis=1)
+        result[start:start + DRAWDOWN_BLOCK] = (block / peaks - 1).min(axis=1)
+    return result
+
+
+def rolling_metrics(port, bench, windows=DEFAULT_WINDOWS, risk_free_rate=0.02):
+    """
+    Rolling metrics for aligned daily portfolio and benchmark return Series. Each window's arrays start at its
+    first full window, `dates` gives the window end dates. Windows longer than the history are skipped.
+    """
+    port_values = port.values.astype(float)
+    bench_values = bench.values.astype(float)
+    result = {}
+    for window in windows:
+        if window < 2 or window > len(port_values):
+            continue
+        beta, alpha = rolling_beta_alpha(port_values, bench_values, window)
+        result[str(window)] = {
+            'dates': port.index[window - 1:].strftime('%Y-%m-%d').tolist(),
+            'beta': beta,
+            'alpha': alpha,
+            'sharpe_ratio': rolling_sharpe(port_values, window, risk_free_rate),
+            'sortino_ratio': rolling_sortino(port_values, window, risk_free_rate),
+            'max_drawdown': rolling_max_drawdown(port_values, window),
+        }
+    return result
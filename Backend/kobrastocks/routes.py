@@ -4,7 +4,7 @@ File Name: routes.py
 Path: Backend/kobrastocks/routes.py
 
 Description:
-Defines primary application routes for stock data retrieval, contact form submission, stock predictions, chart generation, and hot stock filtering based on user budget. Integrates with external APIs and handles data serialization, validation, and error logging.
+Defines primary application routes for stock data retrieval, contact form submission, stock predictions, chart generation, sparklines, benchmarks, correlation structure, and hot stock filtering based on user budget. Integrates with external APIs and handles data serialization, validation, and error logging.
 
 Input:
 Query parameters (ticker, technical indicators), JSON data for contact forms, and JWT tokens for authenticated routes
@@ -17,7 +17,7 @@ Collaborators: Spencer Sliffe, Saje Cowell, Charlie Gillund
 """
 
 import requests
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from .models import User
 
@@ -27,9 +27,28 @@ from .services import (
     get_stock_data,
     send_contact_form,
     get_predictions,
-    get_stock_chart, get_crypto_data, get_stock_results_data,
+    get_stock_chart, get_stock_chart_columnar, parse_overlay_spec, get_crypto_data, get_stock_results_data,
+    TRAINING_TIERS, DEFAULT_TRAINING_TIER,
+)
+from .global_model import predict_global
+from .bar_store import get_bar_page
+from .benchmark_registry import list_benchmarks
+from .correlation import (
+    iter_correlation,
+    DEFAULT_CORRELATION_DAYS,
+    MAX_CORRELATION_DAYS,
+    MAX_CORRELATION_TICKERS,
+    MAX_CLUSTER_TICKERS,
+    DEFAULT_CLUSTERS,
+)
+from .json_provider import dumps_bytes
+from .sparklines import (
+    get_sparklines,
+    DEFAULT_SPARKLINE_DAYS,
+    DEFAULT_SPARKLINE_POINTS,
+    MAX_SPARKLINE_DAYS,
+    MAX_SPARKLINE_TICKERS,
 )
-from .utils import convert_to_builtin_types
 
 main = Blueprint('main', __name__)
 
@@ -66,6 +85,16 @@ def predictions():
     ATR = request.args.get('ATR', default='false') == 'true'
     BBands = request.args.get('BBands', default='false') == 'true'
     VWAP = request.args.get('VWAP', default='false') == 'true'
+    tier = request.args.get('tier', default=DEFAULT_TRAINING_TIER, type=str)
+    if tier not in TRAINING_TIERS:
+        return jsonify({'error': f"Unknown training tier '{tier}'. Use one of {list(TRAINING_TIERS)}"}), 400
+
+    # model=global answers from the pooled offline models with a single inference call, no training
+    if request.args.get('model', default='local') == 'global':
+        predictions_result = predict_global(ticker)
+        if predictions_result is None:
+            return jsonify({'error': 'Global model unavailable or no data for this ticker'}), 503
+        return jsonify(predictions_result)
 
     predictions_result = get_predictions(
         ticker,
@@ -75,7 +104,8 @@ def predictions():
         EMA=EMA,
         ATR=ATR,
         BBands=BBands,
-        VWAP=VWAP
+        VWAP=VWAP,
+        tier=tier
     )
 
     if predictions_result is None:
@@ -87,15 +117,121 @@ def predictions():
 @main.route('/api/stock_chart', methods=['GET'])
 def stock_chart():
     ticker = request.args.get('ticker', default='AAPL', type=str)
+    interval = request.args.get('interval', default='1d', type=str)
+    # Indicator overlays, e.g. overlays=SMA:50,200;BBands;MACD
+    try:
+        overlays = parse_overlay_spec(request.args.get('overlays', default='', type=str))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Range or cursor parameters return one columnar page of bars from the bar store
+    page_args = ('from', 'to', 'before', 'after', 'limit')
+    if any(arg in request.args for arg in page_args):
+        try:
+            page = get_bar_page(
+                ticker,
+                interval=interval,
+                start=request.args.get('from'),
+                end=request.args.get('to'),
+                before=request.args.get('before'),
+                after=request.args.get('after'),
+                limit=request.args.get('limit', default=None, type=int),
+                zoom=request.args.get('zoom', default=60, type=int),
+                pack=request.args.get('pack', default='false') == 'true',
+                overlays=overlays
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if page is None:
+            return jsonify({'error': f"Could not generate chart for ticker {ticker}"}), 404
+        return jsonify(page)
+
+    # format=columnar sends typed column arrays and lets the client build the figure
+    if request.args.get('format', default='plotly') == 'columnar':
+        # points=N downsamples to N candles (style=candles) or N LTTB samples of the close (style=line)
+        style = request.args.get('style', default='candles', type=str)
+        if style not in ('candles', 'line'):
+            return jsonify({'error': "style must be 'candles' or 'line'"}), 400
+        payload = get_stock_chart_columnar(
+            ticker,
+            interval=interval,
+            zoom=request.args.get('zoom', default=60, type=int),
+            pack=request.args.get('pack', default='false') == 'true',
+            points=request.args.get('points', default=None, type=int),
+            style=style,
+            overlays=overlays
+        )
+        if payload is None:
+            return jsonify({'error': f"Could not generate chart for ticker {ticker}"}), 404
+        return jsonify(payload)
 
-    fig = get_stock_chart(ticker)
+    fig = get_stock_chart(ticker, interval=interval, overlays=overlays)
 
     if fig is None:
         return jsonify({'error': f"Could not generate chart for ticker {ticker}"}), 404
 
-    fig_dict = fig.to_dict()
-    fig_dict = convert_to_builtin_types(fig_dict)
-    return jsonify(fig_dict)
+    return jsonify(fig.to_dict())
+
+
+@main.route('/api/sparklines', methods=['GET'])
+def sparklines():
+    # tickers=AAPL,MSFT,... -> last `days` closes per ticker, downsampled to `points` points
+    tickers = [t for t in request.args.get('tickers', default='', type=str).split(',') if t.strip()]
+    days = request.args.get('days', default=DEFAULT_SPARKLINE_DAYS, type=int)
+    points = request.args.get('points', default=DEFAULT_SPARKLINE_POINTS, type=int)
+    if not tickers:
+        return jsonify({'error': 'No tickers given'}), 400
+    if len(tickers) > MAX_SPARKLINE_TICKERS:
+        return jsonify({'error': f"At most {MAX_SPARKLINE_TICKERS} tickers per request"}), 400
+    if not 2 <= days <= MAX_SPARKLINE_DAYS or not 3 <= points <= days:
+        return jsonify({'error': f"days must be 2-{MAX_SPARKLINE_DAYS} and points 3-days"}), 400
+
+    lines = get_sparklines(tickers, days=days, points=points)
+    return jsonify({
+        'days': days,
+        'points': points,
+        'sparklines': lines,
+        'missing': [t.strip().upper() for t in tickers if t.strip().upper() not in lines],
+    })
+
+
+@main.route('/api/correlation', methods=['GET', 'POST'])
+def correlation():
+    # GET ?tickers=AAPL,MSFT,... or POST {"tickers": [...]} for universes too long for a query string
+    options = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    tickers = options.get('tickers') or []
+    if isinstance(tickers, str):
+        tickers = tickers.split(',')
+    tickers = list(dict.fromkeys(str(t).strip().upper() for t in tickers if str(t).strip()))
+    try:
+        days = int(options.get('days', DEFAULT_CORRELATION_DAYS))
+        n_clusters = int(options.get('clusters', DEFAULT_CLUSTERS))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'days and clusters must be integers'}), 400
+    cluster = str(options.get('cluster', 'false')).lower() == 'true'
+    include_matrix = str(options.get('matrix', 'true')).lower() == 'true'
+
+    if len(tickers) < 2:
+        return jsonify({'error': 'Give at least two tickers'}), 400
+    if len(tickers) > MAX_CORRELATION_TICKERS:
+        return jsonify({'error': f"At most {MAX_CORRELATION_TICKERS} tickers per request"}), 400
+    if cluster and len(tickers) > MAX_CLUSTER_TICKERS:
+        return jsonify({'error': f"Clustering supports at most {MAX_CLUSTER_TICKERS} tickers"}), 400
+    if not 20 <= days <= MAX_CORRELATION_DAYS or not 1 <= n_clusters <= 200:
+        return jsonify({'error': f"days must be 20-{MAX_CORRELATION_DAYS} and clusters 1-200"}), 400
+
+    def generate():
+        # header line (ticker order, clusters) first, then one line per block of correlation rows
+        for part in iter_correlation(tickers, days, cluster, n_clusters, include_matrix):
+            yield dumps_bytes(part) + b'\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@main.route('/api/benchmarks', methods=['GET'])
+def benchmarks():
+    # tickers accepted by the portfolio endpoints' benchmark parameter
+    return jsonify({'benchmarks': list_benchmarks()})
 
 
 @main.route('/api/hot_stocks', methods=['GET'])
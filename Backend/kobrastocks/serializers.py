@@ -60,6 +60,7 @@ class PortfolioStockSchema(Schema):
     current_value = fields.Float()
     profit_loss = fields.Float()
     profit_loss_percentage = fields.Float()
+    realized_profit_loss = fields.Float()
     open_price = fields.Float()
     close_price = fields.Float()
     high_price = fields.Float()
@@ -80,6 +81,21 @@ class PortfolioSchema(Schema):
 portfolio_schema = PortfolioSchema()
 
 
+class PortfolioTransactionSchema(Schema):
+    id = fields.Int()
+    ticker = fields.Str(required=True)
+    side = fields.Str(required=True)
+    shares = fields.Int(required=True)
+    price = fields.Float(required=True)
+    cost_basis = fields.Float()
+    realized_profit_loss = fields.Float()
+    trade_date = fields.DateTime(allow_none=True)
+    created_at = fields.DateTime()
+
+
+portfolio_transaction_list_schema = PortfolioTransactionSchema(many=True)
+
+
 class PortfolioRecommendationsSchema(Schema):
     recommendations = fields.Dict(keys=fields.Str(), values=fields.Raw())
 
@@ -6,9 +6,14 @@ Path: Backend/kobrastocks/services.py
 Description:
 Implements core services for data retrieval, technical indicator computation, model training, chart creation, and email handling. Key functions include:
 - `retrieve_data`: Fetches and prepares historical stock data.
+- `retrieve_panel`, `add_indicators_panel` and `split_panel`: Batch versions that fetch and prepare many tickers at once.
 - `add_indicators`: Adds technical indicators (e.g., MACD, RSI) to stock data.
 - `make_chart`: Generates candlestick and volume charts for a given stock.
+- `parse_overlay_spec` and `add_overlays`: Indicator overlays (e.g. 'SMA:50,200;BBands;MACD') computed on the chart's own bars.
+- `chart_payload`: Compact columnar form of the chart bars (epoch dates, OHLCV columns) for the client to plot itself,
+  optionally downsampled to a target point count.
 - `train_models` and `train_regression_models`: Trains classification and regression models for stock price forecasting.
+- `TRAINING_TIERS`: Named training budgets (`fast`, `standard`, `thorough`) bounding LSTM epochs, patience and wall-clock time.
 - `get_stock_data` and `get_predictions`: Fetches processed stock data and predictions for specified indicators.
 - `send_contact_form` and `send_email`: Handles contact form submissions and email notifications.
 
@@ -21,6 +26,9 @@ Serialized stock data, predictions, charts, and contact form confirmation.
 Collaborators: Spencer Sliffe, Saje Cowell, Charlie Gillund
 ---------------------------------------------
 """
+import base64
+import logging
+import os
 import pytz
 import requests
 import yfinance as yf
@@ -29,7 +37,6 @@ import pandas as pd
 import numpy as np
 from flask import current_app
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import GridSearchCV, TimeSeriesSplit
 from sklearn.metrics import classification_report
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestRegressor
@@ -39,16 +46,75 @@ from sklearn.utils import class_weight
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from sklearn.preprocessing import MinMaxScaler
+from numpy.lib.stride_tricks import sliding_window_view
+from time import monotonic
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense,Dropout
+from tensorflow.keras.callbacks import Callback, EarlyStopping
 
 from .utils import *
+from .downsampling import ohlc_buckets, lttb_indices
+from .model_configs import get_model_config
+from .feature_store import build_training_arrays, get_training_arrays, unscale_target
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Training budgets for the LSTM regressors. `max_epochs` is only an upper bound, early stopping on the
+# validation loss and the per-model wall-clock cap (seconds) normally end training well before it.
+TRAINING_TIERS = {
+    'fast': {'max_epochs': 10, 'patience': 2, 'time_limit': 5, 'batch_size': 64},
+    'standard': {'max_epochs': 25, 'patience': 3, 'time_limit': 15, 'batch_size': 32},
+    'thorough': {'max_epochs': 100, 'patience': 8, 'time_limit': 60, 'batch_size': 32},
+}
+DEFAULT_TRAINING_TIER = os.environ.get('TRAINING_TIER', 'standard')
+if DEFAULT_TRAINING_TIER not in TRAINING_TIERS:
+    logger.warning(
+        f"Unknown TRAINING_TIER '{DEFAULT_TRAINING_TIER}', using 'standard'. Use one of {list(TRAINING_TIERS)}"
+    )
+    DEFAULT_TRAINING_TIER = 'standard'
+
+# Model settings used when `flask tune-models` has not stored a config for the ticker or its sector
+CLASSIFIERS = {'lda': LinearDiscriminantAnalysis, 'random_forest': RandomForestClassifier}
+DEFAULT_CLASSIFIER = {'name': 'lda', 'params': {}}
+DEFAULT_REGRESSION = {1: {'sequence_len': 5, 'units': 64}, 2: {'sequence_len': 7, 'units': 64}, 3: {'sequence_len': 10, 'units': 64}}
+
+
+class TimeBudget(Callback):
+    """
+    Stops training once the model has used up its wall-clock budget and then restores the weights of the epoch
+    with the lowest validation loss. EarlyStopping only restores them when patience runs out, so without this a
+    model cut off by the budget would keep its last, possibly worse, weights.
+    """
+
+    def __init__(self, seconds, monitor='val_loss'):
+        super().__init__()
+        self.seconds = seconds
+        self.monitor = monitor
+        self.started = None
+        self.best = None
+        self.best_weights = None
+        self.stopped = False
+
+    def on_train_begin(self, logs=None):
+        self.started = monotonic()
+        self.best, self.best_weights, self.stopped = None, None, False
+
+    def on_train_batch_end(self, batch, logs=None):
+        if monotonic() - self.started > self.seconds:
+            self.model.stop_training = True  # checked by keras after every batch
+            self.stopped = True
+
+    def on_epoch_end(self, epoch, logs=None):
+        current = (logs or {}).get(self.monitor)
+        if current is not None and (self.best is None or current < self.best):
+            self.best, self.best_weights = current, self.model.get_weights()
+
+    def on_train_end(self, logs=None):
+        if self.stopped and self.best_weights is not None:
+            self.model.set_weights(self.best_weights)
+
 
 def retrieve_data(ticker):
     try:
@@ -63,51 +129,65 @@ def retrieve_data(ticker):
             raise ValueError(f"No data found for ticker {ticker}")
         dataframe.drop(['Dividends', 'Stock Splits'], axis=1, inplace=True, errors='ignore')
 
-        # Classification targets shifts data to see if price increases for training purposes 
-        dataframe['Tomorrow'] = (dataframe['Close'].shift(-1) > dataframe['Close']).astype(int) 
-        dataframe['Week'] = (dataframe['Close'].shift(-5) > dataframe['Close']).astype(int)
-        dataframe['Month'] = (dataframe['Close'].shift(-21) > dataframe['Close']).astype(int)
+        return add_targets(dataframe) # returns dataframe
+    except Exception as e:
+        print(f"Error retrieving data for ticker {ticker}: {e}") # returns error message
+        return None
+
+
+def add_targets(dataframe):
+    """Adds the classification and regression targets the models are trained against"""
+    # Classification targets shifts data to see if price increases for training purposes 
+    dataframe['Tomorrow'] = (dataframe['Close'].shift(-1) > dataframe['Close']).astype(int) 
+    dataframe['Week'] = (dataframe['Close'].shift(-5) > dataframe['Close']).astype(int)
+    dataframe['Month'] = (dataframe['Close'].shift(-21) > dataframe['Close']).astype(int)
+
+    # Regression targets Shift the data to get training data for models 
+    dataframe['Close_Tomorrow'] = dataframe['Close'].shift(-1)
+    dataframe['Close_NextWeek'] = dataframe['Close'].shift(-5) 
+    dataframe['Close_NextMonth'] = dataframe['Close'].shift(-21)  # Approximate number of trading days in a month
+    return dataframe
 
-        # Regression targets Shift the data to get training data for models 
-        dataframe['Close_Tomorrow'] = dataframe['Close'].shift(-1)
-        dataframe['Close_NextWeek'] = dataframe['Close'].shift(-5) 
-        dataframe['Close_NextMonth'] = dataframe['Close'].shift(-21)  # Approximate number of trading days in a month
 
-        
-        
-        return dataframe # returns dataframe
+def retrieve_panel(tickers):
+    """Fetches the same window as `retrieve_data` for many tickers with a single download.
+        Returns a panel: a dict of wide frames (one column per ticker) keyed by price field"""
+    try:
+        time = datetime.now()
+        startStr = f"{time.year - 5}-01-01"
+        yesterday = (time - timedelta(days=1)).strftime('%Y-%m-%d')
+        data = yf.download(
+            list(tickers), start=startStr, end=yesterday,
+            auto_adjust=True, group_by='column', threads=True, progress=False
+        ) # one request for every ticker
+        if data.empty:
+            raise ValueError(f"No data found for tickers {tickers}")
+        return {field: data[field] for field in ['Open', 'High', 'Low', 'Close', 'Volume']}
     except Exception as e:
-        print(f"Error retrieving data for ticker {ticker}: {e}") # returns error message
+        logger.error(f"Error retrieving panel data for {tickers}: {e}")
         return None
 
 
+# Indicator name -> function adding its columns, in the order the request flags are listed
+INDICATOR_FUNCTIONS = {
+    'MACD': add_macd,
+    'RSI': add_rsi,
+    'SMA': add_sma,
+    'EMA': add_ema,
+    'ATR': add_atr,
+    'BBands': add_bollinger_bands,
+    'VWAP': add_vwap,
+}
+
+
 def add_indicators(dataframe, MACD=False, RSI=False, SMA=False, EMA=False, ATR=False, BBands=False, VWAP=False):
 
     """This function appends technical indicator data to the data frame and cleans up N/A values 
         It takes in a bunch of tickers then  appends if ticker param is true"""
-    indicators = []
-    indicator_names=[]
-    if MACD:
-        indicators.append(('MACD', add_macd))
-        indicator_names.append('MACD')
-    if RSI:
-        indicators.append(('RSI', add_rsi))
-        indicator_names.append('RSI')
-    if SMA:
-        indicators.append(('SMA', add_sma))
-        indicator_names.append('SMA')
-    if EMA:
-        indicators.append(('EMA', add_ema))
-        indicator_names.append('EMA')
-    if ATR:
-        indicators.append(('ATR', add_atr))
-        indicator_names.append('ATR')
-    if BBands:
-        indicators.append(('BBands', add_bollinger_bands))
-        indicator_names.append('BBands')
-    if VWAP:
-        indicators.append(('VWAP', add_vwap))
-        indicator_names.append('VWAP')
+    flags = {'MACD': MACD, 'RSI': RSI, 'SMA': SMA, 'EMA': EMA, 'ATR': ATR, 'BBands': BBands, 'VWAP': VWAP}
+    indicators = [(name, func) for name, func in INDICATOR_FUNCTIONS.items() if flags[name]]
+    base_columns = list(dataframe.columns)
+    added_columns = []
 
     def apply_indicator(indicator_func):
         try:
@@ -117,158 +197,284 @@ def add_indicators(dataframe, MACD=False, RSI=False, SMA=False, EMA=False, ATR=F
             return None
 
     with ThreadPoolExecutor(max_workers=8) as executor: # Makes application work in parallel
-        futures = [executor.submit(apply_indicator, func) for name, func in indicators] 
-        for future in futures:
-            result = future.result()
-            if result is not None:
-                dataframe = result # changes dataframe
-    if len(indicator_names)>0:
-        dataframe.dropna(subsets=indicator_names,inplace=True) # cleans df of N/A values 
+        results = list(executor.map(apply_indicator, [func for name, func in indicators]))
+    for result in results: # merged once every worker is done copying the df
+        if result is not None:
+            new_columns = [col for col in result.columns if col not in base_columns]
+            dataframe[new_columns] = result[new_columns] # adds the indicator's columns to the df
+            added_columns += new_columns
+    if added_columns:
+        dataframe.dropna(subset=added_columns, inplace=True) # cleans df of N/A values 
     return dataframe
 
 
+def add_indicators_panel(panel, **flags):
+    """Computes the selected indicators for every ticker of a panel at once. The indicator helpers only read
+        and assign columns, so they run unchanged on a dict of wide frames and vectorize across tickers"""
+    for name, func in INDICATOR_FUNCTIONS.items():
+        if flags.get(name):
+            try:
+                func(panel)
+            except Exception as e:
+                logger.error(f"Error applying indicator {func.__name__} to panel: {e}")
+    return panel
+
+
+def split_panel(panel):
+    """Splits a panel into the per-ticker frames `train_models` expects, with targets added"""
+    frames = {}
+    for ticker in panel['Close'].columns:
+        dataframe = pd.DataFrame({field: wide[ticker] for field, wide in panel.items()})
+        dataframe = dataframe.dropna() # drops rows before listing and indicator warm-up rows
+        if not dataframe.empty:
+            frames[ticker] = add_targets(dataframe)
+    return frames
+
+
+# Columns shipped in the columnar chart payload
+CHART_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+CHART_INTERVALS = ['1d', '1wk', '1mo']
+
+# Indicators that can be drawn on a chart: the utils function, the panel it is drawn on and how many integer
+# parameters it takes. Indicators with per_param get one series per parameter (SMA:50,200), the others pass
+# all parameters to a single call (MACD:12,26,9). Without parameters the utils defaults are used.
+CHART_OVERLAYS = {
+    'SMA': {'function': add_sma, 'panel': 'price', 'per_param': True, 'max_params': 5},
+    'EMA': {'function': add_ema, 'panel': 'price', 'per_param': True, 'max_params': 5},
+    'BBands': {'function': add_bollinger_bands, 'panel': 'price', 'per_param': False, 'max_params': 1},
+    'VWAP': {'function': add_vwap, 'panel': 'price', 'per_param': False, 'max_params': 0},
+    'RSI': {'function': add_rsi, 'panel': 'indicator', 'per_param': True, 'max_params': 3},
+    'ATR': {'function': add_atr, 'panel': 'indicator', 'per_param': True, 'max_params': 3},
+    'MACD': {'function': add_macd, 'panel': 'indicator', 'per_param': False, 'max_params': 3},
+}
+
+
+def fetch_chart_data(ticker, interval='1d', years=5):
+    """
+    Fetches the last `years` years of bars for a chart (all available history with years=None), one row per
+    bar with Date, Open, High, Low, Close and Volume
+    """
+    if interval not in CHART_INTERVALS:
+        raise ValueError(f"Interval must be one of {CHART_INTERVALS}")
+    # Set the start date `years` years before today
+    time = datetime.now()
+    startyear = time.year - years if years else 1900
+    startStr = f"{startyear}-01-01"
+    yesterday = (time - timedelta(days=1))
+
+    # Fetch historical data for the specified interval
+    ticker_obj = yf.Ticker(ticker)
+    dataframe = ticker_obj.history(start=startStr, end=yesterday, interval=interval)
+    if dataframe.empty:
+        raise ValueError(f"No data found for ticker {ticker}")
+
+    chartData = dataframe.reset_index()
+    chartData['Date'] = pd.to_datetime(chartData['Date']).dt.date
+    chartData.drop(['Dividends', 'Stock Splits'], axis=1, inplace=True, errors='ignore') # drops unnecessary data
+    return chartData
+
+
+def parse_overlay_spec(spec):
+    """
+    Parses an overlay list such as 'SMA:50,200;BBands;MACD' into [('SMA', (50, 200)), ('BBands', ()), ('MACD', ())].
+    Raises ValueError for unknown indicators or bad parameters.
+    """
+    overlays = []
+    for item in (spec or '').split(';'):
+        if not item.strip():
+            continue
+        name, _, params = item.partition(':')
+        name = name.strip()
+        if name not in CHART_OVERLAYS:
+            raise ValueError(f"Unknown overlay {name!r}. Use any of {list(CHART_OVERLAYS)}")
+        try:
+            params = tuple(int(param) for param in params.split(',') if param.strip())
+        except ValueError:
+            raise ValueError(f"Overlay parameters must be integers, got {item.strip()!r}")
+        if len(params) > CHART_OVERLAYS[name]['max_params'] or any(param < 1 for param in params):
+            raise ValueError(f"Invalid parameters for overlay {name}: {params}")
+        overlays.append((name, params))
+    return overlays
+
+
+def add_overlays(chartData, overlays):
+    """
+    Computes the overlay series on a chart frame in one pass over the bars already fetched. Returns the frame
+    with the new columns and one descriptor per series: its column, the panel it belongs to and the trace type.
+    """
+    chartData = chartData.copy()
+    added = []
+    for name, params in overlays:
+        overlay = CHART_OVERLAYS[name]
+        calls = [(param,) for param in params] if overlay['per_param'] and params else [params]
+        for args in calls:
+            existing = set(chartData.columns)
+            overlay['function'](chartData, *args)
+            added += [
+                {'column': col, 'panel': overlay['panel'], 'type': 'bar' if col == 'MACD_Hist' else 'line'}
+                for col in chartData.columns if col not in existing
+            ]
+    return chartData, added
+
+
 def make_chart(ticker,interval='1d',zoom=60):
     """This function takes in a ticker of a stock then charts the price data of a stock"""
     try:
-        if interval not in ['1d', '1wk', '1mo']:
-            raise ValueError("Interval must be one of ['1d', '1wk', '1mo']")
-        # Set the start date to 5 years ago from today
-        time = datetime.now()
-        startyear = time.year - 5
-        startStr = f"{startyear}-01-01"
-        yesterday = (time - timedelta(days=1))
-        
-        # Fetch historical data for the specified interval
-        ticker_obj = yf.Ticker(ticker)
-        dataframe = ticker_obj.history(start=startStr, end=yesterday, interval=interval)
-        chartData = dataframe.copy()
-        if dataframe.empty:
-            raise ValueError(f"No data found for ticker {ticker}")
-        
-        chartData = chartData.reset_index() 
-        chartData['Date'] = pd.to_datetime(chartData['Date']).dt.date
-        length=len(chartData)
-
-        chartData.drop(['Dividends', 'Stock Splits'], axis=1, inplace=True, errors='ignore') # drops unnecessary data
-       
-         # Determine initial zoom range
-        zoom_data=chartData[-zoom:]
-
-
-        # used to adjust view of chart
-        price_min=zoom_data['Low'].min()
-        price_max=zoom_data['High'].max()
-        volume_max=chartData['Volume'].max()
-        # Create the figure with subplots
-        fig = make_subplots(
-            rows=2, cols=1,
-            shared_xaxes=True,
-            vertical_spacing=0.01,
-            row_heights=[0.7, 0.3]
-        )
+        return build_chart(fetch_chart_data(ticker, interval), zoom=zoom) # returns chart
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return None
 
-        # Add candlestick trace
-        fig.add_trace(
-            go.Candlestick(
-                x=chartData['Date'].astype(str),
-                open=chartData['Open'],
-                high=chartData['High'],
-                low=chartData['Low'],
-                close=chartData['Close'],
-                name='Price',
-                increasing_line_color='green',
-                decreasing_line_color='red',
-                
-            ),
-            row=1, col=1
-        )
-        
-        # Add volume bar trace
+
+def build_chart(chartData, zoom=60, overlays=()):
+    """
+    Builds the candlestick and volume figure for bars from `fetch_chart_data`. Overlays from `add_overlays` are
+    drawn over the price, or in a third indicator panel below the volume.
+    """
+    length=len(chartData)
+    indicator_panel = any(overlay['panel'] == 'indicator' for overlay in overlays)
+
+     # Determine initial zoom range
+    zoom_data=chartData[-zoom:]
+
+
+    # used to adjust view of chart
+    price_min=zoom_data['Low'].min()
+    price_max=zoom_data['High'].max()
+    volume_max=chartData['Volume'].max()
+    # Create the figure with subplots
+    fig = make_subplots(
+        rows=3 if indicator_panel else 2, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.01,
+        row_heights=[0.55, 0.2, 0.25] if indicator_panel else [0.7, 0.3]
+    )
+
+    # Add candlestick trace
+    fig.add_trace(
+        go.Candlestick(
+            x=chartData['Date'].astype(str),
+            open=chartData['Open'],
+            high=chartData['High'],
+            low=chartData['Low'],
+            close=chartData['Close'],
+            name='Price',
+            increasing_line_color='green',
+            decreasing_line_color='red',
+            
+        ),
+        row=1, col=1
+    )
+    
+    # Add volume bar trace
+    fig.add_trace(
+        go.Bar(
+            x=chartData['Date'].astype(str),
+            y=chartData['Volume'],
+            name='Volume',
+            marker_color='blue',
+            opacity=0.5,
+        ),
+        row=2, col=1
+    )
+
+    # Add indicator overlays
+    for overlay in overlays:
+        trace_type = go.Bar if overlay['type'] == 'bar' else go.Scatter
+        trace_style = dict(opacity=0.5) if overlay['type'] == 'bar' else dict(mode='lines', line=dict(width=1))
         fig.add_trace(
-            go.Bar(
-                x=chartData['Date'].astype(str),
-                y=chartData['Volume'],
-                name='Volume',
-                marker_color='blue',
-                opacity=0.5,
-            ),
-            row=2, col=1
+            trace_type(x=chartData['Date'].astype(str), y=chartData[overlay['column']], name=overlay['column'], **trace_style),
+            row=1 if overlay['panel'] == 'price' else 3, col=1
         )
-    
 
-        # Update layout
+
+    # Update layout
+    fig.update_layout(
+    
+        xaxis=dict(
+            type='category',
+            showgrid=False,
+            showticklabels=False,  # Hide x-axis labels on top chart
+            range=[length-zoom,length],
+          
+        ),
+        xaxis2=dict(
+            type='category',
+            showgrid=False,
+            showticklabels=False,
+            tickformat='%b %d, %Y',
+            ticks='outside',
+            range=[length-zoom,length]
+        ),
+        yaxis=dict(
+            title='Price',
+            showgrid=True,
+            gridcolor='rgba(200,200,200,0.2)',
+            range=[price_min * 0.95, price_max * 1.05]  # Add padding
+        ),
+        yaxis2=dict(
+            title='Volume',
+            showgrid=False,
+            range=[0, volume_max*1.1],
+            side='right',
+            fixedrange=True 
+        ),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.02,
+            xanchor='right',
+            x=1
+        ),
+        margin=dict(
+            l=60, r=20, t=50, b=50
+        ),
+        plot_bgcolor='white',
+        paper_bgcolor='white'
+    )
+
+    if indicator_panel:
         fig.update_layout(
-        
-            xaxis=dict(
-                type='category',
-                showgrid=False,
-                showticklabels=False,  # Hide x-axis labels on top chart
-                range=[length-zoom,length],
-              
-            ),
-            xaxis2=dict(
-                type='category',
-                showgrid=False,
-                showticklabels=False,
-                tickformat='%b %d, %Y',
-                ticks='outside',
-                range=[length-zoom,length]
-            ),
-            yaxis=dict(
-                title='Price',
-                showgrid=True,
-                gridcolor='rgba(200,200,200,0.2)',
-                range=[price_min * 0.95, price_max * 1.05]  # Add padding
-            ),
-            yaxis2=dict(
-                title='Volume',
-                showgrid=False,
-                range=[0, volume_max*1.1],
-                side='right',
-                fixedrange=True 
-            ),
-            legend=dict(
-                orientation='h',
-                yanchor='bottom',
-                y=1.02,
-                xanchor='right',
-                x=1
-            ),
-            margin=dict(
-                l=60, r=20, t=50, b=50
-            ),
-            plot_bgcolor='white',
-            paper_bgcolor='white'
+            xaxis3=dict(type='category', showgrid=False, showticklabels=False, range=[length-zoom,length]),
+            yaxis3=dict(title='Indicator', showgrid=True, gridcolor='rgba(200,200,200,0.2)')
         )
 
-        # Add hover templates for better interactivity
+    # Add hover templates for better interactivity
 
-        # Update x-axes properties
-        fig.update_xaxes(
-            rangeslider_visible=False,
-            showline=True,
-            linewidth=1,
-            linecolor='black',
-            mirror=True
-        )
+    # Update x-axes properties
+    fig.update_xaxes(
+        rangeslider_visible=False,
+        showline=True,
+        linewidth=1,
+        linecolor='black',
+        mirror=True
+    )
 #
-        ## Update y-axes properties
-        fig.update_yaxes(
-            showline=True,
-            linewidth=1,
-            linecolor='black',
-            mirror=True
-        )
-        
-        return fig # returns chart
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return None
+    ## Update y-axes properties
+    fig.update_yaxes(
+        showline=True,
+        linewidth=1,
+        linecolor='black',
+        mirror=True
+    )
+    
+    return fig # returns chart
+
 
+def make_classifier(config=None, class_weights_dict=None):
+    """Builds the classifier named in a tuned config, LDA when there is none"""
+    classifier = (config or {}).get('classifier', DEFAULT_CLASSIFIER)
+    params = dict(classifier.get('params', {}))
+    if classifier['name'] == 'random_forest':
+        params.setdefault('random_state', 42)
+        params.setdefault('class_weight', class_weights_dict)
+    return CLASSIFIERS[classifier['name']](**params)
 
-def train_models(dataframe, dwm):
+
+def train_models(dataframe, dwm, config=None):
     """Train the regression model on the given dataframe and predicition perios (DWM)
-        this returns the accuracy and the prediction of the next trading period """
+        this returns the accuracy and the prediction of the next trading period
+        config is an optional tuned model config (see model_configs.py)"""
     if dataframe.shape[0] < 10:
         logger.error("Not enough data to train the model.") 
         raise ValueError("Not enough data to train the model.")
@@ -309,10 +515,8 @@ def train_models(dataframe, dwm):
     class_weights = class_weight.compute_class_weight('balanced', classes=classes, y=Y_train)
     class_weights_dict = dict(zip(classes, class_weights))
 
-   #Used for later featuer
-    #rf = RandomForestClassifier(random_state=42, class_weight=class_weights_dict)
-    #inits LDA objects=
-    rf = LinearDiscriminantAnalysis()
+    # inits the tuned classifier, LDA by default
+    rf = make_classifier(config, class_weights_dict)
    
     # Fit the model
     rf.fit(X_train, Y_train)
@@ -336,9 +540,58 @@ def train_models(dataframe, dwm):
         'today_prediction': int(today_prediction),
     }#returns the accuracy and prediction
 
-def train_regression_models(dataframe,dwm):
+def make_sequences(features_scaled, target_scaled, sequence_len):
+    """Creates the rolling feature windows and matching targets the LSTM trains on.
+        The windows are a strided view of features_scaled, so memory-mapped features are not copied here"""
+    count = len(target_scaled) - sequence_len
+    if count <= 0:
+        return np.empty((0, sequence_len, features_scaled.shape[1])), np.empty((0, 1))
+    # window i covers rows i .. i+sequence_len-1, shape (count, sequence_len, features)
+    X_Sequence = sliding_window_view(features_scaled, sequence_len, axis=0)[:count].transpose(0, 2, 1)
+    Y_Sequence = np.take(target_scaled, np.arange(count) + sequence_len - 3, axis=0)
+    return X_Sequence, Y_Sequence
+
 
-    """Takes in dataframe and trains LSTM model """
+def build_lstm(input_shape, units=64):
+    """makes and compiles the LSTM model"""
+    model = Sequential([
+        LSTM(units, activation='relu',  input_shape=input_shape),
+    # Output layer with 1 unit for regression
+    Dense(1)
+    ])
+    #compiles Model
+    model.compile(optimizer='adam', loss='mean_squared_error')
+    return model
+
+
+def fit_lstm(model, X_train, Y_train, tier=DEFAULT_TRAINING_TIER):
+    """fits Model, stopping early once the validation loss stalls or the tier's time budget is spent"""
+    budget = TRAINING_TIERS.get(tier)
+    if budget is None:
+        raise ValueError(f"Unknown training tier '{tier}'. Use one of {list(TRAINING_TIERS)}")
+    callbacks = [
+        EarlyStopping(monitor='val_loss', patience=budget['patience'], restore_best_weights=True),
+        TimeBudget(budget['time_limit']),
+    ]
+    history = model.fit(
+        X_train, Y_train,
+        epochs=budget['max_epochs'],
+        batch_size=budget['batch_size'],
+        validation_split=0.1,  # keras takes the last 10% so validation stays after the training window
+        callbacks=callbacks,
+        verbose=0
+    )
+    logger.info(f"LSTM ({tier}) trained for {len(history.history['loss'])} of {budget['max_epochs']} epochs")
+    return history
+
+
+def train_regression_models(dataframe,dwm,tier=DEFAULT_TRAINING_TIER,config=None,arrays=None):
+
+    """Takes in dataframe and trains LSTM model within the budget of the given training tier
+        config is an optional tuned model config (see model_configs.py)
+        arrays are the scaled training arrays from the feature store, built in memory when not given """
+    if tier not in TRAINING_TIERS:
+        raise ValueError(f"Unknown training tier '{tier}'. Use one of {list(TRAINING_TIERS)}")
     if dataframe.shape[0] < 50:
         logger.error("Not enough data to train the regression model.")
         return None
@@ -348,34 +601,19 @@ def train_regression_models(dataframe,dwm):
 
     target_map = {1: 'Close_Tomorrow', 2:'Close_NextWeek', 3:  'Close_NextMonth'}
     target_col = target_map.get(dwm)
-    print("target",target_col)
     if not target_col:
         return None
-    sequence_len = {1: 5, 2: 7 , 3: 10}.get(dwm, 1)
-
-    # Define feature columns
-    target_vars = ['Close_Tomorrow', 'Close_NextWeek', 'Close_NextMonth','Tomorrow','Month','Week']
-    feature_columns = [col for col in dataframe.columns if col not in target_vars]
-    
-    # gets X and Y datasets 
-    X = dataframe[feature_columns].values
-
-    dataframe = dataframe.dropna(subset=[target_col])
-    Y = dataframe[target_col].values
-
-    # scalar transforms data
-    scaler_X = MinMaxScaler(feature_range=(0, 1))
-    scaler_Y = MinMaxScaler(feature_range=(0, 1))
-    features_scaled = scaler_X.fit_transform(X)
-    target_scaled = scaler_Y.fit_transform(Y.reshape(-1, 1))
+    settings = (config or {}).get('regression', {}).get(str(dwm), DEFAULT_REGRESSION[dwm])
+    sequence_len = settings['sequence_len']
+
+    # gets the scaled X and Y datasets
+    if arrays is None:
+        arrays = build_training_arrays(dataframe)
+    features_scaled = arrays['features']
+    target_scaled = arrays['targets'][target_col]
+    target_bounds = arrays['target_bounds'][target_col]
     #Creates Sequences for Training
-    X_Sequence=[]
-    Y_Sequence=[]
-    for i in range(len(target_scaled)-sequence_len):
-        X_Sequence.append(features_scaled[i:i +sequence_len])
-        Y_Sequence.append(target_scaled[i + sequence_len-3])
-    X_Sequence=np.array(X_Sequence)
-    Y_Sequence=np.array(Y_Sequence)
+    X_Sequence, Y_Sequence = make_sequences(features_scaled, target_scaled, sequence_len)
 
     # Split data into training and testing sets
     split_index = int(len(X_Sequence) * 0.8)
@@ -386,27 +624,16 @@ def train_regression_models(dataframe,dwm):
     X_train, X_test = X_Sequence[:split_index], X_Sequence[split_index:]
     Y_train, Y_test = Y_Sequence[:split_index], Y_Sequence[split_index:]
 
-    # makes LSTM model
-    model = Sequential([
-        LSTM(64, activation='relu',  input_shape=(X_train.shape[1], X_train.shape[2])),
-    # Output layer with 1 unit for regression
-    Dense(1)
-    ])
-    #compiles Model
-    model.compile(optimizer='adam', loss='mean_squared_error')
-
-    #fits Model
-    model.fit(X_train, Y_train, epochs=25, batch_size=32, verbose=1)
- 
-
-
+    # makes and fits LSTM model
+    model = build_lstm((X_train.shape[1], X_train.shape[2]), units=settings['units'])
+    fit_lstm(model, X_train, Y_train, tier)
 
     # Evaluate the Model
     # gets prediction
-    Y_pred = model.predict(X_test)
-    predictions_rescaled = scaler_Y.inverse_transform(Y_pred)
+    Y_pred = model.predict(X_test, verbose=0)
+    predictions_rescaled = unscale_target(Y_pred, target_bounds)
     #rescales prediction
-    y_test_rescaled = scaler_Y.inverse_transform(Y_test.reshape(-1, 1))
+    y_test_rescaled = unscale_target(Y_test.reshape(-1, 1), target_bounds)
 
     #gets accuracy metrics
     mse = mean_squared_error(y_test_rescaled, predictions_rescaled)
@@ -417,8 +644,8 @@ def train_regression_models(dataframe,dwm):
     latest_data = features_scaled[-sequence_len:]
     latest_data_df = np.expand_dims(latest_data,axis=0)
     #gets next prediction
-    next_prediction_scaled = model.predict(latest_data_df)
-    next_prediction = scaler_Y.inverse_transform(next_prediction_scaled)[0][0]
+    next_prediction_scaled = model.predict(latest_data_df, verbose=0)
+    next_prediction = unscale_target(next_prediction_scaled, target_bounds)[0][0]
     logger.info(f"Regression metrics for {next_prediction} - MSE: {mse}, MAE: {mae}, R2: {r2}") #log output 
     # formats next prediction
     next_prediction=int(next_prediction*100)
@@ -468,50 +695,47 @@ def get_stock_data(ticker):
         return None
 
 
-def get_predictions(ticker, MACD=False, RSI=False, SMA=False, EMA=False, ATR=False, BBands=False, VWAP=False):
+# Prediction horizons by the dwm code the training functions take
+HORIZONS = {1: 'Tomorrow', 2: 'Week', 3: 'Month'}
+
+
+def train_for_horizon(dataframe, dwm, tier=DEFAULT_TRAINING_TIER, config=None, arrays=None):
+    """Trains the classification and regression model for one horizon, returns (dwm, classification, regression)"""
+    try:
+        classification_result = train_models(dataframe, dwm, config=config) # trains classification model
+        regression_result = train_regression_models(dataframe, dwm, tier=tier, config=config, arrays=arrays) # trains regression model
+        return (dwm, classification_result, regression_result) # returns results
+    except Exception as e:
+        logger.error(f"Error training model for dwm={dwm}: {e}") # logs error
+        return (dwm, None, None)
+
+
+def get_predictions(ticker, MACD=False, RSI=False, SMA=False, EMA=False, ATR=False, BBands=False, VWAP=False,
+                    tier=DEFAULT_TRAINING_TIER):
     try:
         dataframe = retrieve_data(ticker)
         if dataframe is None:
             return None
 
         # Add indicators in parallel
-        dataframe = add_indicators(
-            dataframe,
-            MACD=MACD,
-            RSI=RSI,
-            SMA=SMA,
-            EMA=EMA,
-            ATR=ATR,
-            BBands=BBands,
-            VWAP=VWAP
-        ) # adds indicators 
+        indicator_flags = {'MACD': MACD, 'RSI': RSI, 'SMA': SMA, 'EMA': EMA, 'ATR': ATR, 'BBands': BBands, 'VWAP': VWAP}
+        dataframe = add_indicators(dataframe, **indicator_flags) # adds indicators 
 
         predictions = {}
-
-        def train_for_horizon(dwm):
-            try:
-                classification_result = train_models(dataframe, dwm) # trains classification model
-                
-                regression_result = train_regression_models(dataframe, dwm) # trains regression model
-                return (dwm, classification_result, regression_result) # returns results
-            except Exception as e:
-                logger.error(f"Error training model for dwm={dwm}: {e}") # logs error
-                return (dwm, None, None)
+        config = get_model_config(ticker, indicator_flags) # tuned for these indicators, None falls back to the defaults
+        # scaled arrays memory-mapped from the feature store, shared by the three horizon workers
+        arrays = get_training_arrays(ticker, indicator_flags, dataframe)
 
         # Use ThreadPoolExecutor to train models in parallel
         with ThreadPoolExecutor(max_workers=3) as executor: 
-            futures = [executor.submit(train_for_horizon, dwm) for dwm in [1, 2, 3]]
+            futures = [executor.submit(train_for_horizon, dataframe, dwm, tier, config, arrays) for dwm in HORIZONS]
             for future in as_completed(futures):
                 dwm, classification_result, regression_result = future.result()
                 if classification_result and regression_result: 
-                    time_horizon_map = {1: 'Tomorrow', 2: 'Week', 3: 'Month'}
-                    horizon = time_horizon_map.get(dwm) # gets dwm translation
-                    predictions[horizon] = {
+                    predictions[HORIZONS[dwm]] = {
                         'classification': classification_result,
                         'regression': regression_result
                     } # returns results 
-                else:
-                    print("if statment missed")
 
         return predictions if predictions else None
 
@@ -520,14 +744,88 @@ def get_predictions(ticker, MACD=False, RSI=False, SMA=False, EMA=False, ATR=Fal
         return None
 
 
-def get_stock_chart(ticker,interval='1d'):
-    dataframe = retrieve_data(ticker) # gets stock data
-    if dataframe is None:
+def get_stock_chart(ticker,interval='1d',overlays=()):
+    """Chart figure with the given overlays, all computed from a single fetch of the ticker's bars"""
+    try:
+        chartData, added = add_overlays(fetch_chart_data(ticker, interval), overlays)
+        return build_chart(chartData, overlays=added)
+    except Exception as e:
+        logger.error(f"Error building chart for {ticker}: {e}")
         return None
-    fig = make_chart(ticker,interval=interval) # gets chart
-    if fig is None:
+
+
+def encode_column(values, dtype):
+    """Packs a numeric column as base64 of its little-endian bytes (a JS typed array on the client)"""
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode('ascii')
+
+
+def json_column(values):
+    """Column as a JSON list rounded to 4 decimals, NaN becomes null"""
+    values = np.round(values.astype(float), 4)
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def chart_payload(chartData, zoom=60, pack=False, points=None, style='candles', overlays=()):
+    """
+    Columnar chart payload: dates as epoch seconds and one array per OHLCV column, plus the few layout
+    numbers `build_chart` derives. With pack the columns are base64 packed float64 dates / float32 OHLCV,
+    otherwise plain JSON arrays with prices rounded to 4 decimals.
+    With points the series is reduced to that many samples: candles are aggregated per bucket, the line
+    style keeps only the close picked by LTTB. The zoom window is rescaled to the reduced series so the
+    same span of time stays in view.
+    Overlay columns from `add_overlays` are shipped like the price columns, with their descriptors under
+    `overlays` (warm-up values are NaN, or null in JSON).
+    """
+    length = len(chartData)
+    zoom_data = chartData[-zoom:]
+    price_range = [float(zoom_data['Low'].min()) * 0.95, float(zoom_data['High'].max()) * 1.05]
+    volume_max = float(chartData['Volume'].max())
+
+    if style == 'line':
+        chartData = chartData.iloc[lttb_indices(chartData['Close'].values, points)]
+        columns_shipped = ['Close']
+    else:
+        chartData = ohlc_buckets(chartData, points)
+        columns_shipped = list(CHART_COLUMNS)
+        volume_max = float(chartData['Volume'].max())  # summed per bucket
+    columns_shipped += [overlay['column'] for overlay in overlays]
+    if len(chartData) < length:
+        zoom = max(1, int(np.ceil(zoom * len(chartData) / length)))
+
+    dates = pd.to_datetime(chartData['Date']).values.astype('datetime64[s]').astype(np.int64)
+    layout = {
+        'zoom': zoom,
+        'price_range': price_range,
+        'volume_range': [0, volume_max * 1.1],
+    }
+    if pack:
+        columns = {'date': encode_column(dates, '<f8')}
+        columns.update({col.lower(): encode_column(chartData[col].values, '<f4') for col in columns_shipped})
+        dtypes = {name: ('float64' if name == 'date' else 'float32') for name in columns}
+    else:
+        columns = {'date': dates.tolist()}
+        columns.update({col.lower(): json_column(chartData[col].values) for col in columns_shipped})
+        dtypes = {name: ('int64' if name == 'date' else 'number') for name in columns}
+    return {
+        'format': 'columnar',
+        'encoding': 'base64' if pack else 'json',
+        'style': style,
+        'length': len(chartData),
+        'source_length': length,
+        'dtypes': dtypes,
+        'columns': columns,
+        'layout': layout,
+        'overlays': [dict(overlay, column=overlay['column'].lower()) for overlay in overlays],
+    }
+
+
+def get_stock_chart_columnar(ticker, interval='1d', zoom=60, pack=False, points=None, style='candles', overlays=()):
+    try:
+        chartData, added = add_overlays(fetch_chart_data(ticker, interval), overlays)
+        return chart_payload(chartData, zoom=zoom, pack=pack, points=points, style=style, overlays=added)
+    except Exception as e:
+        logger.error(f"Error building chart payload for {ticker}: {e}")
         return None
-    return fig
 
 
 def send_contact_form(contact_data):
@@ -571,6 +869,31 @@ def get_current_stock_price(ticker):
         return None
 
 
+def get_current_stock_prices(tickers):
+    """
+    Latest price of many tickers with one multi-ticker request, as {ticker: price}. Tickers without data are
+    left out, the caller decides how to handle them.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    if not tickers:
+        return {}
+    try:
+        data = yf.download(
+            tickers, period='5d', interval='1d',
+            auto_adjust=True, group_by='column', threads=True, progress=False
+        ) # one request for every ticker, a few days back so a ticker that did not trade today still has a close
+        if data.empty:
+            raise ValueError(f"No data found for tickers {tickers}")
+        closes = data['Close']
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(tickers[0])
+        latest = closes.ffill().iloc[-1]
+        return {ticker: float(latest[ticker]) for ticker in tickers if ticker in latest and pd.notna(latest[ticker])}
+    except Exception as e:
+        logger.error(f"Error getting current stock prices for {tickers}: {e}")
+        return {}
+
+
 def get_stock_price_at_date(ticker, purchase_date=None):
     try:
         ticker_obj = yf.Ticker(ticker)
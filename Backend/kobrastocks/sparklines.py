@@ -0,0 +1,97 @@
+"""
+------------------Prologue--------------------
+File Name: sparklines.py
+Path: Backend/kobrastocks/sparklines.py
+
+Description:
+Small trend lines for listing screens (favorites, watchlist, portfolio). The last N daily closes of many tickers
+are fetched with one multi-ticker download, reduced to a fixed number of points with LTTB and cached until the
+next daily bar, so a screen full of tiles costs one small request. Key functions include:
+- `get_sparklines`: Sparkline data for a list of tickers, downloading only the ones not cached yet.
+
+Input:
+Ticker symbols, number of closes and number of points per line.
+
+Output:
+Dict of ticker to downsampled closes, last close and change over the window.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+import yfinance as yf
+
+from .cache import TTLCache, seconds_until_next_bar
+from .downsampling import lttb_indices
+
+logger = logging.getLogger(__name__)
+
+MAX_SPARKLINE_TICKERS = 50
+MAX_SPARKLINE_DAYS = 365
+DEFAULT_SPARKLINE_DAYS = 60
+DEFAULT_SPARKLINE_POINTS = 30
+
+_sparklines = TTLCache(maxsize=2048)
+
+
+def _download_closes(tickers, days):
+    """Wide frame of daily closes (one column per ticker) covering at least `days` trading days"""
+    start = (datetime.now() - timedelta(days=int(days * 7 / 5) + 10)).strftime('%Y-%m-%d')
+    data = yf.download(
+        list(tickers), start=start, interval='1d',
+        auto_adjust=True, group_by='column', threads=True, progress=False
+    ) # one request for every ticker
+    if data.empty:
+        return None
+    return data['Close']
+
+
+def _sparkline(closes, days, points):
+    closes = closes.dropna().values[-days:]
+    if len(closes) < 2:
+        return None
+    sampled = closes[lttb_indices(closes, points)]
+    return {
+        'closes': np.round(sampled, 4),
+        'last': float(closes[-1]),
+        'change': float((closes[-1] / closes[0] - 1) * 100),
+    }
+
+
+def get_sparklines(tickers, days=DEFAULT_SPARKLINE_DAYS, points=DEFAULT_SPARKLINE_POINTS):
+    """
+    Sparklines for every ticker with data, keyed by ticker. Cached lines are reused until the next daily bar,
+    all other tickers are fetched together in a single download.
+    """
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    result = {}
+    missing = []
+    for ticker in tickers:
+        cached = _sparklines.get((ticker, days, points))
+        if cached is not None:
+            result[ticker] = cached
+        else:
+            missing.append(ticker)
+    if not missing:
+        return result
+
+    try:
+        closes = _download_closes(missing, days)
+    except Exception as e:
+        logger.error(f"Error downloading sparkline data for {missing}: {e}")
+        return result
+    if closes is None:
+        return result
+
+    ttl = seconds_until_next_bar()
+    for ticker in missing:
+        if ticker not in closes.columns:
+            continue
+        line = _sparkline(closes[ticker], days, points)
+        if line is not None:
+            _sparklines.set((ticker, days, points), line, ttl=ttl)
+            result[ticker] = line
+    return result
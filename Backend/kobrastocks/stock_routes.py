@@ -1,19 +1,20 @@
 # stock_routes.py
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response, stream_with_context, current_app
 from flask_jwt_extended import jwt_required
 from .services import get_stock_data
-from .utils import generate_stock_analysis_prompt,get_stock_chat_analysis
+from .utils import generate_stock_analysis_prompt, get_stock_chat_analysis, stock_analysis_fingerprint
+from .chat_client import stream_chat_completion, STOCK_SYSTEM_MESSAGE
+from .json_provider import dumps_bytes
 
 stocks = Blueprint('stocks', __name__, url_prefix='/api/stocks')
 
 
-@stocks.route('/<string:ticker>/analysis', methods=['GET']) # analysis get request
-@jwt_required()
-def get_stock_analysis(ticker):
+def analysis_stock_data(ticker):
+    """Stock data for the analysis prompt, with the user's holding from request.args when given"""
     stock_data = get_stock_data(ticker) # gets stock data
     if not stock_data:
-        return jsonify({'message': 'Stock data not found.'}), 404 # stock not found error
+        return None
 
     # Extract user-specific data from request.args
     user_shares = request.args.get('user_shares', type=float)
@@ -30,10 +31,53 @@ def get_stock_analysis(ticker):
         stock_data['user_current_value'] = user_value
         stock_data['user_profit_loss'] = user_pl
         stock_data['user_profit_loss_percentage'] = user_pl_percentage
+    return stock_data
+
+
+def sse_event(event, data):
+    # one server-sent event, data JSON encoded so newlines in the text cannot end the event early
+    return b'event: ' + event.encode() + b'\ndata: ' + dumps_bytes(data) + b'\n\n'
+
+
+@stocks.route('/<string:ticker>/analysis', methods=['GET']) # analysis get request
+@jwt_required()
+def get_stock_analysis(ticker):
+    stock_data = analysis_stock_data(ticker)
+    if not stock_data:
+        return jsonify({'message': 'Stock data not found.'}), 404 # stock not found error
 
     prompt = generate_stock_analysis_prompt(stock_data) # gets prompts for stock
-    chat_response = get_stock_chat_analysis([prompt]) # gets responses from chat gpt 
+    # repeat views with the same bucketed inputs are served from the reply cache
+    chat_response = get_stock_chat_analysis([prompt], cache_key=stock_analysis_fingerprint(stock_data)) # gets responses from chat gpt 
     if chat_response:
         return jsonify({'analysis': chat_response[0]}), 200 # success code
     else:
-        return jsonify({'message': 'Error generating stock analysis.'}), 500 # error code
\ No newline at end of file
+        return jsonify({'message': 'Error generating stock analysis.'}), 500 # error code
+
+
+@stocks.route('/<string:ticker>/analysis/stream', methods=['GET']) # token streaming analysis
+@jwt_required()
+def stream_stock_analysis(ticker):
+    def generate():
+        # `token` events carry text as the model writes it, then one `done` (or `error`) event ends the stream
+        yield b': stream opened\n\n'  # first bytes go out before the quote lookups and the model answer
+        try:
+            stock_data = analysis_stock_data(ticker)
+            if not stock_data:
+                yield sse_event('error', {'message': 'Stock data not found.'}) # stock not found error
+                return
+            prompt = generate_stock_analysis_prompt(stock_data)
+            cache_key = stock_analysis_fingerprint(stock_data)
+            for text in stream_chat_completion(prompt, STOCK_SYSTEM_MESSAGE, cache_key=cache_key):
+                yield sse_event('token', {'text': text})
+        except Exception as e:
+            current_app.logger.error(f"Error streaming stock analysis for {ticker}: {e}")
+            yield sse_event('error', {'message': 'Error generating stock analysis.'})
+            return
+        yield sse_event('done', {})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}, # proxies must not buffer the events
+    )
@@ -0,0 +1,168 @@
+"""
+------------------Prologue--------------------
+File Name: tuning.py
+Path: Backend/kobrastocks/tuning.py
+
+Description:
+Offline hyperparameter search for the per-ticker models, run with `flask tune-models`. Key functions include:
+- `search_classifier`: Grid searches LDA and random forest settings with `GridSearchCV` over `TimeSeriesSplit` folds.
+- `search_lstm_windows`: Scores LSTM sequence lengths and layer sizes per horizon with time series cross validation,
+  reading the scaled matrices from the feature store.
+- `tune`: Tunes one ticker, or a sector by averaging the fold scores of its members, and stores the best config under
+  its indicator selection, where `train_models` and `train_regression_models` pick it up for requests with the same
+  indicators.
+Both searches fan out over every core (scikit-learn / joblib `n_jobs=-1`).
+
+Input:
+Ticker symbols (optionally grouped into a sector) and indicator selection.
+
+Output:
+Best configs persisted through model_configs.py.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import logging
+from datetime import datetime
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import GridSearchCV, TimeSeriesSplit
+from sklearn.pipeline import Pipeline
+
+from .feature_store import get_training_arrays
+from .model_configs import save_model_config
+from .services import (
+    retrieve_panel,
+    add_indicators_panel,
+    split_panel,
+    make_sequences,
+    build_lstm,
+    fit_lstm,
+    HORIZONS,
+)
+
+logger = logging.getLogger(__name__)
+
+CV_SPLITS = 5
+
+# Candidates for the classifier `train_models` uses, the 'model' step is swapped between estimators
+CLASSIFIER_GRID = [
+    {'model': [LinearDiscriminantAnalysis()], 'model__solver': ['svd']},
+    {'model': [LinearDiscriminantAnalysis()], 'model__solver': ['lsqr'], 'model__shrinkage': ['auto', 0.1, 0.5]},
+    {
+        'model': [RandomForestClassifier(random_state=42, class_weight='balanced')],
+        'model__n_estimators': [100, 300],
+        'model__max_depth': [None, 5, 10],
+        'model__min_samples_leaf': [1, 5],
+    },
+]
+CLASSIFIER_NAMES = {LinearDiscriminantAnalysis: 'lda', RandomForestClassifier: 'random_forest'}
+
+# Candidates for the LSTM `train_regression_models` builds
+SEQUENCE_LENGTHS = [5, 7, 10, 15, 21]
+LSTM_UNITS = [32, 64]
+
+CLASSIFICATION_TARGETS = {1: 'Tomorrow', 2: 'Week', 3: 'Month'}
+REGRESSION_TARGETS = {1: 'Close_Tomorrow', 2: 'Close_NextWeek', 3: 'Close_NextMonth'}
+TARGET_VARS = list(CLASSIFICATION_TARGETS.values()) + list(REGRESSION_TARGETS.values()) + ['Date']
+
+
+def _features(dataframe):
+    return dataframe[[col for col in dataframe.columns if col not in TARGET_VARS]]
+
+
+def search_classifier(frames):
+    """
+    Runs the classifier grid on every (ticker, horizon) dataset and returns the candidate with the best
+    mean cross validated accuracy across all of them, plus that score.
+    """
+    scores = []
+    candidates = None
+    for dataframe in frames:
+        X = _features(dataframe)
+        for target_col in CLASSIFICATION_TARGETS.values():
+            search = GridSearchCV(
+                Pipeline([('model', LinearDiscriminantAnalysis())]),
+                CLASSIFIER_GRID,
+                cv=TimeSeriesSplit(n_splits=CV_SPLITS),
+                scoring='accuracy',
+                n_jobs=-1,
+                error_score=np.nan,
+            )
+            search.fit(X, dataframe[target_col].astype(int))
+            scores.append(search.cv_results_['mean_test_score'])
+            candidates = search.cv_results_['params']  # same order for every fit
+    mean_scores = np.nanmean(np.vstack(scores), axis=0)
+    best = candidates[int(np.nanargmax(mean_scores))]
+    return {
+        'name': CLASSIFIER_NAMES[type(best['model'])],
+        'params': {key.split('__', 1)[1]: value for key, value in best.items() if key != 'model'},
+        'cv_accuracy': float(np.nanmax(mean_scores)),
+    }
+
+
+def _score_lstm(features_scaled, target_scaled, sequence_len, units, tier):
+    """Mean validation MSE (on scaled targets) of one LSTM candidate over time series folds"""
+    X_Sequence, Y_Sequence = make_sequences(features_scaled, target_scaled, sequence_len)
+    errors = []
+    for train_idx, test_idx in TimeSeriesSplit(n_splits=CV_SPLITS).split(X_Sequence):
+        model = build_lstm((X_Sequence.shape[1], X_Sequence.shape[2]), units=units)
+        fit_lstm(model, X_Sequence[train_idx], Y_Sequence[train_idx], tier)
+        predictions = model.predict(X_Sequence[test_idx], verbose=0)
+        errors.append(float(np.mean((predictions - Y_Sequence[test_idx]) ** 2)))
+    return float(np.mean(errors))
+
+
+def search_lstm_windows(frames, indicators={}, tier='fast'):
+    """
+    Picks the sequence length and layer size per horizon with the lowest mean fold MSE across the frames
+    (a dict of ticker to frame). Workers get the feature store memmaps, which joblib hands over by file
+    instead of pickling the arrays.
+    """
+    candidates = [(sequence_len, units) for sequence_len in SEQUENCE_LENGTHS for units in LSTM_UNITS]
+    arrays = {ticker: get_training_arrays(ticker, indicators, dataframe) for ticker, dataframe in frames.items()}
+    best = {}
+    for dwm, target_col in REGRESSION_TARGETS.items():
+        jobs = []
+        for ticker_arrays in arrays.values():
+            jobs += [
+                delayed(_score_lstm)(ticker_arrays['features'], ticker_arrays['targets'][target_col], sequence_len, units, tier)
+                for sequence_len, units in candidates
+            ]
+        scores = np.array(Parallel(n_jobs=-1)(jobs)).reshape(len(frames), len(candidates)).mean(axis=0)
+        sequence_len, units = candidates[int(np.argmin(scores))]
+        best[str(dwm)] = {'sequence_len': sequence_len, 'units': units, 'cv_mse': float(scores.min())}
+        logger.info(f"Best LSTM window for {HORIZONS[dwm]}: {best[str(dwm)]}")
+    return best
+
+
+def tune(tickers, indicators={}, sector=None, tier='fast'):
+    """
+    Tunes and stores a config. With a sector the config is shared by all given tickers, otherwise every
+    ticker is tuned and stored on its own. Returns {ticker or sector: config}.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    panel = retrieve_panel(tickers)
+    if panel is None:
+        raise ValueError(f"No data found for tickers {tickers}")
+    frames = split_panel(add_indicators_panel(panel, **indicators))
+    groups = {sector: frames} if sector else {ticker: {ticker: frame} for ticker, frame in frames.items()}
+
+    tuned = {}
+    for key, group in groups.items():
+        logger.info(f"Tuning {key} on {len(group)} ticker(s)")
+        config = {
+            'classifier': search_classifier(list(group.values())),
+            'regression': search_lstm_windows(group, indicators, tier),
+            'indicators': {name: bool(flag) for name, flag in indicators.items()},
+            'tuned_at': datetime.now().isoformat(),
+        }
+        if sector:
+            save_model_config(config, sector=sector, members=list(frames), indicators=indicators)
+        else:
+            save_model_config(config, ticker=key, indicators=indicators)
+        tuned[key] = config
+    return tuned
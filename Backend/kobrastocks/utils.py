@@ -21,13 +21,20 @@ Collaborators: Spencer Sliffe, Saje Cowell, Charlie Gillund
 ---------------------------------------------
 """
 import logging
-import os
 from datetime import datetime
 import numpy as np
 import pandas as pd
-from openai import OpenAI
 import yfinance as yf
 
+from .chat_client import (
+    bucket,
+    fingerprint,
+    chat_completions,
+    iter_chat_completions,
+    PORTFOLIO_SYSTEM_MESSAGE,
+    STOCK_SYSTEM_MESSAGE,
+)
+
 
 def format_date(date_str):
     """
@@ -121,7 +128,7 @@ def add_atr(dataframe, time=5):
     high_low = dataframe['High'] - dataframe['Low']
     high_close = np.abs(dataframe['High'] - dataframe['Close'].shift())
     low_close = np.abs(dataframe['Low'] - dataframe['Close'].shift())
-    true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+    true_range = np.fmax(np.fmax(high_low, high_close), low_close)  # element-wise so it also works on wide frames
     dataframe[f'ATR_{time}'] = true_range.rolling(window=time).mean()
     return dataframe
 
@@ -170,16 +177,25 @@ def calculate_diversification_ratio(data, weights, trading_days=252):
     if returns.shape[1] == 1:
         return 1.0
 
-    # Calculate daily volatilities and annualize them
-    volatilities_daily = returns.std()
-    volatilities_annual = volatilities_daily * np.sqrt(trading_days)
+    return calculate_diversification_ratio_from_cov(returns.cov() * trading_days, weights)
+
+
+def calculate_diversification_ratio_from_cov(cov_matrix_annual, weights):
+    """
+    Diversification ratio from an annualized covariance matrix, O(k^2) with no pass over the return rows.
+    """
+    weights = np.array(weights)
+    cov_matrix_annual = np.asarray(cov_matrix_annual)
+    if cov_matrix_annual.shape[0] == 1:
+        return 1.0
+
+    # Annualized volatilities are the square roots of the covariance diagonal
+    volatilities_annual = np.sqrt(np.diag(cov_matrix_annual))
 
     # Weighted sum of individual annualized volatilities
     weighted_volatility = np.dot(weights, volatilities_annual)
 
     # Calculate annualized portfolio volatility
-    cov_matrix_daily = returns.cov()
-    cov_matrix_annual = cov_matrix_daily * trading_days
     portfolio_volatility = np.sqrt(np.dot(weights.T, np.dot(cov_matrix_annual, weights)))
 
     # Compute diversification ratio
@@ -239,47 +255,37 @@ def generate_chat_prompts(portfolio_details, sharpe_ratio, diversification_ratio
     return [prompt1, prompt2, prompt3]
 
 
-def get_chat_analysis(prompts):
+def portfolio_analysis_fingerprint(portfolio_details, metrics):
+    """
+    Cache key of the portfolio commentary: holdings with prices to 3 significant digits and weights to whole
+    percents, metrics to 2 significant digits, so small price moves reuse the cached commentary.
+    """
+    holdings = sorted(
+        (item['ticker'].upper(), item['shares'], bucket(item['current_price']), round(float(item['weight_percentage'])))
+        for item in portfolio_details
+    )
+    names = ['expected_return', 'risk', 'sharpe_ratio', 'diversification_ratio', 'alpha', 'beta', 'sortino_ratio',
+             'max_drawdown']
+    return fingerprint('portfolio', {
+        'holdings': holdings,
+        'metrics': {name: bucket(float(metrics[name]), 2) for name in names if name in metrics},
+    })
+
+
+def iter_chat_analysis(prompts, cache_key=None):
+    """
+    Yields (index, response) for each prompt as its completion arrives, so callers can stream the commentary
+    instead of waiting for every prompt. The prompts run concurrently on the shared client.
+    """
+    yield from iter_chat_completions(prompts, PORTFOLIO_SYSTEM_MESSAGE, cache_key=cache_key)
+
+
+def get_chat_analysis(prompts, cache_key=None):
     """
-    Get analysis from OpenAI's ChatCompletion API using the generated prompts.
+    Get analysis from OpenAI's ChatCompletion API using the generated prompts, requested concurrently and
+    returned in prompt order. Replies are reused for the same `cache_key`.
     """
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise ValueError("OpenAI API key not found in environment variables.")
-
-    client = OpenAI(api_key=api_key)
-    responses = []
-    for i, prompt in enumerate(prompts):
-        try:
-            # Check if prompt length exceeds model's context window
-            if len(prompt) > 2048:
-                logging.warning(f"Prompt {i+1} is too long. Truncating the prompt.")
-                prompt = prompt[:2048]
-
-            # Create a chat completion
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a financial advisor providing insights on a stock portfolio."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=500,
-                n=1,
-                temperature=0.5,
-            )
-            # Extract the assistant's reply
-            message = response.choices[0].message.content.strip()
-            responses.append(message)
-        except Exception as e:
-            logging.error(f"OpenAI API error on prompt {i+1}: {e}")
-            responses.append("Could not generate response due to an error.")
-    return responses
+    return chat_completions(prompts, PORTFOLIO_SYSTEM_MESSAGE, cache_key=cache_key)
 
 
 def check_stock_validity(ticker):
@@ -302,47 +308,34 @@ def check_stock_validity(ticker):
         return False
 
 
-def get_stock_chat_analysis(prompts):
+def get_stock_chat_analysis(prompts, cache_key=None):
     """
-    Get analysis from OpenAI's ChatCompletion API using the generated prompts.
+    Get analysis from OpenAI's ChatCompletion API using the generated prompts, requested concurrently and
+    returned in prompt order. Replies are reused for the same `cache_key`.
     """
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise ValueError("OpenAI API key not found in environment variables.")
-
-    client = OpenAI(api_key=api_key)
-    responses = []
-    for i, prompt in enumerate(prompts):
-        try:
-            # Check if prompt length exceeds model's context window
-            if len(prompt) > 2048:
-                logging.warning(f"Prompt {i+1} is too long. Truncating the prompt.")
-                prompt = prompt[:2048]
-
-            # Create a chat completion
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a financial analyst providing insights on stocks."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=500,
-                n=1,
-                temperature=0.5,
-            )
-            # Extract the assistant's reply
-            message = response.choices[0].message.content.strip()
-            responses.append(message)
-        except Exception as e:
-            logging.error(f"OpenAI API error on prompt {i+1}: {e}")
-            responses.append("Could not generate response due to an error.")
-    return responses
+    return chat_completions(prompts, STOCK_SYSTEM_MESSAGE, cache_key=cache_key)
+
+
+def stock_analysis_fingerprint(stock_data):
+    """
+    Cache key of the stock commentary: prices and the user's amounts to 3 significant digits, the daily change to
+    half a percent and volume to 2 significant digits, so repeat views within a small move reuse the reply.
+    """
+    inputs = {
+        'ticker': stock_data['ticker'].upper(),
+        'close_price': bucket(stock_data['close_price']),
+        'low_price': bucket(stock_data['low_price']),
+        'high_price': bucket(stock_data['high_price']),
+        'percentage_change': round(stock_data['percentage_change'] * 2) / 2,
+        'volume': bucket(stock_data['volume'], 2),
+    }
+    if 'user_shares' in stock_data:
+        inputs['user'] = {
+            'shares': stock_data['user_shares'],
+            'pps_at_purchase': bucket(stock_data['user_pps_at_purchase']),
+            'profit_loss_percentage': bucket(stock_data['user_profit_loss_percentage'], 2),
+        }
+    return fingerprint('stock', inputs)
 
 
 def generate_stock_analysis_prompt(stock_data):
@@ -0,0 +1,59 @@
+"""Add portfolio transaction ledger
+
+Revision ID: 3f1c2a9b7d41
+Revises: d30ffe8189ab
+Create Date: 2026-10-19 10:12:44.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9b7d41'
+down_revision = 'd30ffe8189ab'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('portfolio_transactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('portfolio_id', sa.Integer(), nullable=False),
+    sa.Column('ticker', sa.String(length=10), nullable=False),
+    sa.Column('side', sa.String(length=6), nullable=False),
+    sa.Column('shares', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('cost_basis', sa.Float(), nullable=False),
+    sa.Column('realized_profit_loss', sa.Float(), nullable=False),
+    sa.Column('trade_date', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('portfolio_transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_portfolio_transactions_portfolio_ticker', ['portfolio_id', 'ticker'], unique=False)
+
+    with op.batch_alter_table('portfolio_stocks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('realized_profit_loss', sa.Float(), nullable=False, server_default='0'))
+
+    # existing holdings become one undated buy lot at their average price, so ledger and aggregate agree
+    op.execute(
+        "INSERT INTO portfolio_transactions "
+        "(portfolio_id, ticker, side, shares, price, cost_basis, realized_profit_loss, trade_date, created_at) "
+        "SELECT portfolio_id, ticker, 'buy', number_of_shares, pps_at_purchase, "
+        "number_of_shares * pps_at_purchase, 0, NULL, CURRENT_TIMESTAMP "
+        "FROM portfolio_stocks WHERE portfolio_id IS NOT NULL"
+    )
+
+
+def downgrade():
+    # closed positions only exist to keep their realized P&L, the old schema has nowhere to put it
+    op.execute("DELETE FROM portfolio_stocks WHERE number_of_shares = 0")
+    with op.batch_alter_table('portfolio_stocks', schema=None) as batch_op:
+        batch_op.drop_column('realized_profit_loss')
+
+    with op.batch_alter_table('portfolio_transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_portfolio_transactions_portfolio_ticker')
+
+    op.drop_table('portfolio_transactions')
@@ -0,0 +1,64 @@
+"""
+------------------Prologue--------------------
+File Name: conftest.py
+Path: Backend/tests/conftest.py
+
+Description:
+Shared fixtures for the numerical tests. Each fixture is a factory, so a test picks the size and seed of the data
+it builds. Key fixtures include:
+- `synthetic_returns`: Correlated daily returns of several tickers on business days.
+- `returns_state`: A state dict shaped like the one `returns_cache` builds, from a returns frame.
+- `empty_state`: A state with no rows, for feeding rows through the Welford updates.
+- `portfolio_and_benchmark`: Daily benchmark returns and a portfolio with a known beta against them.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def synthetic_returns():
+    """Factory for a rows x columns frame of correlated daily returns, tickers T0, T1, ..."""
+    def build(rows=500, columns=3, seed=7, drift=0.0004):
+        rng = np.random.default_rng(seed)
+        mixing = rng.normal(0, 0.01, (columns, columns))
+        values = rng.normal(0, 1, (rows, columns)) @ mixing + drift
+        return pd.DataFrame(
+            values, columns=[f'T{i}' for i in range(columns)], index=pd.bdate_range('2020-01-01', periods=rows)
+        )
+    return build
+
+
+@pytest.fixture
+def returns_state():
+    """Factory for a returns cache state (tickers, returns, n, mean, m2) from a returns frame"""
+    def build(returns):
+        values = returns.values
+        centered = values - values.mean(axis=0)
+        return {
+            'tickers': list(returns.columns), 'returns': returns, 'n': len(values),
+            'mean': values.mean(axis=0), 'm2': centered.T @ centered,
+        }
+    return build
+
+
+@pytest.fixture
+def empty_state():
+    """Factory for a state without rows"""
+    def build(tickers):
+        k = len(tickers)
+        return {'tickers': list(tickers), 'n': 0, 'mean': np.zeros(k), 'm2': np.zeros((k, k))}
+    return build
+
+
+@pytest.fixture
+def portfolio_and_benchmark():
+    """Factory for (portfolio, benchmark) daily return arrays, the portfolio having beta 1.2 and some noise"""
+    def build(rows=400, seed=5):
+        rng = np.random.default_rng(seed)
+        bench = rng.normal(0.0004, 0.011, rows)
+        return 0.0002 + 1.2 * bench + rng.normal(0, 0.006, rows), bench
+    return build
@@ -0,0 +1,71 @@
+"""
+------------------Prologue--------------------
+File Name: test_correlation.py
+Path: Backend/tests/test_correlation.py
+
+Description:
+Checks the blocked correlation matrix against pandas' pairwise DataFrame.corr, with full coverage and with tickers
+missing part of the window (the coverage MIN_COVERAGE still admits), and that the clustered stream keeps rows and
+columns in the header's order.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import numpy as np
+import pytest
+
+from kobrastocks import correlation
+from kobrastocks.correlation import get_returns_matrix, correlation_blocks, iter_correlation
+
+
+@pytest.fixture
+def patched_returns(monkeypatch):
+    """Serves a returns frame through `get_returns` instead of downloading"""
+    def install(frame):
+        monkeypatch.setattr(
+            correlation, 'get_returns',
+            lambda tickers, days: {t: frame[t].dropna().astype(np.float32) for t in tickers if t in frame}
+        )
+    return install
+
+
+def full_matrix(z, mask, block_rows=4):
+    return np.vstack([block for _, block in correlation_blocks(z, mask, block_rows)])
+
+
+def test_full_coverage_matches_pandas(synthetic_returns, patched_returns):
+    frame = synthetic_returns(252, columns=10)
+    patched_returns(frame)
+    kept, dropped, z, mask = get_returns_matrix(list(frame.columns), days=252)
+
+    assert kept == list(frame.columns) and not dropped and mask is None
+    np.testing.assert_allclose(full_matrix(z, mask), frame.corr().values, atol=5e-5)
+
+
+def test_partial_coverage_matches_pairwise_pandas(synthetic_returns, patched_returns):
+    frame = synthetic_returns(252, columns=10, seed=3)
+    frame['COPY'] = frame['T0']
+    frame.iloc[:40, frame.columns.get_loc('COPY')] = np.nan  # listed 40 days into the window
+    frame.iloc[100:130, frame.columns.get_loc('T5')] = np.nan  # a trading halt
+    patched_returns(frame)
+    kept, _, z, mask = get_returns_matrix(list(frame.columns), days=252)
+    matrix = full_matrix(z, mask)
+
+    assert mask is not None and kept == list(frame.columns)
+    np.testing.assert_allclose(np.diag(matrix), 1, atol=1e-5)
+    assert matrix[0, kept.index('COPY')] == pytest.approx(1, abs=1e-5)
+    np.testing.assert_allclose(matrix, frame.corr().values, atol=5e-5)
+
+
+def test_clustered_stream_follows_header_order(synthetic_returns, patched_returns):
+    frame = synthetic_returns(252, columns=8, seed=4)
+    frame.iloc[:30, 2] = np.nan
+    patched_returns(frame)
+    parts = list(iter_correlation(list(frame.columns), days=252, cluster=True, n_clusters=3, block_rows=3))
+    header, blocks = parts[0], parts[1:]
+    matrix = np.vstack([block['rows'] for block in blocks])
+
+    assert sorted(header['tickers']) == sorted(frame.columns)
+    assert sum(len(c['tickers']) for c in header['clusters']) == len(frame.columns)
+    expected = frame[header['tickers']].corr().values
+    np.testing.assert_allclose(matrix, expected, atol=1e-4)
@@ -0,0 +1,58 @@
+"""
+------------------Prologue--------------------
+File Name: test_covariance.py
+Path: Backend/tests/test_covariance.py
+
+Description:
+Checks the covariance estimators against reference computations: the sample estimate against np.cov, Ledoit-Wolf
+against the shrinkage formula written out, and EWMA against pandas' exponentially weighted covariance.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from kobrastocks.covariance import ledoit_wolf_covariance, ewma_covariance, get_covariance, EWMA_LAMBDA
+
+
+def test_ledoit_wolf_matches_shrinkage_formula(synthetic_returns):
+    values = synthetic_returns(300, columns=6, seed=9, drift=0.0).values
+    n, p = values.shape
+    centered = values - values.mean(axis=0)
+    sample = centered.T @ centered / n
+    target = np.trace(sample) / p
+    delta = ((sample - target * np.eye(p)) ** 2).sum()
+    beta = min(sum(((np.outer(x, x) - sample) ** 2).sum() for x in centered) / n ** 2, delta)
+    shrinkage = beta / delta
+    expected = (1 - shrinkage) * sample + shrinkage * target * np.eye(p)
+
+    np.testing.assert_allclose(ledoit_wolf_covariance(values), expected * n / (n - 1), rtol=1e-10)
+
+
+def test_ewma_matches_pandas(synthetic_returns):
+    values = synthetic_returns(300, columns=6, seed=9).values
+    frame = pd.DataFrame(values)
+    expected = frame.ewm(alpha=1 - EWMA_LAMBDA).cov(bias=True).loc[len(values) - 1]
+    np.testing.assert_allclose(ewma_covariance(values), expected.values, rtol=1e-10, atol=1e-18)
+
+
+def test_sample_covariance_matches_numpy(synthetic_returns, returns_state):
+    returns = synthetic_returns(300, columns=6, seed=9)
+    covariance = get_covariance(returns_state(returns), 'sample')
+    assert list(covariance.index) == list(covariance.columns) == list(returns.columns)
+    np.testing.assert_allclose(covariance.values, np.cov(returns.values, rowvar=False), rtol=1e-10)
+
+
+def test_shrinkage_improves_conditioning(synthetic_returns, returns_state):
+    # fewer rows than a comfortable sample estimate of 30 columns needs
+    state = returns_state(synthetic_returns(40, columns=30, seed=9))
+    sample = get_covariance(state, 'sample').values
+    shrunk = get_covariance(state, 'ledoit_wolf').values
+    assert np.linalg.cond(shrunk) < np.linalg.cond(sample)
+
+
+def test_unknown_estimator_raises(synthetic_returns, returns_state):
+    with pytest.raises(ValueError):
+        get_covariance(returns_state(synthetic_returns(20, columns=2)), 'bogus')
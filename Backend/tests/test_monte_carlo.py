@@ -0,0 +1,67 @@
+"""
+------------------Prologue--------------------
+File Name: test_monte_carlo.py
+Path: Backend/tests/test_monte_carlo.py
+
+Description:
+Checks the Monte Carlo risk engine: the Cholesky factor reproduces the covariance, chunked simulation is
+reproducible and sized right, and with normal daily returns the simulated 1-day VaR / CVaR agree with the
+closed-form values of `parametric_var`.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import numpy as np
+
+from kobrastocks.covariance import get_covariance
+from kobrastocks.monte_carlo import (
+    cholesky_factor, simulate_portfolio, value_at_risk, parametric_var, CHUNK_PATHS
+)
+
+
+def test_cholesky_factor_reproduces_covariance(synthetic_returns, returns_state):
+    state = returns_state(synthetic_returns(1000, seed=11))
+    for method in ('sample', 'ledoit_wolf', 'ewma'):
+        factor = cholesky_factor(state, method)
+        np.testing.assert_allclose(factor @ factor.T, get_covariance(state, method).values, rtol=1e-10, atol=1e-18)
+        assert np.allclose(factor, np.tril(factor))
+
+
+def test_simulation_is_chunked_and_reproducible(synthetic_returns, returns_state):
+    state = returns_state(synthetic_returns(1000, seed=11))
+    weights = np.array([0.5, 0.3, 0.2])
+    factor = cholesky_factor(state)
+    paths = CHUNK_PATHS * 2 + 123  # two full chunks and a partial one
+    first = simulate_portfolio(weights, state['mean'], factor, [1, 5], paths=paths, seed=3)
+    second = simulate_portfolio(weights, state['mean'], factor, [5, 1], paths=paths, seed=3)
+
+    assert first.shape == (2, paths)
+    np.testing.assert_array_equal(first, second)
+
+
+def test_value_at_risk_on_known_sample():
+    returns = np.linspace(-0.10, 0.09, 20)  # -0.10, -0.09, ..., 0.09
+    var, cvar = value_at_risk(returns, 0.90)
+    assert np.isclose(var, -np.quantile(returns, 0.10))
+    assert np.isclose(cvar, 0.095)  # mean loss of the two worst returns
+
+
+def test_simulated_one_day_var_matches_closed_form(synthetic_returns, returns_state):
+    state = returns_state(synthetic_returns(1000, seed=11))
+    weights = np.array([0.5, 0.3, 0.2])
+    simulated = simulate_portfolio(weights, state['mean'], cholesky_factor(state), [1], paths=400000, seed=5)[0]
+
+    daily_mean = weights @ state['mean']
+    daily_std = np.sqrt(weights @ get_covariance(state).values @ weights)
+    for confidence in (0.95, 0.99):
+        var, cvar = value_at_risk(simulated, confidence)
+        expected_var, expected_cvar = parametric_var(daily_mean, daily_std, confidence)
+        assert np.isclose(var, expected_var, rtol=0.02)
+        assert np.isclose(cvar, expected_cvar, rtol=0.02)
+
+
+def test_parametric_var_scales_with_horizon():
+    one_day, _ = parametric_var(0.0, 0.01, 0.95)
+    ten_day, _ = parametric_var(0.0, 0.01, 0.95, horizon_days=10)
+    assert np.isclose(one_day, 1.6448536 * 0.01)
+    assert np.isclose(ten_day, one_day * np.sqrt(10))
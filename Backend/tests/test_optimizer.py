@@ -0,0 +1,78 @@
+"""
+------------------Prologue--------------------
+File Name: test_optimizer.py
+Path: Backend/tests/test_optimizer.py
+
+Description:
+Checks the efficient frontier optimizer against closed-form results: the vectorized portfolio stats against a
+per-portfolio loop, and the SLSQP minimum variance and max Sharpe weights against the analytic global minimum
+variance and tangency portfolios on a covariance where neither hits the long-only bounds.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import numpy as np
+
+from kobrastocks.optimizer import (
+    portfolio_stats, random_portfolios, min_variance_weights, max_sharpe_weights, efficient_frontier
+)
+
+RISK_FREE_RATE = 0.02
+
+# annualized inputs with interior (all positive) analytic solutions
+MEAN_RETURNS = np.array([0.08, 0.10, 0.12, 0.07])
+VOLATILITIES = np.array([0.15, 0.20, 0.25, 0.12])
+CORRELATION = np.array([
+    [1.0, 0.3, 0.2, 0.1],
+    [0.3, 1.0, 0.4, 0.2],
+    [0.2, 0.4, 1.0, 0.1],
+    [0.1, 0.2, 0.1, 1.0],
+])
+COV_MATRIX = CORRELATION * np.outer(VOLATILITIES, VOLATILITIES)
+
+
+def test_portfolio_stats_matches_loop():
+    weights = np.random.default_rng(3).dirichlet(np.ones(4), size=50)
+    returns, risks, sharpe = portfolio_stats(weights, MEAN_RETURNS, COV_MATRIX, RISK_FREE_RATE)
+    for i, w in enumerate(weights):
+        risk = np.sqrt(w @ COV_MATRIX @ w)
+        assert np.isclose(returns[i], w @ MEAN_RETURNS, rtol=1e-12)
+        assert np.isclose(risks[i], risk, rtol=1e-12)
+        assert np.isclose(sharpe[i], (w @ MEAN_RETURNS - RISK_FREE_RATE) / risk, rtol=1e-12)
+
+
+def test_min_variance_matches_closed_form():
+    inverse = np.linalg.solve(COV_MATRIX, np.ones(4))
+    expected = inverse / inverse.sum()
+    assert (expected > 0).all()
+
+    weights, success = min_variance_weights(COV_MATRIX)
+    assert success
+    np.testing.assert_allclose(weights, expected, atol=1e-5)
+
+
+def test_max_sharpe_matches_tangency_portfolio():
+    inverse = np.linalg.solve(COV_MATRIX, MEAN_RETURNS - RISK_FREE_RATE)
+    expected = inverse / inverse.sum()
+    assert (expected > 0).all()
+
+    weights, success = max_sharpe_weights(MEAN_RETURNS, COV_MATRIX, RISK_FREE_RATE)
+    assert success
+    np.testing.assert_allclose(weights, expected, atol=1e-4)
+
+
+def test_efficient_frontier_is_ordered_and_dominates_random_portfolios():
+    frontier = efficient_frontier(MEAN_RETURNS, COV_MATRIX, points=15, max_weight=0.5)
+    returns, risks, _ = portfolio_stats(frontier, MEAN_RETURNS, COV_MATRIX)
+
+    assert len(frontier) == 15
+    np.testing.assert_allclose(frontier.sum(axis=1), 1, atol=1e-9)
+    assert (frontier >= 0).all() and (frontier <= 0.5 + 1e-6).all()
+    assert (np.diff(returns) > 0).all()
+    assert (np.diff(risks) > -1e-9).all()
+
+    # no random portfolio has lower risk than the frontier at the same or a higher return
+    _, cloud_returns, cloud_risks, _ = random_portfolios(MEAN_RETURNS, COV_MATRIX, samples=5000, max_weight=0.5, seed=1)
+    for target_return, risk in zip(returns, risks):
+        reaching = cloud_risks[cloud_returns >= target_return]
+        assert not len(reaching) or reaching.min() >= risk - 1e-9
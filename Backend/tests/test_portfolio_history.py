@@ -0,0 +1,66 @@
+"""
+------------------Prologue--------------------
+File Name: test_portfolio_history.py
+Path: Backend/tests/test_portfolio_history.py
+
+Description:
+Checks the cumulative position matrices of the portfolio history against replaying every event day by day, with
+several trades on one day, undated lots, trades before and after the range and unknown tickers, and the value and
+P&L series computed from them.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from kobrastocks.portfolio_history import position_matrices, history_series
+
+DATES = pd.bdate_range('2024-03-01', periods=30)
+TICKERS = ['AAA', 'BBB', 'CCC']
+EVENTS = [
+    ('AAA', None, 10, 1000.0),  # undated lot, held from the start
+    ('BBB', datetime(2024, 1, 15), 5, 250.0),  # before the range
+    ('AAA', datetime(2024, 3, 6, 15, 30), 4, 420.0),
+    ('AAA', datetime(2024, 3, 6, 10, 0), -2, -200.0),  # second trade on the same day
+    ('CCC', datetime(2024, 3, 9), 7, 70.0),  # Saturday, applies from the next session
+    ('BBB', datetime(2024, 3, 20), -5, -250.0),
+    ('ZZZ', datetime(2024, 3, 8), 3, 30.0),  # not among the tickers
+    ('CCC', datetime(2024, 6, 1), 1, 10.0),  # after the range
+]
+
+
+def replayed_positions(events, dates, tickers):
+    shares = np.zeros((len(dates), len(tickers)))
+    cost = np.zeros(len(dates))
+    for day, date in enumerate(dates):
+        for ticker, trade_date, share_delta, cost_delta in events:
+            if ticker not in tickers or (trade_date is not None and pd.Timestamp(trade_date).normalize() > date):
+                continue
+            shares[day, tickers.index(ticker)] += share_delta
+            cost[day] += cost_delta
+    return shares, cost
+
+
+def test_positions_match_replay():
+    shares, cost = position_matrices(EVENTS, DATES, TICKERS)
+    expected_shares, expected_cost = replayed_positions(EVENTS, DATES, TICKERS)
+    np.testing.assert_array_equal(shares, expected_shares)
+    np.testing.assert_allclose(cost, expected_cost)
+
+
+def test_history_series_values():
+    rng = np.random.default_rng(2)
+    closes = pd.DataFrame(rng.uniform(50, 150, (len(DATES), len(TICKERS))), index=DATES, columns=TICKERS)
+    closes.iloc[:5, 2] = np.nan  # CCC listed later
+    history = history_series(closes, EVENTS)
+    shares, cost = replayed_positions(EVENTS, DATES, TICKERS)
+
+    expected_value = (np.nan_to_num(closes.values) * shares).sum(axis=1)
+    np.testing.assert_allclose(history['value'], expected_value)
+    np.testing.assert_allclose(history['cost_basis'], cost)
+    np.testing.assert_allclose(history['profit_loss'], expected_value - cost)
+    np.testing.assert_allclose(history['profit_loss_percentage'], (expected_value - cost) * 100 / cost)
+    assert history['dates'][0] == '2024-03-01' and len(history['dates']) == len(DATES)
@@ -0,0 +1,52 @@
+"""
+------------------Prologue--------------------
+File Name: test_returns_cache.py
+Path: Backend/tests/test_returns_cache.py
+
+Description:
+Checks the running mean and covariance of the returns cache against pandas on the same rows, both when rows are
+only added and when the window slides (rows added at the end and removed from the start).
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import numpy as np
+
+from kobrastocks.returns_cache import welford_add, welford_remove, state_mean, state_covariance
+
+
+def test_welford_add_matches_pandas(synthetic_returns, empty_state):
+    returns = synthetic_returns(750, columns=5)
+    state = empty_state(returns.columns)
+    for row in returns.values:
+        welford_add(state, row)
+
+    assert state['n'] == len(returns)
+    np.testing.assert_allclose(state_mean(state), returns.mean(), rtol=1e-10, atol=1e-16)
+    np.testing.assert_allclose(state_covariance(state), returns.cov(), rtol=1e-10, atol=1e-16)
+
+
+def test_welford_remove_slides_the_window(synthetic_returns, empty_state):
+    returns = synthetic_returns(900, columns=5)
+    window = 500
+    state = empty_state(returns.columns)
+    for row in returns.values[:window]:
+        welford_add(state, row)
+    for start in range(1, len(returns) - window + 1):
+        welford_add(state, returns.values[start + window - 1])
+        welford_remove(state, returns.values[start - 1])
+
+    expected = returns.iloc[-window:]
+    assert state['n'] == window
+    np.testing.assert_allclose(state_mean(state), expected.mean(), rtol=1e-9, atol=1e-15)
+    np.testing.assert_allclose(state_covariance(state), expected.cov(), rtol=1e-9, atol=1e-15)
+
+
+def test_welford_remove_last_row_resets_state(empty_state):
+    state = empty_state(['A', 'B'])
+    row = np.array([0.01, -0.02])
+    welford_add(state, row)
+    welford_remove(state, row)
+
+    assert state['n'] == 0
+    assert not state['mean'].any() and not state['m2'].any()
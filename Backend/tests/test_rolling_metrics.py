@@ -0,0 +1,77 @@
+"""
+------------------Prologue--------------------
+File Name: test_rolling_metrics.py
+Path: Backend/tests/test_rolling_metrics.py
+
+Description:
+Checks the prefix-sum rolling kernels against a direct computation on every window: np.polyfit for beta and
+alpha, pandas rolling mean / std for the Sharpe ratio, and per-window loops for the Sortino ratio and max drawdown.
+
+Collaborators: Spencer Sliffe
+---------------------------------------------
+"""
+import numpy as np
+import pandas as pd
+
+from kobrastocks.rolling_metrics import (
+    window_sums, rolling_beta_alpha, rolling_sharpe, rolling_sortino, rolling_max_drawdown, rolling_metrics,
+    TRADING_DAYS
+)
+
+WINDOW = 63
+RISK_FREE_RATE = 0.02
+
+
+def test_window_sums():
+    values = np.arange(10, dtype=float)
+    np.testing.assert_allclose(window_sums(values, 3), [values[i - 2:i + 1].sum() for i in range(2, 10)])
+
+
+def test_beta_alpha_match_polyfit(portfolio_and_benchmark):
+    port, bench = portfolio_and_benchmark()
+    beta, alpha = rolling_beta_alpha(port, bench, WINDOW)
+    expected = np.array([
+        np.polyfit(bench[i:i + WINDOW], port[i:i + WINDOW], 1) for i in range(len(port) - WINDOW + 1)
+    ])
+    np.testing.assert_allclose(beta, expected[:, 0], rtol=1e-9)
+    np.testing.assert_allclose(alpha, expected[:, 1], rtol=1e-7, atol=1e-12)
+
+
+def test_sharpe_matches_pandas_rolling(portfolio_and_benchmark):
+    port, _ = portfolio_and_benchmark()
+    rolling = pd.Series(port).rolling(WINDOW)
+    mean = rolling.mean().values[WINDOW - 1:]
+    std = rolling.std().values[WINDOW - 1:]
+    expected = (mean * TRADING_DAYS - RISK_FREE_RATE) / (std * np.sqrt(TRADING_DAYS))
+    np.testing.assert_allclose(rolling_sharpe(port, WINDOW, RISK_FREE_RATE), expected, rtol=1e-9)
+
+
+def test_sortino_matches_loop(portfolio_and_benchmark):
+    port, _ = portfolio_and_benchmark()
+    expected = []
+    for i in range(len(port) - WINDOW + 1):
+        window = port[i:i + WINDOW]
+        excess = window - RISK_FREE_RATE / TRADING_DAYS
+        downside = excess[excess < 0]
+        deviation = np.sqrt((downside ** 2).mean()) * np.sqrt(TRADING_DAYS) if len(downside) else 1e-6
+        expected.append((window.mean() * TRADING_DAYS - RISK_FREE_RATE) / deviation)
+    np.testing.assert_allclose(rolling_sortino(port, WINDOW, RISK_FREE_RATE), expected, rtol=1e-9)
+
+
+def test_max_drawdown_matches_loop(portfolio_and_benchmark):
+    port, _ = portfolio_and_benchmark()
+    expected = []
+    for i in range(len(port) - WINDOW + 1):
+        wealth = np.concatenate(([1.0], np.cumprod(1 + port[i:i + WINDOW])))
+        expected.append((wealth / np.maximum.accumulate(wealth) - 1).min())
+    np.testing.assert_allclose(rolling_max_drawdown(port, WINDOW), expected, rtol=1e-9, atol=1e-15)
+
+
+def test_rolling_metrics_aligns_dates_and_skips_long_windows(portfolio_and_benchmark):
+    port, bench = portfolio_and_benchmark(rows=100)
+    index = pd.bdate_range('2024-01-01', periods=100)
+    result = rolling_metrics(pd.Series(port, index=index), pd.Series(bench, index=index), windows=(20, 252))
+
+    assert list(result) == ['20']
+    assert len(result['20']['dates']) == len(result['20']['beta']) == 81
+    assert result['20']['dates'][0] == index[19].strftime('%Y-%m-%d')
@@ -0,0 +1,127 @@
+// client/src/chart.js
+// Builds Plotly figures from the columnar /api/stock_chart payload (format=columnar).
+
+// Decodes the payload columns into plain arrays, unpacking base64 typed arrays when pack=true was used
+export function decodeColumns(payload) {
+  if (payload.encoding !== 'base64') {
+    return payload.columns;
+  }
+  const columns = {};
+  Object.entries(payload.columns).forEach(([name, data]) => {
+    const bytes = Uint8Array.from(atob(data), (c) => c.charCodeAt(0));
+    const TypedArray = payload.dtypes[name] === 'float64' ? Float64Array : Float32Array;
+    columns[name] = Array.from(new TypedArray(bytes.buffer));
+  });
+  return columns;
+}
+
+// Epoch seconds -> 'YYYY-MM-DD' category labels, matching the old server side figure
+export function formatDates(epochs) {
+  return epochs.map((seconds) => new Date(seconds * 1000).toISOString().slice(0, 10));
+}
+
+// Prepends an older page of decoded columns to the ones already loaded
+export function prependColumns(older, newer) {
+  const merged = {};
+  Object.keys(newer).forEach((name) => {
+    merged[name] = (older[name] || []).concat(newer[name]);
+  });
+  return merged;
+}
+
+// Vertical domains of stacked subplot rows, top row first, as make_subplots lays them out
+function rowDomains(heights, spacing = 0.01) {
+  const available = 1 - spacing * (heights.length - 1);
+  const domains = [];
+  let top = 1;
+  heights.forEach((height) => {
+    const bottom = Math.max(0, top - height * available);
+    domains.push([Number(bottom.toFixed(3)), Number(top.toFixed(3))]);
+    top = bottom - spacing;
+  });
+  return domains;
+}
+
+// Same candlestick + volume figure the server used to send as a full Plotly dict.
+// Pass columns to plot bars merged from several pages, they default to the payload's own.
+export function buildCandlestickFigure(payload, columns = decodeColumns(payload)) {
+  const dates = formatDates(columns.date);
+  const length = dates.length;
+  const zoom = payload.layout.zoom;
+  const overlays = payload.overlays || [];
+  const indicatorPanel = overlays.some((overlay) => overlay.panel === 'indicator');
+  const domains = rowDomains(indicatorPanel ? [0.55, 0.2, 0.25] : [0.7, 0.3]);
+
+  const data = [
+    {
+      type: 'candlestick',
+      x: dates,
+      open: columns.open,
+      high: columns.high,
+      low: columns.low,
+      close: columns.close,
+      name: 'Price',
+      increasing: {line: {color: 'green'}},
+      decreasing: {line: {color: 'red'}},
+      xaxis: 'x',
+      yaxis: 'y',
+    },
+    {
+      type: 'bar',
+      x: dates,
+      y: columns.volume,
+      name: 'Volume',
+      marker: {color: 'blue'},
+      opacity: 0.5,
+      xaxis: 'x2',
+      yaxis: 'y2',
+    },
+    // Indicator overlays over the price, or in the indicator panel below the volume
+    ...overlays.map((overlay) => ({
+      type: overlay.type === 'bar' ? 'bar' : 'scatter',
+      mode: overlay.type === 'bar' ? undefined : 'lines',
+      line: overlay.type === 'bar' ? undefined : {width: 1},
+      opacity: overlay.type === 'bar' ? 0.5 : undefined,
+      x: dates,
+      y: columns[overlay.column].map((value) => (value === null || Number.isNaN(value) ? null : value)),
+      name: overlay.column.toUpperCase(),
+      xaxis: overlay.panel === 'price' ? 'x' : 'x3',
+      yaxis: overlay.panel === 'price' ? 'y' : 'y3',
+    })),
+  ];
+
+  const axisLine = {showline: true, linewidth: 1, linecolor: 'black', mirror: true};
+  const layout = {
+    xaxis: {
+      ...axisLine, type: 'category', showgrid: false, showticklabels: false,
+      range: [length - zoom, length], rangeslider: {visible: false}, anchor: 'y', domain: [0, 1], matches: 'x2',
+    },
+    xaxis2: {
+      ...axisLine, type: 'category', showgrid: false, showticklabels: false, tickformat: '%b %d, %Y',
+      ticks: 'outside', range: [length - zoom, length], rangeslider: {visible: false}, anchor: 'y2', domain: [0, 1],
+    },
+    yaxis: {
+      ...axisLine, title: {text: 'Price'}, showgrid: true, gridcolor: 'rgba(200,200,200,0.2)',
+      range: payload.layout.price_range, anchor: 'x', domain: domains[0],
+    },
+    yaxis2: {
+      ...axisLine, title: {text: 'Volume'}, showgrid: false, range: payload.layout.volume_range,
+      side: 'right', fixedrange: true, anchor: 'x2', domain: domains[1],
+    },
+    ...(indicatorPanel && {
+      xaxis3: {
+        ...axisLine, type: 'category', showgrid: false, showticklabels: false,
+        range: [length - zoom, length], rangeslider: {visible: false}, anchor: 'y3', domain: [0, 1], matches: 'x2',
+      },
+      yaxis3: {
+        ...axisLine, title: {text: 'Indicator'}, showgrid: true, gridcolor: 'rgba(200,200,200,0.2)',
+        anchor: 'x3', domain: domains[2],
+      },
+    }),
+    legend: {orientation: 'h', yanchor: 'bottom', y: 1.02, xanchor: 'right', x: 1},
+    margin: {l: 60, r: 20, t: 50, b: 50},
+    plot_bgcolor: 'white',
+    paper_bgcolor: 'white',
+  };
+  return {data, layout};
+}
@@ -0,0 +1,67 @@
+// client/src/stream.js
+// Reads streaming API responses line by line with fetch, using the same base URL and token as axios.
+
+import axios from 'axios';
+
+function apiUrl(path, params) {
+  const url = new URL(path, axios.defaults.baseURL || window.location.origin);
+  Object.entries(params || {}).forEach(([key, value]) => url.searchParams.set(key, value));
+  return url;
+}
+
+// Calls onChunk(text) for every piece of the response body as it arrives, with the auth header axios uses
+async function readStream(path, params, onChunk) {
+  const headers = {};
+  if (axios.defaults.headers.common.Authorization) {
+    headers.Authorization = axios.defaults.headers.common.Authorization;
+  }
+  const response = await fetch(apiUrl(path, params), {headers});
+  if (!response.ok) {
+    throw new Error(`Request failed with status ${response.status}`);
+  }
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  for (;;) {
+    const {done, value} = await reader.read();
+    onChunk(decoder.decode(value || new Uint8Array(), {stream: !done}), done);
+    if (done) {
+      break;
+    }
+  }
+}
+
+// Calls onLine(object) for every JSON line of an application/x-ndjson response, resolves when the stream ends
+export async function streamNdjson(path, params, onLine) {
+  let buffer = '';
+  await readStream(path, params, (text, done) => {
+    buffer += text;
+    const lines = buffer.split('\n');
+    buffer = done ? '' : lines.pop();
+    lines.filter((line) => line.trim()).forEach((line) => onLine(JSON.parse(line)));
+  });
+}
+
+// Calls onEvent(name, data) for every server-sent event of a text/event-stream response, data JSON decoded.
+// fetch is used instead of EventSource because EventSource cannot send the Authorization header.
+export async function streamEvents(path, params, onEvent) {
+  let buffer = '';
+  await readStream(path, params, (text, done) => {
+    buffer += text;
+    const events = buffer.split('\n\n');
+    buffer = done ? '' : events.pop();
+    events.forEach((block) => {
+      let name = 'message';
+      const data = [];
+      block.split('\n').forEach((line) => {
+        if (line.startsWith('event: ')) {
+          name = line.slice(7);
+        } else if (line.startsWith('data: ')) {
+          data.push(line.slice(6));
+        }
+      });
+      if (data.length) {
+        onEvent(name, JSON.parse(data.join('\n')));
+      }
+    });
+  });
+}